@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 from decouple import config
 
@@ -42,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero, para que mida la petición completa (ver reactores/middleware.py)
+    'reactores.middleware.InstrumentacionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,6 +56,8 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'config.urls'
 
+# Sin 'loaders' en OPTIONS, Django ya envuelve los cargadores con el cargador con caché
+# (cada plantilla se compila una vez por proceso); en desarrollo se recarga al editarla.
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -75,15 +80,104 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': config('DB_NAME'),
-        'USER': config('DB_USER'),
-        'PASSWORD': config('DB_PASSWORD'),
-        'HOST': config('DB_HOST', default='localhost'),
-        'PORT': config('DB_PORT', default='5432'),
+# Con DB_NAME se usa PostgreSQL; sin él (desarrollo local, pruebas) un SQLite en BASE_DIR.
+if config('DB_NAME', default=''):
+    # Pool de conexiones de psycopg 3 (uno por proceso del servidor): cada petición toma
+    # una conexión ya abierta en lugar de pagar la conexión TCP y la autenticación.
+    # Con varios procesos, procesos × DB_POOL_MAX_SIZE no debe pasar de max_connections.
+    # Sin pool (DB_POOL=False) se reutiliza la conexión de cada hilo durante DB_CONN_MAX_AGE s.
+    DB_POOL = config('DB_POOL', default=True, cast=bool)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME'),
+            'USER': config('DB_USER'),
+            'PASSWORD': config('DB_PASSWORD'),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            # El pool no admite conexiones persistentes: ya las mantiene él
+            'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=60, cast=int),
+            # Comprueba que la conexión sigue viva antes de usarla (con pool, al sacarla de él)
+            'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+            'OPTIONS': {
+                'pool': {
+                    'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                    'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+                    # Segundos que espera una petición a que quede libre una conexión
+                    'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+                    # Se cierran las conexiones sobrantes sin usar y se renuevan las viejas
+                    'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+                    'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=3600, cast=float),
+                },
+            } if DB_POOL else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
     }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Por defecto usamos caché en archivos: lo comparten todos los procesos del
+# servidor y también los comandos de importación, así que una invalidación
+# hecha desde `manage.py` se ve en la web al instante.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'atlas_nuclear_cache')),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=60 * 60 * 24, cast=int),
+    },
+    # Solo la versión de los datos (ver reactores/cache.py). Va aparte porque la caché por
+    # defecto, cuando se llena, borra entradas al azar, y si se llevara la versión se
+    # invalidaría todo; aquí hay una sola clave, así que nunca se llega a MAX_ENTRIES.
+    'estado': {
+        'BACKEND': config('CACHE_ESTADO_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_ESTADO_LOCATION', default=os.path.join(tempfile.gettempdir(), 'atlas_nuclear_estado')),
+        'TIMEOUT': None,
+    },
+}
+
+
+# Instrumentación
+# Cada respuesta lleva la cabecera Server-Timing; las peticiones que tardan más de
+# este umbral se registran (en JSON) en el logger reactores.middleware, y las métricas
+# por endpoint se publican en /metrics para Prometheus, solo para estas IPs. Detrás de un
+# proxy inverso REMOTE_ADDR es siempre la IP del proxy (todo lo que pase por él contaría
+# como permitido): en ese caso definir TOKEN_METRICAS, y Prometheus lo enviará en la
+# cabecera "Authorization: Bearer <token>" (bearer_token en la configuración del scrape).
+UMBRAL_PETICION_LENTA_MS = config('UMBRAL_PETICION_LENTA_MS', default=500, cast=int)
+IPS_METRICAS = config('IPS_METRICAS', default='127.0.0.1,::1', cast=lambda v: [s.strip() for s in v.split(',')])
+TOKEN_METRICAS = config('TOKEN_METRICAS', default='')
+
+# Con ASGI (uvicorn config.asgi:application) las APIs que consultan la BD se sirven con
+# sus variantes asíncronas (reactores/api_async.py). Con WSGI no aporta nada: dejarlo a False.
+APIS_ASYNC = config('APIS_ASYNC', default=False, cast=bool)
+
+# Páginas HTML enteras en caché para los usuarios anónimos (ver pagina_cacheada en
+# reactores/decorators.py). Se invalidan con los datos, como el resto de la caché.
+CACHE_PAGINAS = config('CACHE_PAGINAS', default=False, cast=bool)
+
+# Identificador de la versión desplegada (p. ej. el commit). Forma parte de la versión de
+# los datos, así que cada despliegue estrena ETags y claves de caché y nadie recibe HTML
+# o JSON con el formato anterior. Si se deja vacío, se calcula con un hash del código y
+# las plantillas de la app (ver version_codigo en reactores/cache.py).
+VERSION_DESPLIEGUE = config('VERSION_DESPLIEGUE', default='')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'reactores': {'handlers': ['console'], 'level': 'INFO'},
+    },
 }
 
 
@@ -1,9 +1,12 @@
 # En config/urls.py
 from django.contrib import admin
 from django.urls import path, include # Asegúrate de que 'include' esté importado
+from reactores.views import metricas_prometheus
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     # Añade esta línea. Todo lo que empiece con 'comparador/' será manejado por nuestra app.
     path('comparador/', include('reactores.urls')),
+    # Métricas de las peticiones para Prometheus (con TOKEN_METRICAS o desde IPS_METRICAS)
+    path('metrics', metricas_prometheus, name='metricas'),
 ]
\ No newline at end of file
@@ -1,3 +1,10 @@
 from django.contrib import admin
 
+from .models import AliasPais
+
 # Register your models here.
+
+@admin.register(AliasPais)
+class AliasPaisAdmin(admin.ModelAdmin):
+    list_display = ('nombre_bd', 'id_mapa')
+    search_fields = ('nombre_bd', 'id_mapa')
@@ -0,0 +1,111 @@
+# En reactores/analitica_tipos.py
+from collections import Counter, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.db.models import F
+
+from .cache import acachear_por_partes, cachear_por_partes
+from .flota import a_lista, matriz_flota
+from .models import Reactor
+
+# Columnas de cada reactor en la tabla de la enciclopedia; las dos últimas salen del
+# resumen de rendimiento, así que no hace falta recorrer el historial de cada uno
+CAMPOS_LISTA = ('id', 'nombre', 'pais', 'status', 'potencia_neta', 'factor_carga_vida', 'twh_acumulados')
+
+
+def _armar_respuesta(reactores, rendimiento):
+    """
+    Construye la respuesta de la enciclopedia para un tipo a partir de sus filas
+    de reactores (ya ordenadas por nombre) y de su rendimiento medio por año.
+    """
+    potencia_total = sum(r['potencia_neta'] for r in reactores if r['potencia_neta'])
+    paises = {r['pais'] for r in reactores}
+    paises_operadores = sorted(p for p in paises if p is not None) + ([None] if None in paises else [])
+
+    # Tiempo promedio de construcción (inicio de obra -> primera conexión)
+    duraciones = [
+        (r['fecha_primera_conexion'] - r['fecha_inicio_construccion']).days
+        for r in reactores
+        if r['fecha_inicio_construccion'] and r['fecha_primera_conexion']
+    ]
+    tiempo_promedio_construccion = None
+    if duraciones and sum(duraciones):
+        tiempo_promedio_construccion = round(sum(duraciones) / len(duraciones) / 365.25, 1)
+
+    # Línea de tiempo de despliegue: unidades conectadas por año
+    despliegue = Counter(r['fecha_primera_conexion'].year for r in reactores if r['fecha_primera_conexion'])
+
+    return {
+        'estadisticas': {
+            'unidades_totales': len(reactores),
+            'potencia_total_gw': round(potencia_total / 1000, 2),
+            'paises_operadores': paises_operadores,
+            'tiempo_promedio_construccion': tiempo_promedio_construccion,
+        },
+        'grafica_rendimiento': rendimiento,
+        'grafica_despliegue': [{'ano_conexion': ano, 'total': total} for ano, total in sorted(despliegue.items())],
+        'lista_reactores': [
+            {campo: r[campo] for campo in CAMPOS_LISTA}
+            for r in reactores
+        ],
+    }
+
+
+def _consulta_reactores():
+    return Reactor.objects.exclude(tipo_reactor_categoria__isnull=True).order_by('nombre').values(
+        'id', 'nombre', 'pais', 'status', 'potencia_neta', 'tipo_reactor_categoria',
+        'fecha_inicio_construccion', 'fecha_primera_conexion',
+        factor_carga_vida=F('resumen__factor_carga_vida'), twh_acumulados=F('resumen__twh_acumulados'),
+    )
+
+
+def _agrupar(filas, matriz):
+    reactores_por_tipo = defaultdict(list)
+    for fila in filas:
+        reactores_por_tipo[fila['tipo_reactor_categoria']].append(fila)
+
+    # Producción media por tipo y año, desde la matriz de la flota en memoria
+    rendimiento_por_tipo = {}
+    etiquetas, medias, registros = matriz.agregado('produccion', por='tipo')
+    for tipo, media, n in zip(etiquetas, medias, registros):
+        rendimiento_por_tipo[tipo] = [
+            {'ano': int(ano), 'produccion_promedio': produccion}
+            for ano, produccion, hay in zip(matriz.anos, a_lista(media), n) if hay
+        ]
+
+    return {
+        tipo: _armar_respuesta(reactores, rendimiento_por_tipo.get(tipo, []))
+        for tipo, reactores in reactores_por_tipo.items()
+    }
+
+
+def calcular_datos_tipos():
+    """
+    Calcula el análisis de la enciclopedia para TODOS los tipos con una consulta que
+    trae las filas de reactores; el rendimiento medio por tipo y año sale de la matriz
+    de la flota (reactores/flota.py). Funciona igual en PostgreSQL y en SQLite.
+    """
+    return _agrupar(_consulta_reactores(), matriz_flota())
+
+
+def datos_tipo(tipo):
+    """
+    Devuelve el análisis de un tipo de reactor desde la caché. Todos los tipos se calculan
+    de una pasada, pero cada uno se guarda aparte: una petición solo lee el suyo.
+    Un tipo sin reactores devuelve la misma estructura con todo a cero.
+    """
+    return cachear_por_partes('tipos', tipo, calcular_datos_tipos) or _armar_respuesta([], [])
+
+
+async def _acalcular_datos_tipos():
+    # Las filas de los reactores y luego la matriz de la flota (que si no está en memoria
+    # se carga con sus propias consultas): el ORM asíncrono las ejecuta una tras otra
+    filas = [fila async for fila in _consulta_reactores()]
+    return _agrupar(filas, await sync_to_async(matriz_flota)())
+
+
+async def adatos_tipo(tipo):
+    """
+    Versión asíncrona de datos_tipo() para las vistas asíncronas.
+    """
+    return await acachear_por_partes('tipos', tipo, _acalcular_datos_tipos) or _armar_respuesta([], [])
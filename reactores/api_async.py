@@ -0,0 +1,123 @@
+# En reactores/api_async.py
+# Variantes asíncronas (async def) de las vistas que consultan la BD, para servir la app
+# con ASGI (uvicorn): usan el ORM asíncrono de Django, así que el bucle de eventos no se
+# queda parado mientras esperan a la BD. Las consultas de cada petición no se solapan:
+# el ORM las ejecuta una tras otra en el hilo de la petición (sync_to_async con
+# thread_sensitive). Las activa APIS_ASYNC (ver urls.py); con WSGI se siguen sirviendo
+# las de views.py, que devuelven exactamente lo mismo.
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.urls import path
+
+from .analitica_tipos import adatos_tipo
+from .decorators import api_condicional, pagina_cacheada
+from .detalle import aobtener_reactores
+from .estadisticas import aestadisticas_dashboard
+from .mapa import adatos_mapa
+from .views import (
+    _consulta_paises_por_tipo, _consulta_reactores_por_pais, _consulta_reactores_por_tipo_y_pais,
+    _contexto_dashboard, _parametros_lote, _respuesta_historial, _respuesta_lote, _respuesta_reactor,
+)
+
+
+@pagina_cacheada
+async def vista_dashboard(request):
+    """
+    Renderiza la página principal del dashboard con estadísticas, gráficas y guías.
+    """
+    contexto = _contexto_dashboard(await aestadisticas_dashboard())
+    return render(request, 'reactores/dashboard.html', contexto)
+
+
+@api_condicional
+async def api_datos_mapa(request):
+    """
+    API que devuelve datos agregados por país para colorear el mapa del atlas.
+    """
+    return JsonResponse(await adatos_mapa())
+
+
+@api_condicional
+async def api_reactores_por_pais(request):
+    """
+    API: Devuelve la lista de reactores de un país específico.
+    """
+    return JsonResponse({'reactores': [reactor async for reactor in _consulta_reactores_por_pais(request)]})
+
+
+@api_condicional
+async def api_paises_por_tipo(request):
+    """
+    API: Devuelve los países que tienen un TIPO de reactor específico.
+    """
+    return JsonResponse({'paises': [pais async for pais in _consulta_paises_por_tipo(request)]})
+
+
+@api_condicional
+async def api_reactores_por_tipo_y_pais(request):
+    """
+    API: Devuelve los reactores para un TIPO y país específicos.
+    """
+    return JsonResponse({'reactores': [reactor async for reactor in _consulta_reactores_por_tipo_y_pais(request)]})
+
+
+@api_condicional
+async def api_reactores(request):
+    """
+    API: Devuelve los datos de varios reactores en una sola petición (ver views.api_reactores).
+    """
+    try:
+        ids, incluir = _parametros_lote(request)
+    except ValueError as error:
+        return JsonResponse({'success': False, 'error': str(error)}, status=400)
+
+    reactores = await aobtener_reactores(
+        ids, incluir_historial='historial' in incluir, incluir_resumen='resumen' in incluir,
+    )
+    return _respuesta_lote(ids, reactores)
+
+
+@api_condicional
+async def api_reactor_datos(request, pk):
+    """
+    API: Devuelve todos los datos de un solo reactor en formato JSON.
+    """
+    return _respuesta_reactor(await aobtener_reactores([pk]))
+
+
+@api_condicional
+async def api_reactor_historial(request, pk):
+    return _respuesta_historial(await aobtener_reactores([pk], incluir_historial=True))
+
+
+@api_condicional
+async def api_datos_tipo(request, tipo):
+    """
+    API que devuelve un análisis completo y agregado para un tipo de reactor.
+    """
+    return JsonResponse(await adatos_tipo(tipo))
+
+
+# {nombre de la ruta: vista asíncrona que la sirve con APIS_ASYNC}
+VISTAS = {
+    'dashboard': vista_dashboard,
+    'api_datos_mapa': api_datos_mapa,
+    'api_reactores_por_pais': api_reactores_por_pais,
+    'api_paises_por_tipo': api_paises_por_tipo,
+    'api_reactores_por_tipo_y_pais': api_reactores_por_tipo_y_pais,
+    'api_reactores': api_reactores,
+    'api_reactor_datos': api_reactor_datos,
+    'api_reactor_historial': api_reactor_historial,
+    'api_datos_tipo': api_datos_tipo,
+}
+
+
+def con_vistas_async(patrones):
+    """
+    Copia de las rutas `patrones` en la que las de VISTAS usan su vista asíncrona.
+    Las demás (las que no hacen consultas o sirven ficheros) se quedan como están.
+    """
+    return [
+        path(str(patron.pattern), VISTAS[patron.name], name=patron.name) if patron.name in VISTAS else patron
+        for patron in patrones
+    ]
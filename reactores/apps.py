@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ReactoresConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reactores'
+
+    def ready(self):
+        # Registra los receptores que invalidan la caché cuando cambian los datos
+        from . import signals  # noqa: F401
+
+        # Los medidores se instalan antes de que se abra ninguna conexión: las conexiones son
+        # de cada hilo, y una abierta en otro hilo antes que el middleware no se mediría
+        if 'reactores.middleware.InstrumentacionMiddleware' in settings.MIDDLEWARE:
+            from .instrumentacion import instalar_medidores
+            instalar_medidores()
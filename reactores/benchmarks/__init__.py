@@ -0,0 +1,54 @@
+# En reactores/benchmarks/__init__.py
+"""
+Escenarios de rendimiento que se ejecutan con `python manage.py benchmark`.
+
+Cada escenario es una función registrada con @escenario que recibe el número
+de repeticiones y devuelve un diccionario {métrica: valor o resumen de tiempos}.
+"""
+import statistics
+import time
+
+ESCENARIOS = {}
+
+
+def escenario(nombre):
+    """
+    Decorador que registra una función como escenario de benchmark.
+    """
+    def registrar(funcion):
+        ESCENARIOS[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def medir(funcion, repeticiones=1, preparar=None):
+    """
+    Ejecuta `funcion` varias veces y devuelve la lista de tiempos en milisegundos.
+    Si se indica `preparar`, se llama antes de cada repetición sin cronometrarla.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def resumen(tiempos):
+    """
+    Resume una lista de tiempos (ms) en mínimo, mediana, p95 y máximo.
+    """
+    ordenados = sorted(tiempos)
+    p95 = ordenados[min(len(ordenados) - 1, int(round(0.95 * (len(ordenados) - 1))))]
+    return {
+        'min_ms': round(ordenados[0], 3),
+        'mediana_ms': round(statistics.median(ordenados), 3),
+        'p95_ms': round(p95, 3),
+        'max_ms': round(ordenados[-1], 3),
+    }
+
+
+# Los módulos de escenarios se registran al importarse
+from . import busqueda, carga, ciclo_vida, clasificacion, conexiones, coordenadas, dashboard, espacial, exportacion, flota, paginas, rutas, teselas, tipos  # noqa: E402,F401
@@ -0,0 +1,61 @@
+# En reactores/benchmarks/busqueda.py
+import random
+
+from reactores.busqueda import IndiceBusqueda
+
+from . import escenario, medir, resumen
+
+FILAS_SINTETICAS = 100_000
+SILABAS = ['al', 'ma', 'raz', 'fla', 'man', 'vil', 'le', 'tri', 'llo', 'ko', 'ri', 'bru', 'ce', 'gra', 've',
+           'nes', 'ka', 'shi', 'wa', 'zaki', 'tsu', 'chi', 'ang', 'ling', 'dai', 'ya', 'bay', 'pa', 'lo', 'de']
+OPERADORES = ['Electricité de France', 'Tokyo Electric Power', 'Rosenergoatom', 'Korea Hydro & Nuclear Power',
+              'Exelon Generation', 'Iberdrola', 'Energoatom', 'China General Nuclear', 'Ontario Power Generation']
+MODELOS = ['PWR-900', 'VVER-1000', 'BWR-6', 'ABWR', 'CANDU 6', 'EPR', 'AP1000', 'APR-1400', 'RBMK-1000', 'AGR']
+
+
+def filas_sinteticas(n, semilla=0):
+    """
+    Tuplas con el formato de IndiceBusqueda: centrales con nombres inventados a partir
+    de sílabas (varias unidades por central), operadores y modelos repetidos.
+    """
+    azar = random.Random(semilla)
+    filas, centrales = [], {}
+    while len(filas) < n:
+        central = ''.join(azar.choice(SILABAS) for _ in range(azar.randint(2, 4))).upper()
+        unidad = centrales[central] = centrales.get(central, 0) + 1
+        nombre = f'{central}-{unidad}'
+        modelo = azar.choice(MODELOS)
+        operador = azar.choice(OPERADORES)
+        alternativo = f'{central.title()} {unidad}' if azar.random() < 0.3 else None
+        filas.append((len(filas), nombre, 'Sintetia', modelo, nombre, alternativo, operador, operador, modelo))
+    return filas
+
+
+@escenario('busqueda')
+def bench_busqueda(repeticiones):
+    """
+    Índice de búsqueda en memoria sobre 100k reactores sintéticos: construcción y
+    consultas de autocompletado (prefijos de 2 a 8 letras) y con errores de tecleo.
+    """
+    filas = filas_sinteticas(FILAS_SINTETICAS)
+    indice = IndiceBusqueda(filas)
+
+    azar = random.Random(1)
+    nombres = [fila[1] for fila in azar.sample(filas, repeticiones)]
+    prefijos = iter([nombre[:azar.randint(2, 8)] for nombre in nombres])
+
+    def con_errata(nombre):
+        # Cambia una letra del nombre por otra
+        i = azar.randrange(len(nombre.split('-')[0]))
+        return nombre[:i] + azar.choice('aeiouxyz') + nombre[i + 1:]
+
+    erratas = iter([con_errata(nombre) for nombre in nombres])
+    operadores = iter([azar.choice(OPERADORES)[:azar.randint(3, 12)] for _ in range(repeticiones)])
+
+    return {
+        'filas': len(indice),
+        'construccion': resumen(medir(lambda: IndiceBusqueda(filas))),
+        'prefijo': resumen(medir(lambda: indice.buscar(next(prefijos)), repeticiones)),
+        'con_errata': resumen(medir(lambda: indice.buscar(next(erratas)), repeticiones)),
+        'operador': resumen(medir(lambda: indice.buscar(next(operadores)), repeticiones)),
+    }
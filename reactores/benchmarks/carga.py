@@ -0,0 +1,100 @@
+# En reactores/benchmarks/carga.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from reactores.api_async import VISTAS
+
+from . import escenario
+from .rutas import urls_a_medir
+
+# Peticiones simultáneas: hilos del servidor WSGI o peticiones en vuelo con ASGI
+CONCURRENCIA = 16
+
+
+def _urls():
+    # Las rutas que tienen variante asíncrona, con los mismos parámetros que el escenario 'rutas'
+    return [url for nombre, url in urls_a_medir() if nombre in VISTAS]
+
+
+def _reparto(urls, peticiones):
+    # Cada trabajador recibe su parte de las peticiones, alternando entre las rutas
+    todas = [urls[i % len(urls)] for i in range(peticiones)]
+    return [todas[i::CONCURRENCIA] for i in range(CONCURRENCIA)]
+
+
+def _trabajador_wsgi(urls):
+    cliente = Client()
+    tiempos, errores = [], 0
+    try:
+        for url in urls:
+            inicio = time.perf_counter()
+            errores += cliente.get(url).status_code != 200
+            tiempos.append(time.perf_counter() - inicio)
+    finally:
+        # Cada hilo abre su conexión a la BD
+        connections.close_all()
+    return tiempos, errores
+
+
+async def _trabajador_asgi(urls):
+    cliente = AsyncClient()
+    tiempos, errores = [], 0
+    for url in urls:
+        inicio = time.perf_counter()
+        errores += (await cliente.get(url)).status_code != 200
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos, errores
+
+
+async def _asgi(reparto):
+    return await asyncio.gather(*(_trabajador_asgi(urls) for urls in reparto))
+
+
+def _resultado(trabajadores, segundos):
+    tiempos = sorted(t for tiempos, _ in trabajadores for t in tiempos)
+    return {
+        'peticiones_por_s': round(len(tiempos) / segundos, 1),
+        'p50_ms': round(tiempos[len(tiempos) // 2] * 1000, 3),
+        'p99_ms': round(tiempos[min(len(tiempos) - 1, int(0.99 * len(tiempos)))] * 1000, 3),
+        'errores': sum(errores for _, errores in trabajadores),
+    }
+
+
+@escenario('carga')
+def bench_carga(repeticiones):
+    """
+    Peticiones por segundo y latencia p99 de las APIs con variante asíncrona, con
+    CONCURRENCIA peticiones a la vez: con WSGI (vistas síncronas, un hilo por petición,
+    como gunicorn con hilos) y con ASGI (vistas de api_async en el bucle de eventos, como
+    uvicorn). Se usan los manejadores WSGI y ASGI de Django en el propio proceso, sin
+    servidor HTTP, y con la caché caliente; en total repeticiones × CONCURRENCIA peticiones.
+    """
+    if connection.in_atomic_block:
+        # Los hilos abren sus propias conexiones y no verían los datos de la transacción
+        return {'aviso': 'La prueba de carga no funciona con --escala: usa una BD con los datos ya cargados.'}
+    urls = _urls()
+    if not urls:
+        return {'aviso': 'No hay reactores en la base de datos.'}
+    peticiones = repeticiones * CONCURRENCIA
+
+    # Una vuelta sin cronometrar para calentar la caché y la matriz de la flota
+    reparto = _reparto(urls, peticiones)
+    _trabajador_wsgi(urls)
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(CONCURRENCIA) as hilos:
+        wsgi = list(hilos.map(_trabajador_wsgi, reparto))
+    resultado = {'wsgi': _resultado(wsgi, time.perf_counter() - inicio)}
+
+    with override_settings(ROOT_URLCONF='reactores.urls_async'):
+        reparto = _reparto(_urls(), peticiones)
+        inicio = time.perf_counter()
+        asgi = asyncio.run(_asgi(reparto))
+        resultado['asgi'] = _resultado(asgi, time.perf_counter() - inicio)
+
+    resultado['concurrencia'] = CONCURRENCIA
+    return resultado
@@ -0,0 +1,86 @@
+# En reactores/benchmarks/ciclo_vida.py
+import json
+import random
+import tracemalloc
+from datetime import timedelta
+
+from django.test import Client
+from django.urls import reverse
+
+from reactores.ciclo_vida import EPOCA
+from reactores.proyeccion import calcular_proyeccion
+
+from . import escenario, medir, resumen
+from .sintetico import PAISES, TIPOS
+
+
+def _consumir(cliente, url):
+    respuesta = cliente.get(url)
+    return b''.join(respuesta.streaming_content)
+
+
+@escenario('ciclo_vida')
+def bench_ciclo_vida(repeticiones):
+    """
+    Tiempo, tamaño y pico de memoria de la API columnar del ciclo de vida, comparando
+    su tamaño con el de la misma información en el formato antiguo (lista de objetos).
+    """
+    cliente = Client()
+    url = reverse('api_datos_ciclo_vida')
+
+    tiempos = medir(lambda: _consumir(cliente, url), repeticiones)
+
+    tracemalloc.start()
+    cuerpo = _consumir(cliente, url)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Reconstruimos la respuesta en el formato de filas para comparar tamaños
+    datos = json.loads(cuerpo)
+    filas = [
+        {
+            'nombre': nombre,
+            'pais': datos['paises'][bloque['pais'][i]],
+            'inicio': (EPOCA + timedelta(days=bloque['inicio'][i])).isoformat(),
+            'fin': (EPOCA + timedelta(days=bloque['fin'][i])).isoformat(),
+            'estado': datos['estados'][bloque['estado'][i]],
+        }
+        for bloque in datos['bloques']
+        for i, nombre in enumerate(bloque['nombre'])
+    ]
+
+    return {
+        'api': resumen(tiempos),
+        'reactores': len(filas),
+        'bytes_columnar': len(cuerpo),
+        'bytes_formato_filas': len(json.dumps(filas).encode()),
+        'pico_memoria_kb': round(pico / 1024, 1),
+    }
+
+
+@escenario('proyeccion')
+def bench_proyeccion(repeticiones):
+    """
+    Curva de potencia instalada de 100k reactores sintéticos (barrido de eventos con
+    NumPy) frente a sumar la potencia de cada reactor año a año en Python.
+    """
+    azar = random.Random(0)
+    filas = []
+    for _ in range(100_000):
+        conexion = azar.randint(1955, 2030)
+        cierre = conexion + azar.randint(10, 50) if azar.random() < 0.3 else None
+        filas.append((azar.choice(PAISES), azar.choice(TIPOS), azar.choice([500, 900, 1300]), conexion, cierre))
+
+    def bucle_python():
+        curva = {}
+        for _, _, potencia, conexion, cierre in filas:
+            for ano in range(conexion, min(cierre or conexion + 60, 2101)):
+                curva[ano] = curva.get(ano, 0) + potencia
+        return curva
+
+    return {
+        'reactores': len(filas),
+        'vectorizado_total': resumen(medir(lambda: calcular_proyeccion(filas, 60), repeticiones)),
+        'vectorizado_por_pais': resumen(medir(lambda: calcular_proyeccion(filas, 60, {'PHWR': 50}, 'pais'), repeticiones)),
+        'bucle_python': resumen(medir(bucle_python)),
+    }
@@ -0,0 +1,63 @@
+# En reactores/benchmarks/clasificacion.py
+import io
+
+from django.core.management import call_command
+
+from reactores.clasificacion import clasificar_tipo
+from reactores.models import Reactor
+
+from . import escenario, medir, resumen
+from .sintetico import MODELOS, datos_temporales, generar_reactores
+
+FILAS_SINTETICAS = 100_000
+
+
+def _clasificar_cadena_if(texto_fuente):
+    # Clasificador anterior (cadena if/elif con upper() repetido), como referencia
+    if "PWR" in texto_fuente.upper() or "PRESSURIZED" in texto_fuente.upper():
+        return "PWR"
+    elif "BWR" in texto_fuente.upper() or "BOILING" in texto_fuente.upper():
+        return "BWR"
+    elif "PHWR" in texto_fuente.upper() or "CANDU" in texto_fuente.upper():
+        return "PHWR"
+    elif "GCR" in texto_fuente.upper() or "GAS" in texto_fuente.upper() or "AGR" in texto_fuente.upper():
+        return "GCR"
+    elif "LWGR" in texto_fuente.upper() or "RBMK" in texto_fuente.upper():
+        return "LWGR"
+    elif "FBR" in texto_fuente.upper() or "FAST" in texto_fuente.upper():
+        return "FBR"
+    return None
+
+
+@escenario('clasificacion')
+def bench_clasificacion(repeticiones):
+    """
+    Clasificador anterior frente al nuevo sobre 100k modelos, y tiempo de
+    `limpiar_tipos` sobre una tabla sintética de 100k reactores (se deshace al final).
+    """
+    # Variamos el texto para que la caché LRU no oculte el coste de clasificar
+    textos = [f'{MODELOS[i % len(MODELOS)]} #{i}' for i in range(FILAS_SINTETICAS)]
+
+    def clasificar_nuevo():
+        clasificar_tipo.cache_clear()
+        for texto in textos:
+            clasificar_tipo(texto)
+
+    anterior = medir(lambda: [_clasificar_cadena_if(texto) for texto in textos], repeticiones)
+    nuevo = medir(clasificar_nuevo, repeticiones)
+
+    with datos_temporales():
+        generar_reactores(FILAS_SINTETICAS)
+        primera = medir(lambda: call_command('limpiar_tipos', stdout=io.StringIO()))
+        # Las siguientes pasadas ya no encuentran cambios: solo lectura y clasificación
+        sin_cambios = medir(lambda: call_command('limpiar_tipos', stdout=io.StringIO()), repeticiones)
+        clasificados = Reactor.objects.exclude(tipo_reactor_categoria=None).count()
+
+    return {
+        'filas': FILAS_SINTETICAS,
+        'clasificar_if_elif': resumen(anterior),
+        'clasificar_tabla': resumen(nuevo),
+        'limpiar_tipos_con_cambios': resumen(primera),
+        'limpiar_tipos_sin_cambios': resumen(sin_cambios),
+        'reactores_clasificados': clasificados,
+    }
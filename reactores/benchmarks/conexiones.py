@@ -0,0 +1,79 @@
+# En reactores/benchmarks/conexiones.py
+import statistics
+
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection, connections
+
+from . import escenario, medir, resumen
+
+
+def _consulta_minima(cursor):
+    cursor.execute('SELECT 1')
+    cursor.fetchone()
+
+
+def _conexion_nueva(conexion):
+    # Lo que pasaba en cada petición sin CONN_MAX_AGE ni pool: conexión (TCP y
+    # autenticación, en PostgreSQL), preparación de Django, una consulta y cierre
+    conexion.ensure_connection()
+    try:
+        with conexion.cursor() as cursor:
+            _consulta_minima(cursor)
+    finally:
+        conexion.close()
+
+
+def _sin_reutilizar():
+    # Una copia de la conexión por defecto sin pool ni conexiones persistentes
+    ajustes = connection.settings_dict
+    opciones = {clave: valor for clave, valor in ajustes['OPTIONS'].items() if clave != 'pool'}
+    return type(connections[DEFAULT_DB_ALIAS])({**ajustes, 'OPTIONS': opciones, 'CONN_MAX_AGE': 0}, alias='sin_reutilizar')
+
+
+def _peticion():
+    # Django llama a close_old_connections al empezar y al terminar cada petición: según
+    # DATABASES, la conexión se cierra, se deja abierta (CONN_MAX_AGE) o vuelve al pool
+    close_old_connections()
+    with connection.cursor() as cursor:
+        _consulta_minima(cursor)
+    close_old_connections()
+
+
+def _consulta_conexion_abierta():
+    with connection.cursor() as cursor:
+        _consulta_minima(cursor)
+
+
+def _configuracion():
+    ajustes = connection.settings_dict
+    if ajustes['OPTIONS'].get('pool'):
+        return f"pool {ajustes['OPTIONS']['pool']}"
+    if ajustes['CONN_MAX_AGE']:
+        return f"CONN_MAX_AGE={ajustes['CONN_MAX_AGE']}"
+    return 'sin reutilizar conexiones'
+
+
+@escenario('conexiones')
+def bench_conexiones(repeticiones):
+    """
+    Lo que cuesta la conexión a la BD en cada petición: abriendo una conexión nueva,
+    con la configuración actual de DATABASES (pool o CONN_MAX_AGE) y, como mínimo
+    posible, con una conexión ya abierta. 'ahorro_por_peticion_ms' es la diferencia de
+    medianas entre la primera y la configuración actual.
+    """
+    if connection.in_atomic_block:
+        # Cerrar la conexión desharía la transacción de --escala
+        return {'aviso': 'El escenario de conexiones no funciona con --escala.'}
+
+    conexion = _sin_reutilizar()
+    nueva = medir(lambda: _conexion_nueva(conexion), repeticiones)
+    _peticion()
+    actual = medir(_peticion, repeticiones)
+    abierta = medir(_consulta_conexion_abierta, repeticiones)
+
+    return {
+        'configuracion': _configuracion(),
+        'conexion_nueva': resumen(nueva),
+        'configuracion_actual': resumen(actual),
+        'conexion_abierta': resumen(abierta),
+        'ahorro_por_peticion_ms': round(statistics.median(nueva) - statistics.median(actual), 3),
+    }
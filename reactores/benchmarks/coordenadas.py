@@ -0,0 +1,60 @@
+# En reactores/benchmarks/coordenadas.py
+import time
+
+from reactores.descargas import descargar_coordenadas
+from reactores.extraccion import _extraer_con_beautifulsoup, extraer_coordenadas
+
+from . import escenario, medir, resumen
+from .servidor import servidor_local
+
+
+def pagina_detalle_ficticia(lat=40.1808, lon=-5.6983, bloques=1500):
+    """
+    Página del tamaño de una ficha real de la WNA (~200 KB): mucho marcado
+    y los campos ocultos de coordenadas cerca del final.
+    """
+    relleno = ''.join(
+        f'<div class="row"><span class="label">Campo {i}</span>'
+        f'<input type="text" id="campo-{i}" value="{i}"><a href="/r/{i}">detalle</a></div>\n'
+        for i in range(bloques)
+    )
+    return (
+        '<!doctype html><html><head><title>Reactor</title></head><body>'
+        f'{relleno}'
+        f'<input type="hidden" id="Latitude" value="{lat}" />'
+        f'<input type="hidden" id="Longitude" value="{lon}" />'
+        '</body></html>'
+    ).encode()
+
+
+def _paginas_por_segundo(url_base, nombres, hilos):
+    inicio = time.perf_counter()
+    ok = sum(
+        1 for r in descargar_coordenadas(nombres, url_base=url_base, hilos=hilos, peticiones_por_segundo=0)
+        if r.estado == 'ok'
+    )
+    return round(ok / (time.perf_counter() - inicio), 1)
+
+
+@escenario('coordenadas')
+def bench_coordenadas(repeticiones):
+    """
+    Tiempo de extracción por página (camino rápido frente a BeautifulSoup) y
+    rendimiento de extremo a extremo contra un servidor local con 20 ms de latencia.
+    """
+    pagina = pagina_detalle_ficticia()
+    rapido = medir(lambda: extraer_coordenadas(pagina), repeticiones)
+    soup = medir(lambda: _extraer_con_beautifulsoup(pagina), repeticiones)
+
+    nombres = [(i, f'REACTOR {i}') for i in range(max(repeticiones, 10) * 4)]
+    with servidor_local(lambda ruta: (200, pagina, 'text/html'), latencia=0.02) as url_base:
+        secuencial = _paginas_por_segundo(url_base, nombres, hilos=1)
+        paralelo = _paginas_por_segundo(url_base, nombres, hilos=8)
+
+    return {
+        'kb_por_pagina': round(len(pagina) / 1024, 1),
+        'extraccion_rapida': resumen(rapido),
+        'extraccion_beautifulsoup': resumen(soup),
+        'paginas_por_segundo_1_hilo': secuencial,
+        'paginas_por_segundo_8_hilos': paralelo,
+    }
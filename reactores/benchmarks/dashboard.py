@@ -0,0 +1,36 @@
+# En reactores/benchmarks/dashboard.py
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from reactores.cache import invalidar_datos
+
+from . import escenario, medir, resumen
+
+
+@escenario('dashboard')
+def bench_dashboard(repeticiones):
+    """
+    Tiempo de render del dashboard con la caché fría (recién invalidada) y caliente.
+    """
+    cliente = Client()
+    url = reverse('dashboard')
+
+    frio = medir(lambda: cliente.get(url), repeticiones, preparar=invalidar_datos)
+
+    cliente.get(url)
+    caliente = medir(lambda: cliente.get(url), repeticiones)
+
+    invalidar_datos()
+    with CaptureQueriesContext(connection) as consultas_frio:
+        cliente.get(url)
+    with CaptureQueriesContext(connection) as consultas_caliente:
+        cliente.get(url)
+
+    return {
+        'render_frio': resumen(frio),
+        'render_caliente': resumen(caliente),
+        'consultas_frio': len(consultas_frio),
+        'consultas_caliente': len(consultas_caliente),
+    }
@@ -0,0 +1,54 @@
+# En reactores/benchmarks/espacial.py
+import random
+
+from reactores.espacial import IndiceEspacial
+
+from . import escenario, medir, resumen
+
+PUNTOS_SINTETICOS = 100_000
+
+
+def reactores_sinteticos(n, semilla=0):
+    """
+    Tuplas con el formato del índice, repartidas por todo el mapa habitado (latitudes -60 a 75).
+    """
+    azar = random.Random(semilla)
+    return [
+        (i, f'SINT-{i}', 'Sintetia', 'Operational', 1000, azar.uniform(-60, 75), azar.uniform(-180, 180))
+        for i in range(n)
+    ]
+
+
+@escenario('espacial')
+def bench_espacial(repeticiones):
+    """
+    Construcción del índice con 100k puntos y consultas sobre él: una zona de 10°x10°
+    (como la vista de un mapa regional), los 10 más cercanos y los cercanos en 300 km.
+    """
+    reactores = reactores_sinteticos(PUNTOS_SINTETICOS)
+    construccion = medir(lambda: IndiceEspacial(reactores), max(1, repeticiones // 10))
+    indice = IndiceEspacial(reactores)
+
+    azar = random.Random(1)
+    puntos = [(azar.uniform(-55, 65), azar.uniform(-180, 180)) for _ in range(repeticiones)]
+    consultas = iter(puntos * 3)
+
+    def caja():
+        lat, lon = next(consultas)
+        return indice.en_caja(lat - 5, lon - 5, lat + 5, lon + 5, limite=1000)
+
+    def vecinos():
+        lat, lon = next(consultas)
+        return indice.cercanos(lat, lon, k=10)
+
+    def en_radio():
+        lat, lon = next(consultas)
+        return indice.cercanos(lat, lon, k=10, radio_km=300)
+
+    return {
+        'puntos': len(indice),
+        'construccion': resumen(construccion),
+        'caja_10x10': resumen(medir(caja, repeticiones)),
+        'k10_cercanos': resumen(medir(vecinos, repeticiones)),
+        'k10_en_300km': resumen(medir(en_radio, repeticiones)),
+    }
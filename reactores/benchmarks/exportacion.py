@@ -0,0 +1,53 @@
+# En reactores/benchmarks/exportacion.py
+import time
+import tracemalloc
+
+from reactores.exportacion import exportar, filas_exportacion, formatos_disponibles
+from reactores.models import HistorialRendimiento
+
+from . import escenario
+from .sintetico import datos_temporales, generar_flota
+
+REACTORES_SINTETICOS = 20_000
+ANOS = 50  # Años de historial por reactor: un millón de registros
+
+
+def _consumir(formato, filtros):
+    return sum(len(trozo) for trozo in exportar(filas_exportacion(**filtros), formato))
+
+
+@escenario('exportacion')
+def bench_exportacion(repeticiones):
+    """
+    Exportación en streaming de un millón de registros sintéticos en cada formato:
+    filas por segundo, tamaño y pico de memoria de Python (que no debe crecer con
+    las filas). También con los filtros de país y años, que se aplican en SQL.
+    """
+    resultado = {}
+    with datos_temporales():
+        generar_flota(REACTORES_SINTETICOS, anos=ANOS)
+        total = HistorialRendimiento.objects.count()
+        resultado['registros'] = total
+
+        for formato in formatos_disponibles():
+            inicio = time.perf_counter()
+            tamano = _consumir(formato, {})
+            duracion = time.perf_counter() - inicio
+
+            tracemalloc.start()
+            _consumir(formato, {})
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            resultado[formato] = {
+                'segundos': round(duracion, 2),
+                'filas_por_s': round(total / duracion),
+                'mb': round(tamano / 1e6, 1),
+                'pico_memoria_kb': round(pico / 1024, 1),
+            }
+
+        filtros = {'pais': 'France', 'desde': 2000, 'hasta': 2009}
+        inicio = time.perf_counter()
+        _consumir('csv', filtros)
+        resultado['csv_filtrado_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+    return resultado
@@ -0,0 +1,54 @@
+# En reactores/benchmarks/flota.py
+import random
+
+from reactores.flota import MatrizFlota, media_movil, variacion_anual
+
+from . import escenario, medir, resumen
+from .sintetico import PAISES, TIPOS
+
+REACTORES_SINTETICOS = 20_000
+ANOS = range(1980, 2024)
+
+
+def flota_sintetica(n, semilla=0):
+    """
+    Tuplas (reactores, historial) con el formato de MatrizFlota: cada reactor reporta
+    un tramo de años seguidos con producción, factor de carga y factor de operación.
+    """
+    azar = random.Random(semilla)
+    reactores, historial = [], []
+    for reactor_id in range(1, n + 1):
+        reactores.append((reactor_id, azar.choice(PAISES), azar.choice(TIPOS)))
+        potencia = azar.choice([500, 900, 1300])
+        inicio = azar.randint(ANOS.start, ANOS.stop - 5)
+        for ano in range(inicio, ANOS.stop):
+            factor = min(100.0, max(0.0, azar.gauss(80, 12)))
+            historial.append((reactor_id, ano, potencia * 8.76 * factor / 100, factor, min(100.0, factor + 5)))
+    return reactores, historial
+
+
+@escenario('flota')
+def bench_flota(repeticiones):
+    """
+    Matriz de la flota con 20k reactores sintéticos (unos 500k registros anuales):
+    construcción y consultas vectorizadas (percentil, agregados, medias móviles).
+    """
+    reactores, historial = flota_sintetica(REACTORES_SINTETICOS)
+    matriz = MatrizFlota(reactores, historial)
+    azar = random.Random(1)
+    ids = iter([azar.randint(1, REACTORES_SINTETICOS) for _ in range(repeticiones)])
+    anos = iter([azar.choice(ANOS) for _ in range(repeticiones)])
+
+    return {
+        'reactores': len(matriz),
+        'registros': len(historial),
+        'construccion': resumen(medir(lambda: MatrizFlota(reactores, historial))),
+        'percentil_vida': resumen(medir(lambda: matriz.percentil(next(ids), 'factor_carga', por='tipo'), repeticiones)),
+        'percentil_ano': resumen(medir(
+            lambda: matriz.percentil(azar.randint(1, REACTORES_SINTETICOS), 'produccion', por='pais', ano=next(anos)),
+            repeticiones,
+        )),
+        'agregado_pais': resumen(medir(lambda: matriz.agregado('produccion', 'pais', 'suma'), repeticiones)),
+        'media_movil_flota': resumen(medir(lambda: media_movil(matriz.valores['factor_carga'], 5), repeticiones)),
+        'variacion_anual_flota': resumen(medir(lambda: variacion_anual(matriz.valores['produccion']), repeticiones)),
+    }
@@ -0,0 +1,99 @@
+# En reactores/benchmarks/informe.py
+# Informe JSON de una ejecución de `benchmark` y comparación con el de otra ejecución
+# (por ejemplo, el del commit anterior) para detectar regresiones.
+import json
+import subprocess
+from pathlib import Path
+
+from django.core.management.base import CommandError
+from django.db import connection
+from django.utils import timezone
+
+# Diferencia absoluta por debajo de la cual un cambio se considera ruido, según el
+# sufijo de la métrica. Las consultas SQL no tienen margen: cualquier consulta de más cuenta.
+MARGENES = {'mediana_ms': 1.0, '_kb': 64.0}
+# Lo que tiene que coincidir entre dos informes para que sus métricas sean comparables
+CONDICIONES = ('base_de_datos', 'escala', 'anos', 'semilla', 'repeticiones')
+
+
+def _commit():
+    try:
+        salida = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, timeout=5, cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return salida.stdout.strip() or None
+
+
+def crear_informe(escenarios, **datos):
+    """
+    Informe con los resultados de los escenarios y con qué se obtuvieron (commit,
+    base de datos, fecha y los `datos` que se indiquen, como la escala o las repeticiones).
+    """
+    return {
+        'fecha': timezone.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'base_de_datos': connection.vendor,
+        **datos,
+        'escenarios': escenarios,
+    }
+
+
+def guardar_informe(informe, ruta):
+    Path(ruta).write_text(json.dumps(informe, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+def leer_informe(ruta):
+    return json.loads(Path(ruta).read_text(encoding='utf-8'))
+
+
+def aplanar(datos, prefijo=''):
+    """
+    {'a': {'b': 1}} -> {'a.b': 1}
+    """
+    plano = {}
+    for clave, valor in datos.items():
+        if isinstance(valor, dict):
+            plano.update(aplanar(valor, f'{prefijo}{clave}.'))
+        else:
+            plano[f'{prefijo}{clave}'] = valor
+    return plano
+
+
+def _tolerancia(metrica, umbral):
+    # (aumento proporcional, aumento absoluto) que se toleran, o None si no se compara
+    if metrica.startswith('consultas'):
+        return 0.0, 0.0
+    for sufijo, margen in MARGENES.items():
+        if metrica.endswith(sufijo):
+            return umbral, margen
+    return None
+
+
+def comparar(base, actual, umbral=0.2):
+    """
+    Compara los escenarios de dos informes y devuelve las regresiones como una lista de
+    (métrica, valor en base, valor actual). Cuentan las medianas de tiempo y los picos de
+    memoria que crecen más de `umbral` (proporción) y del margen de ruido, y cualquier
+    aumento del número de consultas. Las métricas que no están en los dos informes se ignoran.
+    Lanza CommandError si los informes no se obtuvieron en las mismas CONDICIONES.
+    """
+    distintas = [
+        f"{condicion} ({base.get(condicion)} → {actual.get(condicion)})"
+        for condicion in CONDICIONES if base.get(condicion) != actual.get(condicion)
+    ]
+    if distintas:
+        raise CommandError(f"Los informes no son comparables: cambia {', '.join(distintas)}")
+    anteriores = aplanar(base['escenarios'])
+    regresiones = []
+    for clave, valor in aplanar(actual['escenarios']).items():
+        antes = anteriores.get(clave)
+        tolerancia = _tolerancia(clave.rsplit('.', 1)[-1], umbral)
+        if tolerancia is None or not isinstance(valor, (int, float)) or not isinstance(antes, (int, float)):
+            continue
+        proporcion, absoluto = tolerancia
+        if valor > antes * (1 + proporcion) and valor - antes > absoluto:
+            regresiones.append((clave, antes, valor))
+    return regresiones
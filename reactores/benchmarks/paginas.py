@@ -0,0 +1,46 @@
+# En reactores/benchmarks/paginas.py
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from reactores.cache import invalidar_datos
+
+from . import escenario, medir, resumen
+
+PAGINAS = ['dashboard', 'atlas', 'comparador', 'ciclo_vida', 'enciclopedia_tipos']
+
+
+def _medir_pagina(cliente, url, repeticiones):
+    frio = medir(lambda: cliente.get(url), repeticiones, preparar=invalidar_datos)
+    cliente.get(url)
+    caliente = medir(lambda: cliente.get(url), repeticiones)
+    with CaptureQueriesContext(connection) as consultas:
+        cliente.get(url)
+    return {
+        'frio': resumen(frio)['mediana_ms'],
+        'caliente': resumen(caliente)['mediana_ms'],
+        'consultas_caliente': len(consultas),
+    }
+
+
+@escenario('paginas')
+def bench_paginas(repeticiones):
+    """
+    Mediana del render (ms) de cada página HTML con la caché fría (recién invalidada) y
+    caliente: con las listas de los desplegables y los fragmentos {% cache %} y, además,
+    con la página entera en caché (CACHE_PAGINAS, usuarios anónimos).
+    """
+    cliente = Client()
+    resultado = {}
+    for pagina in PAGINAS:
+        url = reverse(pagina)
+        with override_settings(CACHE_PAGINAS=False):
+            fragmentos = _medir_pagina(cliente, url, repeticiones)
+        with override_settings(CACHE_PAGINAS=True):
+            completa = _medir_pagina(cliente, url, repeticiones)
+        resultado[pagina] = {
+            **{f'fragmentos_{k}': v for k, v in fragmentos.items()},
+            **{f'pagina_{k}': v for k, v in completa.items()},
+        }
+    return resultado
@@ -0,0 +1,141 @@
+# En reactores/benchmarks/rutas.py
+import math
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from reactores import urls
+from reactores.cache import invalidar_datos
+from reactores.geometria import manifiesto
+from reactores.models import Reactor
+
+from . import escenario, medir, resumen
+
+ZOOM_TESELA = 4
+REACTORES_POR_LOTE = 20
+
+
+def _tesela(lat, lon, zoom):
+    # Tesela XYZ (Web Mercator) que contiene el punto
+    n = 2 ** zoom
+    seno = math.sin(math.radians(lat))
+    x = int((lon + 180) / 360 * n)
+    y = int((0.5 - math.log((1 + seno) / (1 - seno)) / (4 * math.pi)) * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def ejemplos():
+    """
+    Valores de la BD con los que se llama a cada ruta: (argumentos de la URL por nombre
+    de parámetro, {nombre de la ruta: parámetros de la consulta}). Se toma un reactor
+    con historial y coordenadas para que ninguna ruta devuelva una respuesta vacía.
+    """
+    reactores = Reactor.objects.filter(resumen__isnull=False, latitud__isnull=False).order_by('pk')
+    reactor = reactores.first() or Reactor.objects.order_by('pk').first()
+    if reactor is None:
+        return None
+    lat, lon = reactor.latitud or 0.0, reactor.longitud or 0.0
+    x, y = _tesela(lat, lon, ZOOM_TESELA)
+    geometria = manifiesto()
+
+    argumentos = {
+        'pk': reactor.pk,
+        'tipo': reactor.tipo_reactor_categoria or 'PWR',
+        'z': ZOOM_TESELA, 'x': x, 'y': y,
+        'archivo': geometria['niveles'][0]['archivo'] if geometria else 'sin-geometria.json',
+    }
+    pais, tipo = reactor.pais or '', argumentos['tipo']
+    ids = reactores.values_list('pk', flat=True)[:REACTORES_POR_LOTE]
+    ultimo_ano = reactor.historial.order_by('-ano').values_list('ano', flat=True).first() or 2024
+    parametros = {
+        'api_reactores_por_pais': {'pais': pais},
+        'api_paises_por_tipo': {'tipo': tipo},
+        'api_reactores_por_tipo_y_pais': {'tipo': tipo, 'pais': pais},
+        'api_reactores': {'ids': ','.join(map(str, ids)), 'include': 'historial,resumen'},
+        'api_buscar_reactores': {'q': (reactor.nombre or '')[:4]},
+        'api_reactores_en_caja': {'bbox': f'{lon - 10},{lat - 10},{lon + 10},{lat + 10}'},
+        'api_reactores_cercanos': {'lat': lat, 'lon': lon, 'k': 10},
+        'api_agregado_flota': {'metrica': 'produccion', 'por': 'pais', 'ventana': 3},
+        'api_proyeccion_capacidad': {'vida': 60, 'por': 'pais'},
+        'api_exportar_historial': {'formato': 'csv', 'pais': pais, 'desde': ultimo_ano - 9},
+    }
+    return argumentos, parametros
+
+
+def urls_a_medir():
+    """
+    [(nombre, url)] de todas las rutas con nombre de reactores/urls.py, con argumentos
+    y parámetros de ejemplo.
+    """
+    datos = ejemplos()
+    if datos is None:
+        return []
+    argumentos, parametros = datos
+    resultado = []
+    for patron in urls.urlpatterns:
+        if not patron.name:
+            continue
+        kwargs = {parametro: argumentos[parametro] for parametro in patron.pattern.converters}
+        url = reverse(patron.name, kwargs=kwargs)
+        if patron.name in parametros:
+            url += '?' + urlencode(parametros[patron.name])
+        resultado.append((patron.name, url))
+    return resultado
+
+
+def _pedir(cliente, url):
+    respuesta = cliente.get(url)
+    if respuesta.streaming:
+        b''.join(respuesta.streaming_content)
+    return respuesta
+
+
+def medir_url(cliente, url, repeticiones):
+    """
+    Latencia con la caché fría (recién invalidada) y caliente, consultas SQL en cada
+    caso y pico de memoria de Python de una petición con la caché caliente.
+    """
+    invalidar_datos()
+    with CaptureQueriesContext(connection) as consultas:
+        inicio = time.perf_counter()
+        respuesta = _pedir(cliente, url)
+        frio_ms = (time.perf_counter() - inicio) * 1000
+    # Hay que contarlas ya: la siguiente petición vacía el registro de consultas
+    consultas_frio = len(consultas)
+
+    caliente = medir(lambda: _pedir(cliente, url), repeticiones)
+    with CaptureQueriesContext(connection) as consultas:
+        _pedir(cliente, url)
+    consultas_caliente = len(consultas)
+
+    tracemalloc.start()
+    _pedir(cliente, url)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'estado': respuesta.status_code,
+        'frio_ms': round(frio_ms, 3),
+        'caliente': resumen(caliente),
+        'consultas_frio': consultas_frio,
+        'consultas_caliente': consultas_caliente,
+        'pico_memoria_kb': round(pico / 1024, 1),
+    }
+
+
+@escenario('rutas')
+def bench_rutas(repeticiones):
+    """
+    Recorre todas las rutas de reactores/urls.py con datos reales de la BD y mide
+    latencia, consultas SQL y memoria de cada una.
+    """
+    cliente = Client()
+    rutas = urls_a_medir()
+    if not rutas:
+        return {'aviso': 'No hay reactores en la base de datos.'}
+    return {nombre: medir_url(cliente, url, repeticiones) for nombre, url in rutas}
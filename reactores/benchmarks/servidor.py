@@ -0,0 +1,38 @@
+# En reactores/benchmarks/servidor.py
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@contextmanager
+def servidor_local(responder, latencia=0.0):
+    """
+    Levanta un servidor HTTP local en un puerto libre y devuelve su URL base.
+    `responder(ruta)` devuelve (código, cuerpo en bytes, content-type) para cada GET;
+    `latencia` (segundos) simula el retardo de la red antes de responder.
+    """
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if latencia:
+                time.sleep(latencia)
+            codigo, cuerpo, tipo = responder(self.path)
+            self.send_response(codigo)
+            self.send_header('Content-Type', tipo)
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        yield f'http://127.0.0.1:{servidor.server_port}/'
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
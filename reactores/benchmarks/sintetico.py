@@ -0,0 +1,135 @@
+# En reactores/benchmarks/sintetico.py
+import os
+import random
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.test.utils import override_settings
+
+from reactores.models import HistorialRendimiento, Reactor
+from reactores.resumen import actualizar_resumenes
+
+PAISES = ['France', 'United States Of America', 'China', 'Russia', 'Japan', 'South Korea', 'India', 'Canada']
+MODELOS = [
+    'PWR-900', 'VVER-1000 (Pressurized water)', 'BWR-6', 'ABWR', 'CANDU 6', 'PHWR-220',
+    'AGR', 'Magnox (gas cooled)', 'RBMK-1000', 'BN-600 (fast breeder)', 'HTR-PM', '',
+]
+TIPOS = ['PWR', 'BWR', 'PHWR', 'GCR', 'LWGR', 'FBR']
+
+# Tamaños de flota predefinidos para `benchmark --escala`
+ESCALAS = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+ANOS_HISTORIAL = 60
+ULTIMO_ANO = 2024
+
+
+@contextmanager
+def datos_temporales():
+    """
+    Abre una transacción que se deshace siempre al salir, para que los datos
+    sintéticos de un benchmark no queden en la base de datos.
+    """
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+@contextmanager
+def caches_aisladas():
+    """
+    Sustituye cada caché configurada por una del mismo tipo, vacía y solo para el
+    benchmark: ni lo cacheado con la flota sintética ni las invalidaciones de los
+    escenarios llegan a los demás procesos. Al salir (también si algo falla) se
+    borran sus ficheros.
+    """
+    prefijo = f'benchmark-{uuid.uuid4().hex[:8]}'
+    with tempfile.TemporaryDirectory(prefix='atlas_benchmark_') as directorio:
+        aisladas = {}
+        for alias, ajustes in settings.CACHES.items():
+            # Con un prefijo propio, las cachés compartidas (Redis, Memcached) no ven sus claves
+            ajustes = {**ajustes, 'KEY_PREFIX': prefijo}
+            if ajustes['BACKEND'].endswith('FileBasedCache'):
+                ajustes['LOCATION'] = os.path.join(directorio, alias)
+            elif ajustes['BACKEND'].endswith('LocMemCache'):
+                ajustes['LOCATION'] = f'{prefijo}-{alias}'
+            aisladas[alias] = ajustes
+        with override_settings(CACHES=aisladas):
+            yield
+
+
+def generar_reactores(n, semilla=0, lote=5000):
+    """
+    Crea `n` reactores sintéticos (nombres 'SINT-…') sin categoría asignada.
+    Usa bulk_create, así que no pasa por las señales de guardado.
+    """
+    azar = random.Random(semilla)
+    inicio = date(1960, 1, 1)
+    Reactor.objects.bulk_create(
+        (
+            Reactor(
+                nombre=f'SINT-{i}',
+                pais=azar.choice(PAISES),
+                status=azar.choice(['Operational', 'Permanent Shutdown']),
+                modelo=azar.choice(MODELOS),
+                potencia_neta=azar.choice([None, 500, 900, 1300]),
+                fecha_inicio_construccion=inicio + timedelta(days=azar.randint(0, 20000)),
+            )
+            for i in range(n)
+        ),
+        batch_size=lote,
+    )
+
+
+def generar_flota(n, anos=ANOS_HISTORIAL, semilla=0, lote=1000):
+    """
+    Crea `n` reactores sintéticos completos (país, tipo, potencia, coordenadas y fechas,
+    nombres 'FLOTA-…') con `anos` registros de historial cada uno, que terminan en
+    ULTIMO_ANO, y sus resúmenes de rendimiento. Con la misma semilla genera siempre
+    los mismos datos. Se escribe por lotes de `lote` reactores para no tener toda la
+    flota en memoria. Devuelve cuántos registros de historial creó.
+    """
+    azar = random.Random(semilla)
+    primer_ano = ULTIMO_ANO - anos + 1
+    registros = 0
+    for desde in range(0, n, lote):
+        reactores = []
+        for i in range(desde, min(desde + lote, n)):
+            conexion = date(primer_ano, 1, 1) - timedelta(days=azar.randint(0, 5 * 365))
+            cerrado = azar.random() < 0.2
+            reactores.append(Reactor(
+                nombre=f'FLOTA-{i}',
+                pais=azar.choice(PAISES),
+                status='Permanent Shutdown' if cerrado else 'Operational',
+                operador=f'Operador {azar.randint(1, 200)}',
+                modelo=azar.choice(MODELOS),
+                tipo_reactor_categoria=azar.choice(TIPOS),
+                potencia_neta=azar.choice([500, 900, 1300]),
+                latitud=round(azar.uniform(-60, 70), 5),
+                longitud=round(azar.uniform(-180, 180), 5),
+                fecha_inicio_construccion=conexion - timedelta(days=azar.randint(4 * 365, 10 * 365)),
+                fecha_primera_conexion=conexion,
+                fecha_cierre_permanente=date(ULTIMO_ANO, 12, 31) if cerrado else None,
+            ))
+        # PostgreSQL y SQLite devuelven los id de un bulk_create
+        Reactor.objects.bulk_create(reactores)
+
+        historial = []
+        for reactor in reactores:
+            for ano in range(primer_ano, ULTIMO_ANO + 1):
+                factor = min(100.0, max(0.0, azar.gauss(80, 12)))
+                historial.append(HistorialRendimiento(
+                    reactor_id=reactor.pk,
+                    ano=ano,
+                    electricidad_suministrada=reactor.potencia_neta * 8.76 * factor / 100,
+                    potencia_referencia=reactor.potencia_neta,
+                    tiempo_en_linea_anual=round(8760 * min(1.0, factor / 95), 1),
+                    factor_operacion=min(100.0, factor + 5),
+                    factor_carga_anual=factor,
+                ))
+        HistorialRendimiento.objects.bulk_create(historial, batch_size=5000)
+        actualizar_resumenes([reactor.pk for reactor in reactores])
+        registros += len(historial)
+    return registros
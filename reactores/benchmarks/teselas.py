@@ -0,0 +1,31 @@
+# En reactores/benchmarks/teselas.py
+import json
+
+from reactores.espacial import IndiceEspacial
+from reactores.teselas import calcular_tesela
+
+from . import escenario, medir, resumen
+from .espacial import PUNTOS_SINTETICOS, reactores_sinteticos
+
+
+@escenario('teselas')
+def bench_teselas(repeticiones):
+    """
+    Cálculo de teselas de clusters sobre 100k puntos sintéticos: el mundo entero a zoom 2
+    y una vista regional a zoom 6. El tamaño por tesela debe mantenerse acotado.
+    """
+    indice = IndiceEspacial(reactores_sinteticos(PUNTOS_SINTETICOS))
+    vistas = {
+        'zoom2_mundo': [(2, x, y) for x in range(4) for y in range(4)],
+        'zoom6_europa': [(6, x, y) for x in range(30, 36) for y in range(20, 24)],
+    }
+
+    resultado = {'puntos': len(indice)}
+    for nombre, teselas in vistas.items():
+        calculadas = [calcular_tesela(*t, indice=indice) for t in teselas]
+        tamanos = [len(json.dumps(t)) for t in calculadas]
+        resultado[nombre] = resumen(medir(lambda: [calcular_tesela(*t, indice=indice) for t in teselas], repeticiones))
+        resultado[f'{nombre}_teselas'] = len(teselas)
+        resultado[f'{nombre}_max_puntos_por_tesela'] = max(len(t['puntos']) for t in calculadas)
+        resultado[f'{nombre}_kb_por_vista'] = round(sum(tamanos) / 1024, 1)
+    return resultado
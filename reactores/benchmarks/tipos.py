@@ -0,0 +1,40 @@
+# En reactores/benchmarks/tipos.py
+from itertools import cycle
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from reactores.cache import invalidar_datos
+from reactores.models import Reactor
+
+from . import escenario, medir, resumen
+
+
+@escenario('tipos')
+def bench_tipos(repeticiones):
+    """
+    Latencia de la API de la enciclopedia recorriendo todos los tipos, con caché fría y caliente.
+    """
+    cliente = Client()
+    tipos = list(
+        Reactor.objects.exclude(tipo_reactor_categoria__isnull=True)
+        .values_list('tipo_reactor_categoria', flat=True).distinct()
+    )
+    if not tipos:
+        return {'aviso': 'No hay reactores con tipo asignado.'}
+    urls = cycle([reverse('api_datos_tipo', args=[tipo]) for tipo in tipos])
+
+    frio = medir(lambda: cliente.get(next(urls)), repeticiones, preparar=invalidar_datos)
+    caliente = medir(lambda: cliente.get(next(urls)), repeticiones * len(tipos))
+
+    invalidar_datos()
+    with CaptureQueriesContext(connection) as consultas_frio:
+        cliente.get(next(urls))
+
+    return {
+        'api_frio': resumen(frio),
+        'api_caliente': resumen(caliente),
+        'consultas_frio': len(consultas_frio),
+    }
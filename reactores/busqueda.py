@@ -0,0 +1,240 @@
+# En reactores/busqueda.py
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from django.db import connection
+
+from .cache import version_datos
+from .models import Reactor
+
+# Campos en los que se busca y su peso en la puntuación, de mayor a menor
+CAMPOS_BUSQUEDA = {
+    'nombre': 1.0,
+    'nombre_alternativo': 0.9,
+    'operador': 0.6,
+    'dueño': 0.6,
+    'modelo': 0.5,
+}
+_PESOS = list(CAMPOS_BUSQUEDA.values())
+LONGITUD_MINIMA = 2
+MAX_RESULTADOS = 50
+# Por debajo de esta similitud de trigramas (y sin coincidencia literal) un texto no cuenta
+SIMILITUD_MINIMA = 0.3
+# Un error tecleando cambia como mucho 3 trigramas: cualquier texto parecido a la
+# consulta comparte al menos uno de sus 4 trigramas menos frecuentes
+TRIGRAMAS_CANDIDATOS = 4
+MAX_CANDIDATOS = 2000
+# Textos que se examinan como mucho por campo en la búsqueda por prefijo
+MAX_PREFIJOS = 500
+
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar(texto):
+    """
+    Minúsculas, sin tildes y con cualquier signo convertido en un espacio.
+    """
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode().lower()
+    return _NO_ALFANUMERICO.sub(' ', texto).strip()
+
+
+def trigramas(texto_normalizado):
+    """
+    Trigramas de cada palabra, con el mismo relleno que pg_trgm ('  a', ' ab', ..., 'yz ').
+    """
+    resultado = set()
+    for palabra in texto_normalizado.split():
+        relleno = f'  {palabra} '
+        resultado.update(relleno[i:i + 3] for i in range(len(relleno) - 2))
+    return resultado
+
+
+class IndiceBusqueda:
+    """
+    Índice de búsqueda en memoria. Se indexan los textos distintos de cada campo
+    (hay muchos reactores con el mismo operador o modelo), no cada reactor, y cada
+    texto apunta a sus reactores ya ordenados por nombre.
+    `reactores` son tuplas (id, nombre, pais, modelo, *valores de CAMPOS_BUSQUEDA).
+
+    Hay dos estructuras: por cada campo, una lista ordenada de los finales de texto
+    que empiezan en cada palabra (para encontrar prefijos con una búsqueda binaria), y
+    un índice invertido de trigramas para las búsquedas aproximadas.
+    """
+
+    def __init__(self, reactores):
+        self.reactores = sorted(reactores, key=lambda r: r[1] or '')
+        textos = {}
+        for posicion, reactor in enumerate(self.reactores):
+            for campo, valor in enumerate(reactor[4:]):
+                texto = normalizar(valor)
+                if texto:
+                    textos.setdefault((texto, campo), []).append(posicion)
+
+        # Para cada texto: (texto normalizado, campo, trigramas, posiciones de sus reactores)
+        self.textos = [
+            (texto, campo, trigramas(texto), posiciones)
+            for (texto, campo), posiciones in textos.items()
+        ]
+        self.prefijos = [[] for _ in CAMPOS_BUSQUEDA]
+        self.por_trigrama = {}
+        for i, (texto, campo, tris, _) in enumerate(self.textos):
+            for palabra in re.finditer(r'\S+', texto):
+                self.prefijos[campo].append((texto[palabra.start():], i))
+            for trigrama in tris:
+                self.por_trigrama.setdefault(trigrama, []).append(i)
+        for lista in self.prefijos:
+            lista.sort()
+
+    def __len__(self):
+        return len(self.reactores)
+
+    def _puntuar(self, i, consulta, tris_consulta):
+        texto, campo, tris, _ = self.textos[i]
+        comunes = len(tris_consulta & tris)
+        similitud = comunes / (len(tris_consulta) + len(tris) - comunes)
+        if texto.startswith(consulta):
+            base = 2.0
+        elif f' {consulta}' in f' {texto}':
+            base = 1.5
+        elif consulta in texto:
+            base = 1.0
+        elif similitud >= SIMILITUD_MINIMA:
+            base = 0.0
+        else:
+            return None
+        return (base + similitud) * _PESOS[campo]
+
+    def _candidatos_aproximados(self, tris_consulta):
+        listas = sorted(
+            (self.por_trigrama[t] for t in tris_consulta if t in self.por_trigrama), key=len
+        )[:TRIGRAMAS_CANDIDATOS]
+        candidatos = set()
+        for lista in listas:
+            candidatos.update(lista[:MAX_CANDIDATOS - len(candidatos)])
+            if len(candidatos) >= MAX_CANDIDATOS:
+                break
+        return candidatos
+
+    def buscar(self, consulta, limite=10):
+        """
+        Devuelve [(puntuación, reactor)] ordenado de mayor a menor puntuación.
+        Puntúan más los textos que empiezan por la consulta, luego los que tienen una
+        palabra que empieza por ella, los que la contienen y, por último, los parecidos
+        (similitud de trigramas, que tolera errores de tecleo).
+        """
+        consulta = normalizar(consulta)
+        if len(consulta) < LONGITUD_MINIMA:
+            return []
+        tris_consulta = trigramas(consulta)
+        puntuados = {}
+        encontrados = 0
+
+        # 1) Prefijos de palabra, campo a campo por orden de peso, hasta tener suficientes reactores
+        for lista in self.prefijos:
+            inicio = bisect_left(lista, (consulta,))
+            for sufijo, i in lista[inicio:inicio + MAX_PREFIJOS]:
+                if not sufijo.startswith(consulta):
+                    break
+                if i not in puntuados:
+                    puntuados[i] = self._puntuar(i, consulta, tris_consulta)
+                    encontrados += len(self.textos[i][3])
+            if encontrados >= limite:
+                break
+
+        # 2) Si no basta, textos parecidos según los trigramas que comparten con la consulta
+        if encontrados < limite and len(consulta) >= 3:
+            for i in self._candidatos_aproximados(tris_consulta):
+                if i not in puntuados:
+                    puntuados[i] = self._puntuar(i, consulta, tris_consulta)
+
+        ordenados = sorted(
+            ((puntuacion, i) for i, puntuacion in puntuados.items() if puntuacion is not None),
+            key=lambda par: (-par[0], par[1]),
+        )
+        # Un reactor aparece una sola vez, con la puntuación de su mejor texto
+        resultado, vistos = [], set()
+        for puntuacion, i in ordenados:
+            for posicion in self.textos[i][3]:
+                if posicion not in vistos:
+                    vistos.add(posicion)
+                    resultado.append((round(puntuacion, 4), self.reactores[posicion]))
+                    if len(resultado) >= limite:
+                        return resultado
+        return resultado
+
+
+_indice = (None, None)
+_lock = threading.Lock()
+
+
+def construir_indice():
+    """
+    Construye el índice de búsqueda con todos los reactores.
+    """
+    filas = Reactor.objects.values_list('id', 'nombre', 'pais', 'modelo', *CAMPOS_BUSQUEDA)
+    return IndiceBusqueda(filas.iterator(chunk_size=2000))
+
+
+def indice_busqueda():
+    """
+    Índice de búsqueda del proceso. Se reconstruye cuando cambia la versión de los datos.
+    """
+    global _indice
+    version = version_datos()
+    if _indice[0] != version:
+        with _lock:
+            if _indice[0] != version:
+                _indice = (version, construir_indice())
+    return _indice[1]
+
+
+def _buscar_postgres(consulta, limite):
+    # pg_trgm sobre reactor_normalizar(campo), la misma expresión que los índices GIN
+    # (gin_trgm_ops) de la migración 0011, que los usan tanto <% como LIKE. Se puntúa
+    # como en IndiceBusqueda._puntuar: primero los textos que empiezan por la consulta,
+    # luego los que tienen una palabra que empieza por ella y los que la contienen.
+    consulta = normalizar(consulta)
+    textos = {
+        campo: f'reactor_normalizar({connection.ops.quote_name(campo)})' for campo in CAMPOS_BUSQUEDA
+    }
+    puntuacion = 'GREATEST({})'.format(', '.join(
+        f"((CASE WHEN {texto} LIKE c.empieza THEN 2.0 WHEN (' ' || {texto}) LIKE c.palabra THEN 1.5 "
+        f"WHEN {texto} LIKE c.contiene THEN 1.0 ELSE 0.0 END) + word_similarity(c.consulta, {texto})) "
+        f"* {CAMPOS_BUSQUEDA[campo]}"
+        for campo, texto in textos.items()
+    ))
+    condicion = ' OR '.join(
+        f'c.consulta <%% {texto} OR {texto} LIKE c.contiene' for texto in textos.values()
+    )
+    sql = (
+        f'WITH c (consulta, empieza, palabra, contiene) AS (SELECT %s::text, %s::text, %s::text, %s::text) '
+        f'SELECT id, nombre, pais, modelo, {puntuacion} AS puntuacion '
+        f'FROM {Reactor._meta.db_table}, c WHERE {condicion} '
+        f'ORDER BY puntuacion DESC, nombre LIMIT %s'
+    )
+    # La consulta normalizada solo tiene letras, cifras y espacios: nada que escapar en LIKE
+    patrones = [consulta, f'{consulta}%', f'% {consulta}%', f'%{consulta}%']
+    with connection.cursor() as cursor:
+        cursor.execute(sql, patrones + [limite])
+        return [(round(fila[4], 4), fila[:4]) for fila in cursor.fetchall()]
+
+
+def buscar_reactores(consulta, limite=10):
+    """
+    Busca reactores por nombre, nombre alternativo, operador, dueño o modelo.
+    En PostgreSQL usa pg_trgm; en el resto de bases de datos, el índice en memoria.
+    Devuelve una lista de diccionarios ordenada por relevancia.
+    """
+    consulta = (consulta or '').strip()
+    if len(normalizar(consulta)) < LONGITUD_MINIMA:
+        return []
+    if connection.vendor == 'postgresql':
+        encontrados = _buscar_postgres(consulta, limite)
+    else:
+        encontrados = indice_busqueda().buscar(consulta, limite)
+    return [
+        {'id': r[0], 'nombre': r[1], 'pais': r[2], 'modelo': r[3], 'puntuacion': puntuacion}
+        for puntuacion, r in encontrados
+    ]
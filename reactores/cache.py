@@ -0,0 +1,153 @@
+# En reactores/cache.py
+import functools
+import hashlib
+import uuid
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils import timezone
+
+# Todo lo que cacheamos depende de una "versión de datos". En lugar de borrar
+# claves una por una, al cambiar los datos generamos una versión nueva y las
+# claves antiguas simplemente dejan de usarse (y caducan solas).
+# Junto a la versión guardamos el instante del cambio (para Last-Modified).
+# Se guarda en su propia caché (ALIAS_ESTADO): la de por defecto, al llenarse, borra
+# entradas al azar, y si se llevara la versión invalidaría todo lo cacheado.
+# La clave lleva la versión del código: tras un despliegue se parte de un estado nuevo
+# (ETag, Last-Modified y claves nuevas) aunque los datos no hayan cambiado.
+CLAVE_VERSION = 'reactores:estado_datos:{}'
+ALIAS_ESTADO = 'estado'
+
+
+@functools.cache
+def _hash_codigo():
+    # Los .py y las plantillas de la app deciden el formato de lo que se cachea
+    raiz = Path(__file__).resolve().parent
+    resumen = hashlib.sha256()
+    for ruta in sorted([*raiz.rglob('*.py'), *raiz.rglob('*.html')]):
+        resumen.update(str(ruta.relative_to(raiz)).encode())
+        resumen.update(ruta.read_bytes())
+    return resumen.hexdigest()[:12]
+
+
+def version_codigo():
+    """
+    Devuelve el identificador del código desplegado: VERSION_DESPLIEGUE o, si no está
+    definido, un hash del código y las plantillas de la app.
+    """
+    return settings.VERSION_DESPLIEGUE or _hash_codigo()
+
+
+def _almacen_estado():
+    # Si no está configurada (p. ej. pruebas que solo definen 'default'), la de por defecto
+    return caches[ALIAS_ESTADO] if ALIAS_ESTADO in settings.CACHES else cache
+
+
+def _nuevo_estado():
+    # Sin microsegundos: Last-Modified solo tiene precisión de segundos
+    return uuid.uuid4().hex[:12], timezone.now().replace(microsecond=0)
+
+
+def _estado_datos():
+    almacen = _almacen_estado()
+    clave = CLAVE_VERSION.format(version_codigo())
+    estado = almacen.get(clave)
+    if estado is None:
+        estado = _nuevo_estado()
+        # add() no pisa la versión si otro proceso la creó mientras tanto
+        if not almacen.add(clave, estado, timeout=None):
+            estado = almacen.get(clave, estado)
+    return estado
+
+
+def estado_datos():
+    """
+    Devuelve (versión, instante de la versión) con una sola lectura de la caché.
+    """
+    return _estado_datos()
+
+
+def version_datos():
+    """
+    Devuelve la versión actual de los datos, creándola si aún no existe.
+    """
+    return _estado_datos()[0]
+
+
+def invalidar_datos():
+    """
+    Marca como obsoleto todo lo cacheado a partir de los datos de reactores.
+    """
+    _almacen_estado().set(CLAVE_VERSION.format(version_codigo()), _nuevo_estado(), timeout=None)
+
+
+def cachear(nombre, calcular):
+    """
+    Devuelve el valor cacheado bajo `nombre` para la versión de datos actual,
+    calculándolo con `calcular()` si todavía no está en caché.
+    """
+    clave = f'reactores:{nombre}:{version_datos()}'
+    valor = cache.get(clave)
+    if valor is None:
+        valor = calcular()
+        cache.set(clave, valor)
+    return valor
+
+
+async def acachear(nombre, calcular):
+    """
+    Versión asíncrona de cachear() para las vistas asíncronas: `calcular` es una función
+    asíncrona y la caché se lee y se escribe sin bloquear el bucle de eventos.
+    """
+    clave = f'reactores:{nombre}:{await sync_to_async(version_datos)()}'
+    valor = await cache.aget(clave)
+    if valor is None:
+        valor = await calcular()
+        await cache.aset(clave, valor)
+    return valor
+
+
+def _claves_partes(nombre, version):
+    # La del índice (qué partes hay) y la de cada parte
+    return f'reactores:{nombre}:{version}', lambda parte: f'reactores:{nombre}:{parte}:{version}'
+
+
+def cachear_por_partes(nombre, parte, calcular):
+    """
+    Como cachear(), para un cálculo que da {parte: valor} de una sola pasada: cada parte
+    se guarda bajo su propia clave y solo se lee la pedida, no el resultado entero.
+    Devuelve None si `parte` no está en el resultado.
+    """
+    clave_indice, clave = _claves_partes(nombre, version_datos())
+    partes = cache.get(clave_indice)
+    if partes is not None:
+        if parte not in partes:
+            return None
+        valor = cache.get(clave(parte))
+        if valor is not None:
+            return valor
+    # Sin calcular todavía, o la parte se perdió de la caché: se recalculan todas
+    valores = calcular()
+    cache.set_many({clave(p): valor for p, valor in valores.items()})
+    cache.set(clave_indice, frozenset(valores))
+    return valores.get(parte)
+
+
+async def acachear_por_partes(nombre, parte, calcular):
+    """
+    Versión asíncrona de cachear_por_partes(), con `calcular` asíncrona.
+    """
+    clave_indice, clave = _claves_partes(nombre, await sync_to_async(version_datos)())
+    partes = await cache.aget(clave_indice)
+    if partes is not None:
+        if parte not in partes:
+            return None
+        valor = await cache.aget(clave(parte))
+        if valor is not None:
+            return valor
+    valores = await calcular()
+    await cache.aset_many({clave(p): valor for p, valor in valores.items()})
+    await cache.aset(clave_indice, frozenset(valores))
+    return valores.get(parte)
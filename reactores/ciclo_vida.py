@@ -0,0 +1,80 @@
+# En reactores/ciclo_vida.py
+import json
+from datetime import date
+
+from .models import Reactor
+
+# Vida útil asumida para proyectar el cierre de los reactores que siguen operando
+VIDA_UTIL_ANOS = 60
+VIDA_UTIL_DIAS = round(VIDA_UTIL_ANOS * 365.25)
+ESTADOS = ['Desmantelado', f'Operativo (Proyección a {VIDA_UTIL_ANOS} años)']
+
+# Las fechas viajan como días desde 1970-01-01 (enteros), mucho más compactas que ISO
+EPOCA = date(1970, 1, 1)
+
+# Filas por bloque: es lo único que se mantiene en memoria mientras se emite la respuesta
+TAMANO_BLOQUE = 2000
+
+
+def filas_ciclo_vida(pais=None):
+    """
+    Itera (nombre, pais, fecha_primera_conexion, fecha_cierre_permanente) de los
+    reactores conectados, trayendo solo esas columnas y filtrando el país en SQL.
+    """
+    reactores = Reactor.objects.exclude(fecha_primera_conexion__isnull=True)
+    if pais:
+        reactores = reactores.filter(pais=pais)
+    return reactores.order_by('nombre').values_list(
+        'nombre', 'pais', 'fecha_primera_conexion', 'fecha_cierre_permanente'
+    ).iterator(chunk_size=TAMANO_BLOQUE)
+
+
+def _bloque_vacio():
+    return {'nombre': [], 'pais': [], 'estado': [], 'inicio': [], 'fin': []}
+
+
+def _volcar(bloque):
+    return json.dumps(bloque, separators=(',', ':'))
+
+
+def json_columnar_ciclo_vida(filas, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Genera, trozo a trozo, el JSON columnar de la línea de tiempo:
+
+        {"estados": [...], "bloques": [{"nombre": [...], "pais": [...], "estado": [...],
+                                        "inicio": [...], "fin": [...]}, ...],
+         "paises": [...]}
+
+    Cada bloque guarda columnas paralelas; `pais` y `estado` son índices dentro de
+    los diccionarios `paises` y `estados`, y las fechas son días desde 1970-01-01.
+    """
+    # La proyección es una suma de enteros: las fechas se pasan a días una sola vez
+    epoca = EPOCA.toordinal()
+    paises = {}
+
+    yield '{"estados":' + json.dumps(ESTADOS) + ',"bloques":['
+    separador = ''
+    bloque = _bloque_vacio()
+    for nombre, pais, inicio, cierre in filas:
+        dia_inicio = inicio.toordinal() - epoca
+        if cierre:
+            dia_fin, estado = cierre.toordinal() - epoca, 0
+        else:
+            dia_fin, estado = dia_inicio + VIDA_UTIL_DIAS, 1
+
+        bloque['nombre'].append(nombre)
+        bloque['pais'].append(paises.setdefault(pais, len(paises)))
+        bloque['estado'].append(estado)
+        bloque['inicio'].append(dia_inicio)
+        bloque['fin'].append(dia_fin)
+
+        if len(bloque['nombre']) >= tamano_bloque:
+            yield separador + _volcar(bloque)
+            separador = ','
+            bloque = _bloque_vacio()
+
+    if bloque['nombre']:
+        yield separador + _volcar(bloque)
+
+    # El diccionario de países va al final: solo se conoce completo tras recorrer las filas
+    yield '],"paises":' + json.dumps(list(paises)) + '}'
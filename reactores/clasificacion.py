@@ -0,0 +1,31 @@
+# En reactores/clasificacion.py
+from functools import lru_cache
+
+# Palabras clave de cada categoría, en orden de prioridad: si un modelo contiene
+# palabras de varias categorías, gana la que aparece antes en esta tabla.
+CATEGORIAS = [
+    ('PWR', ('PWR', 'PRESSURIZED')),
+    ('BWR', ('BWR', 'BOILING')),
+    ('PHWR', ('PHWR', 'CANDU')),
+    ('GCR', ('GCR', 'GAS', 'AGR')),
+    ('LWGR', ('LWGR', 'RBMK')),
+    ('FBR', ('FBR', 'FAST')),
+]
+
+# La misma tabla aplanada a (palabra, categoría), ya en orden de prioridad
+_PALABRAS = [(palabra, categoria) for categoria, palabras in CATEGORIAS for palabra in palabras]
+
+
+@lru_cache(maxsize=4096)
+def clasificar_tipo(modelo):
+    """
+    Devuelve la categoría simple (PWR, BWR, PHWR, GCR, LWGR o FBR) que corresponde
+    al texto del modelo de un reactor, o None si no contiene ninguna palabra clave.
+    """
+    if not modelo:
+        return None
+    texto = modelo.upper()
+    for palabra, categoria in _PALABRAS:
+        if palabra in texto:
+            return categoria
+    return None
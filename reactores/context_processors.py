@@ -1,10 +1,19 @@
 # En reactores/context_processors.py
+from django.utils.functional import SimpleLazyObject
+
+from .cache import version_datos
+
 
 def nav_context(request):
     """
     Añade el nombre de la ruta actual al contexto de todas las plantillas.
     Esto nos permite saber qué página está activa para resaltarla en la navegación.
+    También la versión de los datos, para usarla en la clave de los {% cache %} que
+    dependen de ellos; solo se lee de la caché si alguna plantilla la usa. Cambia también
+    con cada despliegue (ver version_codigo), así que un fragmento con HTML nuevo nunca
+    se sirve desde la copia del anterior.
     """
+    contexto = {'version_datos': SimpleLazyObject(version_datos)}
     if request.resolver_match:
-        return {'current_path': request.resolver_match.url_name}
-    return {}
\ No newline at end of file
+        contexto['current_path'] = request.resolver_match.url_name
+    return contexto
@@ -0,0 +1,119 @@
+# En reactores/decorators.py
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .cache import estado_datos, version_datos
+from .geometria import version_geometria
+
+
+def _validadores(request, estado):
+    # Lo que hacía condition() de Django, pero con el estado de los datos ya leído (una
+    # sola vez): (ETag, Last-Modified, 304/412 si el navegador ya tiene esta versión)
+    version, instante = estado
+    etag, ultima = quote_etag(version), int(instante.timestamp())
+    return etag, ultima, get_conditional_response(request, etag=etag, last_modified=ultima)
+
+
+def _completar(request, respuesta, etag, ultima):
+    if request.method in ('GET', 'HEAD'):
+        if not respuesta.has_header('Last-Modified'):
+            respuesta.headers['Last-Modified'] = http_date(ultima)
+        respuesta.headers.setdefault('ETag', etag)
+    # no-cache: el navegador puede guardar la respuesta, pero debe revalidarla siempre
+    patch_cache_control(respuesta, public=True, no_cache=True)
+    return respuesta
+
+
+def api_condicional(vista):
+    """
+    Añade ETag y Last-Modified (según la versión de los datos) y Cache-Control a una API.
+    Si el navegador ya tiene la versión actual, responde 304 sin ejecutar la vista,
+    así que no se hace ninguna consulta a la base de datos. Admite vistas asíncronas:
+    en ellas la caché se lee sin bloquear el bucle de eventos.
+    """
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(request, *args, **kwargs):
+            etag, ultima, respuesta = _validadores(request, await sync_to_async(estado_datos)())
+            if respuesta is None:
+                respuesta = await vista(request, *args, **kwargs)
+            return _completar(request, respuesta, etag, ultima)
+
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        etag, ultima, respuesta = _validadores(request, estado_datos())
+        if respuesta is None:
+            respuesta = vista(request, *args, **kwargs)
+        return _completar(request, respuesta, etag, ultima)
+
+    return envoltura
+
+
+def _clave_pagina(request):
+    # Con la versión de los datos en la clave, una importación deja obsoletas todas las páginas.
+    # La de la geometría también: el atlas enlaza los ficheros con hash del manifiesto, y
+    # `construir_geometria` borra los anteriores, que darían 404 desde una página guardada.
+    # Solo la ruta: con la consulta, cualquiera podría llenar la caché con ?x=1, ?x=2...
+    ruta = hashlib.sha1(request.path.encode()).hexdigest()[:16]
+    return f'reactores:pagina:{version_datos()}:{version_geometria()}:{ruta}'
+
+
+def _cacheable(request):
+    # Las páginas con parámetros en la URL se renderizan siempre, sin ocupar la caché
+    return settings.CACHE_PAGINAS and request.method == 'GET' and not request.GET
+
+
+def _guardable(respuesta):
+    return respuesta.status_code == 200 and not respuesta.streaming
+
+
+def _desde_cache(guardada):
+    contenido, tipo = guardada
+    return HttpResponse(contenido, content_type=tipo)
+
+
+def pagina_cacheada(vista):
+    """
+    Con CACHE_PAGINAS, guarda la página renderizada y se la sirve desde la caché a los
+    usuarios anónimos hasta que cambian los datos. Solo las URLs sin parámetros: las
+    demás se renderizan siempre. Admite vistas asíncronas.
+    """
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(request, *args, **kwargs):
+            if not _cacheable(request) or (await request.auser()).is_authenticated:
+                return await vista(request, *args, **kwargs)
+            clave = await sync_to_async(_clave_pagina)(request)
+            guardada = await cache.aget(clave)
+            if guardada is not None:
+                return _desde_cache(guardada)
+            respuesta = await vista(request, *args, **kwargs)
+            if _guardable(respuesta):
+                await cache.aset(clave, (respuesta.content, respuesta['Content-Type']))
+            return respuesta
+
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if not _cacheable(request) or request.user.is_authenticated:
+            return vista(request, *args, **kwargs)
+        clave = _clave_pagina(request)
+        guardada = cache.get(clave)
+        if guardada is not None:
+            return _desde_cache(guardada)
+        respuesta = vista(request, *args, **kwargs)
+        if _guardable(respuesta):
+            cache.set(clave, (respuesta.content, respuesta['Content-Type']))
+        return respuesta
+
+    return envoltura
@@ -0,0 +1,213 @@
+# En reactores/descargas.py
+import hashlib
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .extraccion import extraer_coordenadas
+
+CABECERAS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36',
+    'Accept': 'application/json, text/javascript, */*; q=0.01',
+    'X-Requested-With': 'XMLHttpRequest',
+    'Referer': 'https://world-nuclear.org/nuclear-reactor-database/search/'
+}
+
+CABECERAS_DETALLE = {
+    'User-Agent': CABECERAS['User-Agent'],
+    'Referer': 'https://world-nuclear.org/nuclear-reactor-database/'
+}
+
+URL_HISTORIAL = 'https://world-nuclear.org/charts/'
+URL_DETALLE = 'https://world-nuclear.org/nuclear-reactor-database/details/'
+
+# Respuestas definitivas: cualquier otro código (o un error de red) se reintenta
+ESTADOS_FINALES = {200, 304, 404}
+
+# estado: 'ok' (datos descargados), 'no_modificado' (304), 'sin_historial' (404)
+# o 'fallo' (agotó los intentos). etag, last_modified y hash describen lo descargado.
+Descarga = namedtuple('Descarga', ['estado', 'datos', 'intentos', 'error', 'etag', 'last_modified', 'hash'])
+ResultadoDescarga = namedtuple('ResultadoDescarga', ['reactor_id', 'nombre', *Descarga._fields])
+
+# estado: 'ok', 'sin_coordenadas' (la página no trae los campos), 'invalidas'
+# (los campos no son números), 'no_encontrado' (404) o 'fallo'
+ResultadoCoordenadas = namedtuple('ResultadoCoordenadas', ['reactor_id', 'nombre', 'estado', 'coordenadas', 'intentos', 'error'])
+
+
+class LimitadorTasa:
+    """
+    Reparte las peticiones de todos los hilos para no superar `por_segundo` en total.
+    Cada llamada a esperar() reserva el siguiente hueco libre y duerme hasta él.
+    """
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1 / por_segundo if por_segundo else 0
+        self._siguiente = time.monotonic()
+        self._lock = threading.Lock()
+
+    def esperar(self):
+        if not self.intervalo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(self._siguiente, ahora)
+            self._siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+def crear_sesion(conexiones=8, cabeceras=CABECERAS):
+    """
+    Sesión HTTP con un pool de conexiones reutilizables (keep-alive) compartido por los hilos.
+    Los reintentos los gestionamos nosotros, así que el adaptador no reintenta.
+    """
+    sesion = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones, max_retries=0)
+    sesion.mount('http://', adaptador)
+    sesion.mount('https://', adaptador)
+    sesion.headers.update(cabeceras)
+    return sesion
+
+
+def espera_con_jitter(intento, base=1.0, maximo=30.0):
+    """
+    Backoff exponencial con "full jitter": un tiempo aleatorio entre 0 y base * 2^intento.
+    """
+    return random.uniform(0, min(maximo, base * 2 ** intento))
+
+
+def cabeceras_condicionales(etag='', last_modified=''):
+    """
+    Cabeceras para pedir el recurso solo si cambió desde la última descarga.
+    """
+    cabeceras = {}
+    if etag:
+        cabeceras['If-None-Match'] = etag
+    if last_modified:
+        cabeceras['If-Modified-Since'] = last_modified
+    return cabeceras
+
+
+def obtener(sesion, url, limitador, intentos=3, espera_base=1.0, timeout=20, cabeceras=None):
+    """
+    Hace GET a `url` respetando el limitador y reintentando con backoff los errores
+    de red y los códigos que no están en ESTADOS_FINALES.
+    Devuelve (respuesta o None, intentos_usados, último error).
+    """
+    error = None
+    for intento in range(intentos):
+        limitador.esperar()
+        try:
+            respuesta = sesion.get(url, timeout=timeout, headers=cabeceras)
+            if respuesta.status_code in ESTADOS_FINALES:
+                return respuesta, intento + 1, None
+            error = f"Error {respuesta.status_code}"
+        except requests.exceptions.RequestException as e:
+            error = f"Error de conexión: {e}"
+
+        if intento < intentos - 1:
+            time.sleep(espera_con_jitter(intento, base=espera_base))
+
+    return None, intentos, error
+
+
+def descargar_json(sesion, url, limitador, intentos=3, espera_base=1.0, timeout=20, cabeceras=None):
+    """
+    Descarga `url` con reintentos y devuelve una Descarga. Con `cabeceras`
+    condicionales, un 304 indica que el contenido no cambió desde la última vez.
+    Un 404 no se reintenta: significa que el reactor no tiene historial publicado.
+    """
+    respuesta, usados, error = obtener(sesion, url, limitador, intentos, espera_base, timeout, cabeceras)
+    if respuesta is None:
+        return Descarga('fallo', None, usados, error, '', '', '')
+    if respuesta.status_code == 304:
+        return Descarga('no_modificado', None, usados, None, '', '', '')
+    if respuesta.status_code == 404:
+        return Descarga('sin_historial', None, usados, None, '', '', '')
+    try:
+        datos = respuesta.json()
+    except ValueError as e:
+        return Descarga('fallo', None, usados, f"JSON inválido: {e}", '', '', '')
+    return Descarga(
+        'ok', datos, usados, None,
+        respuesta.headers.get('ETag', ''), respuesta.headers.get('Last-Modified', ''),
+        hashlib.sha256(respuesta.content).hexdigest(),
+    )
+
+
+def url_historial(nombre, url_base=URL_HISTORIAL):
+    return url_base + nombre.replace(' ', '%20')
+
+
+def url_detalle(nombre, url_base=URL_DETALLE):
+    return url_base + nombre.title().replace(' ', '-')
+
+
+def _en_paralelo(reactores, tarea, hilos, cabeceras):
+    """
+    Ejecuta tarea(sesion, reactor_id, nombre) para cada reactor en un pool de hilos
+    que comparte una sesión HTTP, y va devolviendo (reactor_id, nombre, resultado).
+    Si quien consume falla o se interrumpe (Ctrl-C), las descargas pendientes se cancelan.
+    """
+    with crear_sesion(conexiones=hilos, cabeceras=cabeceras) as sesion, ThreadPoolExecutor(max_workers=hilos) as pool:
+        futuros = {
+            pool.submit(tarea, sesion, reactor_id, nombre): (reactor_id, nombre)
+            for reactor_id, nombre in reactores
+        }
+        try:
+            for futuro in as_completed(futuros):
+                reactor_id, nombre = futuros[futuro]
+                yield reactor_id, nombre, futuro.result()
+        finally:
+            # Sin esto, al salir del with se esperaría a que se descargase toda la flota
+            pool.shutdown(cancel_futures=True)
+
+
+def descargar_historiales(reactores, url_base=URL_HISTORIAL, hilos=8, peticiones_por_segundo=4.0,
+                          intentos=3, espera_base=1.0, condiciones=None):
+    """
+    Descarga en paralelo el historial de cada (reactor_id, nombre) de `reactores`.
+    `condiciones` puede asociar a cada reactor_id sus cabeceras condicionales.
+    Va devolviendo un ResultadoDescarga por reactor a medida que terminan,
+    para que quien llama guarde los datos en la BD desde su propio hilo.
+    """
+    condiciones = condiciones or {}
+    limitador = LimitadorTasa(peticiones_por_segundo)
+
+    def tarea(sesion, reactor_id, nombre):
+        return descargar_json(
+            sesion, url_historial(nombre, url_base), limitador, intentos, espera_base,
+            cabeceras=condiciones.get(reactor_id),
+        )
+
+    for reactor_id, nombre, descarga in _en_paralelo(reactores, tarea, hilos, CABECERAS):
+        yield ResultadoDescarga(reactor_id, nombre, *descarga)
+
+
+def descargar_coordenadas(reactores, url_base=URL_DETALLE, hilos=8, peticiones_por_segundo=4.0,
+                          intentos=3, espera_base=1.0):
+    """
+    Descarga en paralelo la página de detalle de cada (reactor_id, nombre) y extrae
+    sus coordenadas. Va devolviendo un ResultadoCoordenadas por reactor.
+    """
+    limitador = LimitadorTasa(peticiones_por_segundo)
+
+    def tarea(sesion, reactor_id, nombre):
+        respuesta, usados, error = obtener(sesion, url_detalle(nombre, url_base), limitador, intentos, espera_base, timeout=15)
+        if respuesta is None:
+            return 'fallo', None, usados, error
+        if respuesta.status_code != 200:
+            return 'no_encontrado', None, usados, f"Error {respuesta.status_code}"
+        try:
+            coordenadas = extraer_coordenadas(respuesta.content)
+        except ValueError as e:
+            return 'invalidas', None, usados, str(e)
+        return ('ok' if coordenadas else 'sin_coordenadas'), coordenadas, usados, None
+
+    for reactor_id, nombre, resultado in _en_paralelo(reactores, tarea, hilos, CABECERAS_DETALLE):
+        yield ResultadoCoordenadas(reactor_id, nombre, *resultado)
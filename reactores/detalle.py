@@ -0,0 +1,72 @@
+# En reactores/detalle.py
+from .models import HistorialRendimiento, Reactor
+from .resumen import CAMPOS_RESUMEN, resumen_como_dict
+
+# Columnas que se envían al navegador en los modales de detalle y el comparador
+CAMPOS_REACTOR = [
+    'id', 'nombre', 'nombre_alternativo', 'pais', 'status', 'dueño', 'operador', 'modelo',
+    'potencia_neta', 'tipo_reactor_categoria', 'latitud', 'longitud', 'capacidad_termica',
+    'capacidad_bruta', 'fecha_inicio_construccion', 'fecha_primera_conexion', 'fecha_cierre_permanente',
+]
+CAMPOS_HISTORIAL = [
+    'id', 'reactor_id', 'ano', 'electricidad_suministrada', 'potencia_referencia',
+    'tiempo_en_linea_anual', 'factor_operacion', 'factor_carga_anual',
+]
+
+# Máximo de reactores por petición al endpoint por lotes
+MAX_REACTORES_POR_LOTE = 50
+
+
+def _consulta_reactores(ids, incluir_resumen):
+    reactores = Reactor.objects.filter(pk__in=ids).only(*CAMPOS_REACTOR)
+    if incluir_resumen:
+        reactores = reactores.select_related('resumen').only(
+            *CAMPOS_REACTOR, *(f'resumen__{campo}' for campo in CAMPOS_RESUMEN)
+        )
+    return reactores
+
+
+def _consulta_historial(ids):
+    return HistorialRendimiento.objects.filter(reactor_id__in=ids).order_by('reactor_id', 'ano').values(*CAMPOS_HISTORIAL)
+
+
+def _armar(ids, reactores, historial, incluir_resumen):
+    por_id = {}
+    for reactor in reactores:
+        datos = {campo: getattr(reactor, campo) for campo in CAMPOS_REACTOR}
+        if incluir_resumen:
+            datos['resumen'] = resumen_como_dict(reactor)
+        if historial is not None:
+            datos['historial'] = []
+        por_id[reactor.pk] = datos
+    for registro in historial or ():
+        if registro['reactor_id'] in por_id:
+            por_id[registro['reactor_id']]['historial'].append(registro)
+
+    return [por_id[pk] for pk in ids if pk in por_id]
+
+
+def obtener_reactores(ids, incluir_historial=False, incluir_resumen=False):
+    """
+    Devuelve los datos de varios reactores (en el orden de `ids`) como diccionarios.
+    Es una sola consulta para los reactores (con su resumen de rendimiento, si se pide)
+    y, si se pide, otra para todo su historial.
+    Los ids que no existen simplemente no aparecen en el resultado.
+    """
+    historial = list(_consulta_historial(ids)) if incluir_historial else None
+    return _armar(ids, _consulta_reactores(ids, incluir_resumen), historial, incluir_resumen)
+
+
+async def _alista(consulta):
+    return [fila async for fila in consulta]
+
+
+async def aobtener_reactores(ids, incluir_historial=False, incluir_resumen=False):
+    """
+    Versión asíncrona de obtener_reactores, con las mismas consultas. Van una tras otra:
+    el ORM asíncrono las ejecuta todas en el hilo de la petición y con su conexión, así
+    que lanzarlas con asyncio.gather no las solaparía.
+    """
+    reactores = await _alista(_consulta_reactores(ids, incluir_resumen))
+    historial = await _alista(_consulta_historial(ids)) if incluir_historial else None
+    return _armar(ids, reactores, historial, incluir_resumen)
@@ -0,0 +1,206 @@
+# En reactores/escritura.py
+import csv
+import io
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import EstadoImportacion, HistorialRendimiento
+from .resumen import actualizar_resumenes
+
+# Correspondencia entre las claves del JSON de la WNA y los campos del modelo
+CAMPOS_API = {
+    'electricidad_suministrada': 'ElectricitySupplied',
+    'potencia_referencia': 'ReferenceUnitPower',
+    'tiempo_en_linea_anual': 'AnnualTimeOnLine',
+    'factor_operacion': 'OperationFactor',
+    'factor_carga_anual': 'LoadFactorAnnual',
+}
+CAMPOS_VALOR = list(CAMPOS_API)
+# Conversión de cada valor del JSON al tipo de su campo (p. ej. 1000.0 -> 1000 en un
+# IntegerField): COPY no convierte nada y la comparación con la BD necesita los mismos tipos
+_CONVERSORES = [HistorialRendimiento._meta.get_field(campo).to_python for campo in CAMPOS_VALOR]
+
+# A partir de este tamaño de lote, en PostgreSQL compensa usar COPY en vez de INSERT
+MINIMO_PARA_COPY = 500
+
+
+def valores_desde_api(record):
+    """
+    Convierte un registro anual del JSON de la WNA en una tupla con los valores de
+    CAMPOS_VALOR, ya con el tipo de cada campo. Lanza ValidationError si alguno no es válido.
+    """
+    return tuple(convertir(record.get(clave)) for convertir, clave in zip(_CONVERSORES, CAMPOS_API.values()))
+
+
+class EscritorHistorial:
+    """
+    Acumula registros de historial y los guarda por lotes, con un "upsert" por lote
+    dentro de su propia transacción. Los registros idénticos a los guardados se
+    descartan antes de escribir y se cuentan como sin cambios.
+
+    El estado de importación de cada reactor (ETag, Last-Modified, hash) y su resumen
+    de rendimiento se guardan en la misma transacción que su historial. Con
+    `simular=True` solo se cuenta lo que cambiaría, sin escribir nada.
+
+    Uso:
+        with EscritorHistorial(tamano_lote=1000) as escritor:
+            escritor.agregar(reactor_id, datos_json, estado={'etag': ..., 'hash_contenido': ...})
+        escritor.insertados, escritor.actualizados, escritor.sin_cambios
+    """
+
+    def __init__(self, tamano_lote=1000, usar_copy=True, simular=False):
+        self.tamano_lote = tamano_lote
+        self.usar_copy = usar_copy and connection.vendor == 'postgresql'
+        self.simular = simular
+        self.pendientes = {}
+        self.estados = {}
+        self.comprobados = {}
+        self.insertados = 0
+        self.actualizados = 0
+        self.sin_cambios = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_error, *args):
+        if tipo_error is None:
+            self.volcar()
+
+    def agregar(self, reactor_id, records, estado=None):
+        """
+        Añade al búfer los registros anuales (formato JSON de la WNA) de un reactor
+        y, opcionalmente, su nuevo estado de importación.
+        """
+        if estado is not None:
+            self.estados[reactor_id] = estado
+        for record in records:
+            ano = record.get('Year')
+            if ano is None:
+                continue
+            # Si el mismo año aparece dos veces nos quedamos con el último
+            self.pendientes[(reactor_id, ano)] = valores_desde_api(record)
+        if len(self.pendientes) >= self.tamano_lote:
+            self.volcar()
+
+    def registrar_comprobacion(self, reactor_id, estado=None):
+        """
+        Anota que el reactor se comprobó y su historial no había cambiado: se actualiza la
+        fecha y, con `estado`, también el ETag, Last-Modified y hash (no la fecha de cambio).
+        """
+        self.comprobados[reactor_id] = estado
+
+    def volcar(self):
+        """
+        Escribe en la BD todo lo que hay en el búfer.
+        """
+        if not (self.pendientes or self.estados or self.comprobados):
+            return
+        lote, self.pendientes = self.pendientes, {}
+        estados, self.estados = self.estados, {}
+        comprobados, self.comprobados = self.comprobados, {}
+
+        with transaction.atomic():
+            existentes = {
+                (fila[0], fila[1]): fila[2:]
+                for fila in HistorialRendimiento.objects.filter(
+                    reactor_id__in={reactor_id for reactor_id, _ in lote}
+                ).values_list('reactor_id', 'ano', *CAMPOS_VALOR)
+            }
+
+            a_escribir = []
+            for clave, valores in lote.items():
+                if clave not in existentes:
+                    self.insertados += 1
+                elif existentes[clave] != valores:
+                    self.actualizados += 1
+                else:
+                    self.sin_cambios += 1
+                    continue
+                a_escribir.append((*clave, *valores))
+
+            if self.simular:
+                return
+            if self.usar_copy and len(a_escribir) >= MINIMO_PARA_COPY:
+                self._upsert_copy(a_escribir)
+            elif a_escribir:
+                self._upsert_bulk(a_escribir)
+            # El resumen de rendimiento se refresca solo para los reactores que cambiaron
+            actualizar_resumenes({fila[0] for fila in a_escribir})
+            self._guardar_estados(estados, comprobados)
+
+    def _guardar_estados(self, estados, comprobados):
+        ahora = timezone.now()
+        if estados:
+            EstadoImportacion.objects.bulk_create(
+                [
+                    EstadoImportacion(reactor_id=reactor_id, fecha_comprobacion=ahora, fecha_cambio=ahora, **estado)
+                    for reactor_id, estado in estados.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['reactor'],
+                update_fields=['etag', 'last_modified', 'hash_contenido', 'fecha_comprobacion', 'fecha_cambio'],
+            )
+        nuevos = {reactor_id: estado for reactor_id, estado in comprobados.items() if estado is not None}
+        if nuevos:
+            # Puede que el reactor aún no tenga fila (p. ej. la primera vez que da 404)
+            EstadoImportacion.objects.bulk_create(
+                [
+                    EstadoImportacion(reactor_id=reactor_id, fecha_comprobacion=ahora, **estado)
+                    for reactor_id, estado in nuevos.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['reactor'],
+                update_fields=['etag', 'last_modified', 'hash_contenido', 'fecha_comprobacion'],
+            )
+        solo_fecha = [reactor_id for reactor_id in comprobados if reactor_id not in nuevos]
+        if solo_fecha:
+            EstadoImportacion.objects.filter(reactor_id__in=solo_fecha).update(fecha_comprobacion=ahora)
+
+    def _upsert_bulk(self, filas):
+        HistorialRendimiento.objects.bulk_create(
+            [
+                HistorialRendimiento(reactor_id=reactor_id, ano=ano, **dict(zip(CAMPOS_VALOR, valores)))
+                for reactor_id, ano, *valores in filas
+            ],
+            update_conflicts=True,
+            unique_fields=['reactor', 'ano'],
+            update_fields=CAMPOS_VALOR,
+        )
+
+    def _upsert_copy(self, filas):
+        """
+        Camino rápido de PostgreSQL: COPY a una tabla temporal y un único
+        INSERT ... ON CONFLICT DO UPDATE desde ella.
+        """
+        tabla = HistorialRendimiento._meta.db_table
+        columnas = ['reactor_id', 'ano', *CAMPOS_VALOR]
+        lista_columnas = ', '.join(columnas)
+        actualizar = ', '.join(f'{c} = EXCLUDED.{c}' for c in CAMPOS_VALOR)
+
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            ['' if valor is None else valor for valor in fila] for fila in filas
+        )
+        buffer.seek(0)
+
+        with connection.cursor() as cursor:
+            # Puede existir si varios lotes comparten una misma transacción externa
+            cursor.execute('DROP TABLE IF EXISTS tmp_historial')
+            cursor.execute(
+                f'CREATE TEMP TABLE tmp_historial ON COMMIT DROP AS '
+                f'SELECT {lista_columnas} FROM {tabla} WITH NO DATA'
+            )
+            copia = f'COPY tmp_historial ({lista_columnas}) FROM STDIN WITH (FORMAT csv)'
+            cursor_nativo = cursor.cursor
+            if hasattr(cursor_nativo, 'copy_expert'):
+                # psycopg2
+                cursor_nativo.copy_expert(copia, buffer)
+            else:
+                # psycopg 3
+                with cursor_nativo.copy(copia) as copy:
+                    copy.write(buffer.getvalue())
+            cursor.execute(
+                f'INSERT INTO {tabla} ({lista_columnas}) SELECT {lista_columnas} FROM tmp_historial '
+                f'ON CONFLICT (reactor_id, ano) DO UPDATE SET {actualizar}'
+            )
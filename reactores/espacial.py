@@ -0,0 +1,169 @@
+# En reactores/espacial.py
+import heapq
+import math
+import threading
+from operator import itemgetter
+
+from .cache import version_datos
+from .models import Reactor
+
+RADIO_TIERRA_KM = 6371.0088
+SEMICIRCUNFERENCIA_KM = math.pi * RADIO_TIERRA_KM
+
+# Lado (en grados) de cada celda de la rejilla del índice
+TAMANO_CELDA = 1.0
+
+# Radio inicial de la búsqueda de vecinos; se duplica hasta reunir k candidatos
+RADIO_INICIAL_KM = 250.0
+
+# Límites de las APIs de consulta espacial
+LIMITE_CAJA = 1000
+MAX_VECINOS = 100
+
+# Lo que guarda el índice de cada reactor (latitud y longitud siempre al final)
+CAMPOS_INDICE = ('id', 'nombre', 'pais', 'status', 'potencia_neta', 'latitud', 'longitud')
+
+
+def distancia_km(lat1, lon1, lat2, lon2):
+    """
+    Distancia de círculo máximo (fórmula del haversine) entre dos puntos, en km.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def caja_alrededor(lat, lon, radio_km):
+    """
+    Caja (sur, oeste, norte, este) que contiene el círculo de `radio_km` alrededor del punto.
+    Si el círculo cruza el antimeridiano, oeste > este; si alcanza un polo, abarca todas las longitudes.
+    """
+    distancia = radio_km / RADIO_TIERRA_KM
+    lat_r, lon_r = math.radians(lat), math.radians(lon)
+    sur, norte = lat_r - distancia, lat_r + distancia
+    if sur <= -math.pi / 2 or norte >= math.pi / 2:
+        return max(-90.0, math.degrees(sur)), -180.0, min(90.0, math.degrees(norte)), 180.0
+
+    delta_lon = math.asin(math.sin(distancia) / math.cos(lat_r))
+    oeste, este = lon_r - delta_lon, lon_r + delta_lon
+    if oeste < -math.pi:
+        oeste += 2 * math.pi
+    if este > math.pi:
+        este -= 2 * math.pi
+    return math.degrees(sur), math.degrees(oeste), math.degrees(norte), math.degrees(este)
+
+
+class IndiceEspacial:
+    """
+    Índice en memoria de una rejilla de celdas de `tamano_celda` grados.
+    Cada reactor es una tupla con los valores de CAMPOS_INDICE.
+    """
+
+    def __init__(self, reactores, tamano_celda=TAMANO_CELDA):
+        self.tamano = tamano_celda
+        self.reactores = list(reactores)
+        self.celdas = {}
+        for i, reactor in enumerate(self.reactores):
+            self.celdas.setdefault(self._celda(reactor[-2], reactor[-1]), []).append(i)
+
+    def __len__(self):
+        return len(self.reactores)
+
+    def _celda(self, lat, lon):
+        return math.floor(lat / self.tamano), math.floor(lon / self.tamano)
+
+    def _en_rango(self, sur, oeste, norte, este):
+        fila_sur, columna_oeste = self._celda(sur, oeste)
+        fila_norte, columna_este = self._celda(norte, este)
+        if (fila_norte - fila_sur + 1) * (columna_este - columna_oeste + 1) <= len(self.celdas):
+            claves = ((f, c) for f in range(fila_sur, fila_norte + 1) for c in range(columna_oeste, columna_este + 1))
+        else:
+            # Caja enorme: sale más barato recorrer solo las celdas que tienen reactores
+            claves = (
+                (f, c) for f, c in self.celdas
+                if fila_sur <= f <= fila_norte and columna_oeste <= c <= columna_este
+            )
+        for fila, columna in claves:
+            indices = self.celdas.get((fila, columna))
+            if not indices:
+                continue
+            if fila_sur < fila < fila_norte and columna_oeste < columna < columna_este:
+                # Celda interior: todos sus reactores están dentro de la caja
+                yield from indices
+                continue
+            for i in indices:
+                lat, lon = self.reactores[i][-2:]
+                if sur <= lat <= norte and oeste <= lon <= este:
+                    yield i
+
+    def en_caja(self, sur, oeste, norte, este, limite=None):
+        """
+        Reactores dentro de la caja (sin orden particular), como mucho `limite`.
+        Si oeste > este, la caja cruza el antimeridiano.
+        """
+        if oeste <= este:
+            rangos = [(sur, oeste, norte, este)]
+        else:
+            rangos = [(sur, oeste, norte, 180.0), (sur, -180.0, norte, este)]
+        resultado = []
+        for rango in rangos:
+            for i in self._en_rango(*rango):
+                resultado.append(self.reactores[i])
+                if limite is not None and len(resultado) >= limite:
+                    return resultado
+        return resultado
+
+    def cercanos(self, lat, lon, k=10, radio_km=None):
+        """
+        Los `k` reactores más cercanos al punto, como lista de (distancia_km, reactor)
+        ordenada por distancia. Con `radio_km` solo se consideran los que están dentro.
+        """
+        if not self.reactores or k <= 0:
+            return []
+        radio = radio_km if radio_km is not None else RADIO_INICIAL_KM
+        while True:
+            radio = min(radio, SEMICIRCUNFERENCIA_KM)
+            candidatos = []
+            for reactor in self.en_caja(*caja_alrededor(lat, lon, radio)):
+                distancia = distancia_km(lat, lon, reactor[-2], reactor[-1])
+                if distancia <= radio:
+                    candidatos.append((distancia, reactor))
+            # Cualquier reactor fuera del círculo está más lejos que todos los de dentro
+            if len(candidatos) >= k or radio_km is not None or radio >= SEMICIRCUNFERENCIA_KM:
+                return heapq.nsmallest(k, candidatos, key=itemgetter(0))
+            radio *= 2
+
+
+_indice = (None, None)
+_lock = threading.Lock()
+
+
+def construir_indice():
+    """
+    Construye el índice con todos los reactores que tienen coordenadas.
+    """
+    reactores = Reactor.objects.filter(latitud__isnull=False, longitud__isnull=False).values_list(*CAMPOS_INDICE)
+    return IndiceEspacial(reactores.iterator(chunk_size=2000))
+
+
+def indice_espacial():
+    """
+    Índice espacial del proceso. Se reconstruye cuando cambia la versión de los datos.
+    """
+    global _indice
+    version = version_datos()
+    if _indice[0] != version:
+        with _lock:
+            if _indice[0] != version:
+                _indice = (version, construir_indice())
+    return _indice[1]
+
+
+def como_dict(reactor, distancia=None):
+    """
+    Convierte una tupla del índice en el diccionario que devuelven las APIs.
+    """
+    datos = dict(zip(CAMPOS_INDICE, reactor))
+    if distancia is not None:
+        datos['distancia_km'] = round(distancia, 3)
+    return datos
@@ -0,0 +1,58 @@
+# En reactores/estadisticas.py
+import json
+
+from django.db.models import Count, Sum
+
+from .cache import acachear, cachear
+from .models import Reactor
+
+
+def _consulta_paises():
+    return Reactor.objects.values('pais').annotate(total=Count('id'), potencia=Sum('potencia_neta')).order_by('-total', 'pais')
+
+
+def _armar_estadisticas(filas):
+    total_reactores = sum(fila['total'] for fila in filas)
+    potencias = [fila['potencia'] for fila in filas if fila['potencia'] is not None]
+    potencia_total = sum(potencias) if potencias else None
+
+    top_paises = filas[:5]
+    top_paises_chart_data = {
+        'labels': [p['pais'] for p in top_paises],
+        'data': [p['total'] for p in top_paises],
+    }
+
+    return {
+        'total_reactores': total_reactores,
+        'paises_con_reactores': len(filas),
+        'potencia_total_gw': round(potencia_total / 1000) if potencia_total else 0,
+        'todos_los_paises': [{'pais': fila['pais'], 'total': fila['total']} for fila in filas],
+        'top_paises_chart_json': json.dumps(top_paises_chart_data),
+    }
+
+
+def calcular_estadisticas_dashboard():
+    """
+    Calcula todos los KPIs del dashboard con una sola consulta agrupada por país.
+    El total de reactores, la potencia y el número de países se derivan de ella.
+    """
+    return _armar_estadisticas(list(_consulta_paises()))
+
+
+def estadisticas_dashboard():
+    """
+    Devuelve los KPIs del dashboard desde la caché (se recalculan al cambiar los datos).
+    """
+    return cachear('dashboard', calcular_estadisticas_dashboard)
+
+
+async def _acalcular_estadisticas_dashboard():
+    # La misma consulta agrupada, recorrida con el ORM asíncrono
+    return _armar_estadisticas([fila async for fila in _consulta_paises()])
+
+
+async def aestadisticas_dashboard():
+    """
+    Versión asíncrona de estadisticas_dashboard() para la vista asíncrona del dashboard.
+    """
+    return await acachear('dashboard', _acalcular_estadisticas_dashboard)
@@ -0,0 +1,173 @@
+# En reactores/exportacion.py
+# Exportación masiva del historial de rendimiento (una fila por reactor y año, con los
+# datos del reactor) en CSV, NDJSON y, si está instalado pyarrow, Parquet o Arrow.
+# Todo se genera por bloques a partir de un iterador de la BD, así que la memoria no
+# depende del número de filas exportadas.
+import csv
+import io
+import json
+from itertools import islice
+
+from .models import HistorialRendimiento
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow es opcional: sin él solo se exporta en CSV y NDJSON
+    pyarrow = None
+
+# Columnas exportadas: (nombre en el fichero, campo de HistorialRendimiento, tipo de Arrow)
+COLUMNAS_EXPORTACION = [
+    ('reactor_id', 'reactor_id', 'int64'),
+    ('nombre', 'reactor__nombre', 'string'),
+    ('pais', 'reactor__pais', 'string'),
+    ('tipo', 'reactor__tipo_reactor_categoria', 'string'),
+    ('modelo', 'reactor__modelo', 'string'),
+    ('status', 'reactor__status', 'string'),
+    ('potencia_neta', 'reactor__potencia_neta', 'int64'),
+    ('ano', 'ano', 'int32'),
+    ('electricidad_suministrada', 'electricidad_suministrada', 'float64'),
+    ('potencia_referencia', 'potencia_referencia', 'int64'),
+    ('tiempo_en_linea_anual', 'tiempo_en_linea_anual', 'float64'),
+    ('factor_operacion', 'factor_operacion', 'float64'),
+    ('factor_carga_anual', 'factor_carga_anual', 'float64'),
+]
+NOMBRES_COLUMNAS = [nombre for nombre, _, _ in COLUMNAS_EXPORTACION]
+
+# {formato: (tipo MIME, extensión del fichero, necesita pyarrow)}
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv', False),
+    'ndjson': ('application/x-ndjson', 'ndjson', False),
+    'parquet': ('application/vnd.apache.parquet', 'parquet', True),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows', True),
+}
+
+# Filas que se leen de la BD y se escriben de una vez (en Parquet, filas por row group)
+TAMANO_BLOQUE = 10_000
+
+
+def formatos_disponibles():
+    """
+    Formatos de FORMATOS que se pueden generar con las dependencias instaladas.
+    """
+    return [formato for formato, (_, _, arrow) in FORMATOS.items() if pyarrow is not None or not arrow]
+
+
+def filas_exportacion(pais=None, tipo=None, desde=None, hasta=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Itera las filas del historial con los valores de COLUMNAS_EXPORTACION, ordenadas
+    por reactor y año. Los filtros (país, tipo y rango de años) se aplican en SQL.
+    """
+    historial = HistorialRendimiento.objects.order_by('reactor_id', 'ano')
+    if pais:
+        historial = historial.filter(reactor__pais=pais)
+    if tipo:
+        historial = historial.filter(reactor__tipo_reactor_categoria=tipo)
+    if desde is not None:
+        historial = historial.filter(ano__gte=desde)
+    if hasta is not None:
+        historial = historial.filter(ano__lte=hasta)
+    campos = [campo for _, campo, _ in COLUMNAS_EXPORTACION]
+    return historial.values_list(*campos).iterator(chunk_size=tamano_bloque)
+
+
+def _bloques(filas, tamano_bloque):
+    filas = iter(filas)
+    while bloque := list(islice(filas, tamano_bloque)):
+        yield bloque
+
+
+def _csv(filas, tamano_bloque):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(NOMBRES_COLUMNAS)
+    for bloque in _bloques(filas, tamano_bloque):
+        escritor.writerows(bloque)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Solo queda la cabecera si no había ninguna fila
+        yield buffer.getvalue().encode()
+
+
+def _ndjson(filas, tamano_bloque):
+    for bloque in _bloques(filas, tamano_bloque):
+        yield ''.join(
+            json.dumps(dict(zip(NOMBRES_COLUMNAS, fila)), ensure_ascii=False, separators=(',', ':')) + '\n'
+            for fila in bloque
+        ).encode()
+
+
+class _Tubo:
+    """
+    Fichero de solo escritura en memoria para los escritores de pyarrow: guarda lo
+    escrito hasta que se recoge con vaciar(), para emitirlo por trozos.
+    """
+
+    def __init__(self):
+        self.trozos = []
+        self.posicion = 0
+        self.closed = False
+
+    def write(self, datos):
+        self.trozos.append(bytes(datos))
+        self.posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self.posicion
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def vaciar(self):
+        datos = b''.join(self.trozos)
+        self.trozos = []
+        return datos
+
+
+def esquema_arrow():
+    """
+    Esquema de Arrow de COLUMNAS_EXPORTACION (requiere pyarrow).
+    """
+    return pyarrow.schema([(nombre, getattr(pyarrow, tipo)()) for nombre, _, tipo in COLUMNAS_EXPORTACION])
+
+
+def _arrow(filas, tamano_bloque, parquet):
+    esquema = esquema_arrow()
+    tubo = _Tubo()
+    if parquet:
+        escritor = pyarrow.parquet.ParquetWriter(tubo, esquema, compression='zstd')
+    else:
+        escritor = pyarrow.ipc.new_stream(tubo, esquema)
+    for bloque in _bloques(filas, tamano_bloque):
+        # Cada bloque es un row group de Parquet o un record batch de Arrow
+        columnas = [
+            pyarrow.array(valores, type=campo.type) for valores, campo in zip(zip(*bloque), esquema)
+        ]
+        escritor.write_batch(pyarrow.record_batch(columnas, schema=esquema))
+        yield tubo.vaciar()
+    escritor.close()
+    # El pie de Parquet (metadatos de los row groups) solo se conoce al final
+    yield tubo.vaciar()
+
+
+def exportar(filas, formato, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Genera, trozo a trozo y en bytes, el fichero de las filas en el formato indicado.
+    Lanza ValueError si el formato no existe o necesita pyarrow y no está instalado.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato '{formato}' desconocido. Opciones: {', '.join(FORMATOS)}")
+    if formato not in formatos_disponibles():
+        raise ValueError(f"El formato '{formato}' necesita pyarrow, que no está instalado")
+    if formato == 'csv':
+        return _csv(filas, tamano_bloque)
+    if formato == 'ndjson':
+        return _ndjson(filas, tamano_bloque)
+    return _arrow(filas, tamano_bloque, parquet=formato == 'parquet')
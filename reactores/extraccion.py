@@ -0,0 +1,49 @@
+# En reactores/extraccion.py
+import re
+
+from bs4 import BeautifulSoup
+
+# Camino rápido: en lugar de construir el árbol completo de la página, buscamos
+# directamente las etiquetas <input id="Latitude"> y <input id="Longitude"> en los bytes.
+# (?<![\w-]): que 'data-id=' o 'data-value=' no pasen por 'id=' o 'value='
+_INPUT_COORDENADA = re.compile(
+    rb'<(?i:input)\b[^>]*?(?<![\w-])(?i:id)\s*=\s*["\']?(Latitude|Longitude)(?=["\'\s/>])[^>]*>'
+)
+_VALOR = re.compile(rb'(?<![\w-])(?i:value)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+
+
+def _extraer_rapido(html):
+    valores = {}
+    for etiqueta in _INPUT_COORDENADA.finditer(html):
+        campo = etiqueta.group(1).decode()
+        if campo in valores:
+            continue
+        valor = _VALOR.search(etiqueta.group(0))
+        if valor:
+            valores[campo] = next(g for g in valor.groups() if g is not None).decode().strip()
+    return valores
+
+
+def _extraer_con_beautifulsoup(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    valores = {}
+    for campo in ('Latitude', 'Longitude'):
+        etiqueta = soup.find('input', {'id': campo})
+        if etiqueta and etiqueta.get('value'):
+            valores[campo] = etiqueta['value'].strip()
+    return valores
+
+
+def extraer_coordenadas(html):
+    """
+    Devuelve (latitud, longitud) leídas de los campos ocultos #Latitude y #Longitude
+    de la página de detalle (en bytes), o None si no están o vienen vacíos.
+    Si el camino rápido no encuentra los dos campos se recurre a BeautifulSoup.
+    Lanza ValueError si los campos existen pero no contienen números.
+    """
+    valores = _extraer_rapido(html)
+    if not (valores.get('Latitude') and valores.get('Longitude')):
+        valores = _extraer_con_beautifulsoup(html)
+    if not (valores.get('Latitude') and valores.get('Longitude')):
+        return None
+    return float(valores['Latitude']), float(valores['Longitude'])
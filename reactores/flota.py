@@ -0,0 +1,239 @@
+# En reactores/flota.py
+import threading
+
+import numpy as np
+
+from .cache import version_datos
+from .models import HistorialRendimiento, Reactor
+
+# Métricas anuales que se cargan en la matriz: {nombre en la API: campo de HistorialRendimiento}
+METRICAS = {
+    'produccion': 'electricidad_suministrada',
+    'factor_carga': 'factor_carga_anual',
+    'factor_operacion': 'factor_operacion',
+}
+
+# Por qué se puede agrupar la flota: {nombre en la API: campo de Reactor}
+AGRUPACIONES = {
+    'pais': 'pais',
+    'tipo': 'tipo_reactor_categoria',
+}
+
+FUNCIONES = ('media', 'suma')
+MAX_VENTANA = 20
+
+
+def media_movil(matriz, ventana):
+    """
+    Media móvil por filas de los últimos `ventana` años (incluido el propio), sin contar
+    los huecos (NaN). Es NaN donde la ventana no tiene ningún dato.
+    """
+    validos = ~np.isnan(matriz)
+    # Sumas acumuladas con una columna de ceros delante: suma de la ventana = acum[t+1] - acum[t+1-ventana]
+    sumas = np.zeros((matriz.shape[0], matriz.shape[1] + 1))
+    conteos = np.zeros_like(sumas)
+    np.cumsum(np.where(validos, matriz, 0.0), axis=1, out=sumas[:, 1:])
+    np.cumsum(validos, axis=1, out=conteos[:, 1:])
+    desde = np.maximum(np.arange(1, matriz.shape[1] + 1) - ventana, 0)
+    suma = sumas[:, 1:] - sumas[:, desde]
+    conteo = conteos[:, 1:] - conteos[:, desde]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(conteo > 0, suma / conteo, np.nan)
+
+
+def variacion_anual(matriz):
+    """
+    Diferencia de cada año con el anterior, por filas (NaN si falta alguno de los dos).
+    """
+    variacion = np.full_like(matriz, np.nan)
+    variacion[:, 1:] = matriz[:, 1:] - matriz[:, :-1]
+    return variacion
+
+
+class MatrizFlota:
+    """
+    El historial de toda la flota en matrices de NumPy de reactores × años, una por
+    métrica de METRICAS, con NaN donde no hay dato. Las filas siguen el orden de
+    `ids` (ascendente) y las columnas, el de `anos` (todos los años, sin huecos).
+
+    `reactores` son tuplas (id, pais, tipo) y `historial`, tuplas
+    (reactor_id, ano, *valores de METRICAS).
+    """
+
+    def __init__(self, reactores, historial):
+        reactores = sorted(reactores)
+        self.ids = np.array([r[0] for r in reactores], dtype=np.int64)
+
+        # Cada agrupación como códigos enteros por reactor (-1 si no tiene valor) y sus etiquetas
+        self.grupos = {}
+        for posicion, agrupacion in enumerate(AGRUPACIONES, start=1):
+            etiquetas = sorted({r[posicion] for r in reactores if r[posicion] is not None})
+            codigo = {etiqueta: i for i, etiqueta in enumerate(etiquetas)}
+            self.grupos[agrupacion] = (
+                etiquetas, np.array([codigo.get(r[posicion], -1) for r in reactores], dtype=np.int64),
+            )
+
+        # NumPy convierte los None en NaN al crear un array de floats
+        filas = np.array(list(historial), dtype=np.float64).reshape(-1, 2 + len(METRICAS))
+        filas = filas[np.isin(filas[:, 0], self.ids)]
+        if len(filas):
+            self.anos = np.arange(int(filas[:, 1].min()), int(filas[:, 1].max()) + 1)
+        else:
+            self.anos = np.arange(0)
+        fila = np.searchsorted(self.ids, filas[:, 0].astype(np.int64))
+        columna = filas[:, 1].astype(np.int64) - (self.anos[0] if len(self.anos) else 0)
+
+        forma = (len(self.ids), len(self.anos))
+        # Si hay registro de ese año (aunque sus valores sean nulos)
+        self.presente = np.zeros(forma, dtype=bool)
+        self.presente[fila, columna] = True
+        self.valores = {}
+        for i, metrica in enumerate(METRICAS):
+            matriz = np.full(forma, np.nan)
+            matriz[fila, columna] = filas[:, 2 + i]
+            self.valores[metrica] = matriz
+        self._medias_vida = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def posicion(self, reactor_id):
+        """
+        Fila del reactor en las matrices, o None si no está.
+        """
+        i = int(np.searchsorted(self.ids, reactor_id))
+        return i if i < len(self.ids) and self.ids[i] == reactor_id else None
+
+    def columna(self, ano):
+        """
+        Columna del año en las matrices, o None si no hay datos de ese año.
+        """
+        return ano - int(self.anos[0]) if len(self.anos) and self.anos[0] <= ano <= self.anos[-1] else None
+
+    def media_vida(self, metrica):
+        """
+        Media de cada reactor en todos sus años con dato (NaN si no tiene ninguno).
+        """
+        if metrica not in self._medias_vida:
+            matriz = self.valores[metrica]
+            validos = ~np.isnan(matriz)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self._medias_vida[metrica] = np.where(validos, matriz, 0.0).sum(axis=1) / validos.sum(axis=1)
+        return self._medias_vida[metrica]
+
+    def percentil(self, reactor_id, metrica, por='tipo', ano=None):
+        """
+        Rango percentil (0-100) del reactor dentro de su grupo (mismo país o tipo) según
+        la media de toda su vida o, con `ano`, el valor de ese año. Devuelve
+        {'grupo', 'valor', 'percentil', 'posicion', 'total'}; valor y percentil son None
+        si el reactor no tiene dato. Posición 1 es el mejor (valor más alto) del grupo.
+        Devuelve None si el reactor no está en la matriz.
+        """
+        i = self.posicion(reactor_id)
+        if i is None:
+            return None
+        if ano is None:
+            valores = self.media_vida(metrica)
+        else:
+            columna = self.columna(ano)
+            valores = self.valores[metrica][:, columna] if columna is not None else np.full(len(self.ids), np.nan)
+        etiquetas, codigos = self.grupos[por]
+        del_grupo = valores[(codigos == codigos[i]) & ~np.isnan(valores)]
+        grupo = etiquetas[codigos[i]] if codigos[i] >= 0 else None
+
+        valor = valores[i]
+        if np.isnan(valor):
+            return {'grupo': grupo, 'valor': None, 'percentil': None, 'posicion': None, 'total': len(del_grupo)}
+        menores = np.count_nonzero(del_grupo < valor)
+        iguales = np.count_nonzero(del_grupo == valor)
+        return {
+            'grupo': grupo,
+            'valor': round(float(valor), 3),
+            'percentil': round(100 * float(menores + 0.5 * iguales) / len(del_grupo), 2),
+            'posicion': int(np.count_nonzero(del_grupo > valor)) + 1,
+            'total': len(del_grupo),
+        }
+
+    def serie(self, reactor_id, metrica, ventana=3):
+        """
+        Serie anual de un reactor entre su primer y su último año con registro, con su
+        media móvil de `ventana` años y la variación respecto al año anterior.
+        Devuelve None si el reactor no está en la matriz.
+        """
+        i = self.posicion(reactor_id)
+        if i is None:
+            return None
+        con_registro = np.flatnonzero(self.presente[i])
+        if not len(con_registro):
+            return {'anos': [], 'valores': [], 'media_movil': [], 'variacion_anual': []}
+        tramo = slice(con_registro[0], con_registro[-1] + 1)
+        fila = self.valores[metrica][i:i + 1, tramo]
+        return {
+            'anos': self.anos[tramo].tolist(),
+            'valores': a_lista(fila[0], 3),
+            'media_movil': a_lista(media_movil(fila, ventana)[0], 3),
+            'variacion_anual': a_lista(variacion_anual(fila)[0], 3),
+        }
+
+    def agregado(self, metrica, por, funcion='media'):
+        """
+        Agrega la métrica por grupo y año: devuelve (etiquetas, valores, registros), donde
+        `valores` es la matriz grupos × años con la media o la suma (NaN si no hay ningún
+        dato) y `registros`, cuántos reactores del grupo tienen registro ese año.
+        Los reactores sin país o sin tipo no cuentan.
+        """
+        etiquetas, codigos = self.grupos[por]
+        matriz = self.valores[metrica]
+        validos = ~np.isnan(matriz)
+
+        # Matriz grupos × reactores con un 1 en el grupo de cada reactor: sumar por grupo
+        # es un producto de matrices (mucho más rápido que np.add.at)
+        pertenencia = np.zeros((len(etiquetas), len(self.ids)))
+        con_grupo = np.flatnonzero(codigos >= 0)
+        pertenencia[codigos[con_grupo], con_grupo] = 1.0
+        sumas = pertenencia @ np.where(validos, matriz, 0.0)
+        conteos = pertenencia @ validos
+        registros = (pertenencia @ self.presente).astype(np.int64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias = sumas / conteos
+        valores = medias if funcion == 'media' else np.where(conteos > 0, sumas, np.nan)
+        return etiquetas, valores, registros
+
+
+_matriz = (None, None)
+_lock = threading.Lock()
+
+
+def construir_matriz():
+    """
+    Carga todo el historial de la BD en una MatrizFlota (dos consultas).
+    """
+    # Sin ordenar los reactores (MatrizFlota los ordena), así basta leer el índice
+    # (tipo, pais); el historial, en el orden de su índice único (reactor, ano)
+    reactores = Reactor.objects.order_by().values_list('id', *AGRUPACIONES.values())
+    historial = HistorialRendimiento.objects.order_by('reactor_id', 'ano').values_list(
+        'reactor_id', 'ano', *METRICAS.values()
+    )
+    return MatrizFlota(reactores.iterator(chunk_size=5000), historial.iterator(chunk_size=5000))
+
+
+def matriz_flota():
+    """
+    Matriz de la flota del proceso. Se reconstruye cuando cambia la versión de los datos.
+    """
+    global _matriz
+    version = version_datos()
+    if _matriz[0] != version:
+        with _lock:
+            if _matriz[0] != version:
+                _matriz = (version, construir_matriz())
+    return _matriz[1]
+
+
+def a_lista(valores, decimales=None):
+    """
+    Convierte un array en una lista para JSON, con None en lugar de NaN.
+    """
+    if decimales is not None:
+        valores = np.round(valores, decimales)
+    return [None if np.isnan(v) else float(v) for v in valores]
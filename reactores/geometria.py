@@ -0,0 +1,277 @@
+# En reactores/geometria.py
+# Geometría de los países para el mapa del atlas: a partir del GeoJSON original se
+# genera, para cada nivel de zoom, una TopoJSON simplificada y cuantizada en la que
+# cada frontera compartida se guarda una sola vez (como "arco") con coordenadas
+# enteras codificadas como diferencias.
+import gzip
+import hashlib
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # Brotli es opcional: sin él solo se generan los .gz
+    brotli = None
+
+DIRECTORIO_DATOS = Path(__file__).resolve().parent / 'static' / 'reactores' / 'data'
+ORIGEN = DIRECTORIO_DATOS / 'countries.geo.json'
+DIRECTORIO_SALIDA = DIRECTORIO_DATOS / 'mapa'
+MANIFIESTO = DIRECTORIO_SALIDA / 'manifest.json'
+NOMBRE_OBJETO = 'paises'
+
+# (zoom máximo en el que se usa, tolerancia de simplificación en grados, cuantización)
+NIVELES = (
+    (2, 0.25, 5_000),
+    (4, 0.05, 20_000),
+    (18, 0.0, 100_000),
+)
+
+# Codificaciones precomprimidas, en orden de preferencia, con la extensión de su fichero
+CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _poligonos(geometria):
+    if geometria['type'] == 'Polygon':
+        return [geometria['coordinates']]
+    if geometria['type'] == 'MultiPolygon':
+        return geometria['coordinates']
+    return []
+
+
+def _limites(features):
+    xs, ys = [], []
+    for feature in features:
+        for poligono in _poligonos(feature['geometry']):
+            for anillo in poligono:
+                xs.extend(p[0] for p in anillo)
+                ys.extend(p[1] for p in anillo)
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _cuantizar_anillo(anillo, x0, y0, sx, sy):
+    # Cuantiza y quita los puntos repetidos consecutivos y el punto de cierre
+    puntos = []
+    for x, y, *_ in anillo:
+        punto = (round((x - x0) / sx), round((y - y0) / sy))
+        if not puntos or puntos[-1] != punto:
+            puntos.append(punto)
+    while len(puntos) > 1 and puntos[0] == puntos[-1]:
+        puntos.pop()
+    return puntos if len(puntos) >= 3 else None
+
+
+def _uniones(anillos):
+    """
+    Puntos donde se separan las fronteras: los que tienen más de dos vecinos distintos
+    sumando todos los anillos en los que aparecen.
+    """
+    vecinos = {}
+    for anillo in anillos:
+        n = len(anillo)
+        for i, punto in enumerate(anillo):
+            vecinos.setdefault(punto, set()).update((anillo[i - 1], anillo[(i + 1) % n]))
+    return {punto for punto, cercanos in vecinos.items() if len(cercanos) > 2}
+
+
+def _cortar_anillo(anillo, uniones):
+    # Devuelve los tramos del anillo entre uniones (cada uno incluye sus dos extremos)
+    cortes = [i for i, punto in enumerate(anillo) if punto in uniones]
+    if not cortes:
+        # Anillo aislado (isla, enclave): un único arco cerrado empezando en su punto mínimo
+        inicio = anillo.index(min(anillo))
+        rotado = anillo[inicio:] + anillo[:inicio]
+        return [rotado + [rotado[0]]]
+    rotado = anillo[cortes[0]:] + anillo[:cortes[0]]
+    rotado.append(rotado[0])
+    tramos, inicio = [], 0
+    for i in range(1, len(rotado)):
+        if rotado[i] in uniones:
+            tramos.append(rotado[inicio:i + 1])
+            inicio = i
+    return tramos
+
+
+def _simplificar(puntos, tolerancia, sx, sy):
+    """
+    Douglas-Peucker sobre un tramo abierto: conserva los extremos y los puntos que se
+    alejan más de `tolerancia` grados de la recta que une a sus vecinos conservados.
+    """
+    if tolerancia <= 0 or len(puntos) <= 2:
+        return puntos
+    conservar = [False] * len(puntos)
+    conservar[0] = conservar[-1] = True
+    pendientes = [(0, len(puntos) - 1)]
+    while pendientes:
+        a, b = pendientes.pop()
+        (ax, ay), (bx, by) = puntos[a], puntos[b]
+        # Trabajamos en grados para que la tolerancia no dependa de la cuantización
+        dx, dy = (bx - ax) * sx, (by - ay) * sy
+        largo2 = dx * dx + dy * dy
+        peor, indice = 0.0, None
+        for i in range(a + 1, b):
+            px, py = (puntos[i][0] - ax) * sx, (puntos[i][1] - ay) * sy
+            if largo2:
+                cruz = px * dy - py * dx
+                distancia2 = cruz * cruz / largo2
+            else:
+                distancia2 = px * px + py * py
+            if distancia2 > peor:
+                peor, indice = distancia2, i
+        if indice is not None and peor > tolerancia * tolerancia:
+            conservar[indice] = True
+            pendientes.extend(((a, indice), (indice, b)))
+    return [punto for punto, guardar in zip(puntos, conservar) if guardar]
+
+
+def _simplificar_arco(arco, tolerancia, sx, sy):
+    if arco[0] != arco[-1]:
+        return _simplificar(arco, tolerancia, sx, sy)
+    # Arco cerrado: lo partimos en el punto más alejado del inicio y simplificamos cada mitad
+    x0, y0 = arco[0]
+    lejano = max(range(len(arco)), key=lambda i: ((arco[i][0] - x0) * sx) ** 2 + ((arco[i][1] - y0) * sy) ** 2)
+    simplificado = _simplificar(arco[:lejano + 1], tolerancia, sx, sy)[:-1] + _simplificar(arco[lejano:], tolerancia, sx, sy)
+    # Un anillo necesita al menos tres puntos distintos; las islas pequeñas se dejan tal cual
+    return simplificado if len(simplificado) >= 4 else arco
+
+
+def _codificar_delta(arco):
+    codificado, anterior = [], (0, 0)
+    for x, y in arco:
+        codificado.append([x - anterior[0], y - anterior[1]])
+        anterior = (x, y)
+    return codificado
+
+
+def construir_topologia(geojson, tolerancia=0.0, cuantizacion=100_000):
+    """
+    Convierte una FeatureCollection de polígonos en una TopoJSON cuantizada con
+    `cuantizacion` valores por eje y fronteras simplificadas con `tolerancia` grados.
+    Cada frontera compartida se simplifica una sola vez, así que los países vecinos
+    siguen encajando sin huecos a cualquier nivel de detalle.
+    """
+    features = geojson['features']
+    x0, y0, x1, y1 = _limites(features)
+    sx, sy = (x1 - x0) / (cuantizacion - 1), (y1 - y0) / (cuantizacion - 1)
+
+    # 1) Anillos cuantizados de cada polígono (los que colapsan a menos de 3 puntos se descartan)
+    estructura = []
+    for feature in features:
+        poligonos = []
+        for poligono in _poligonos(feature['geometry']):
+            anillos = [_cuantizar_anillo(anillo, x0, y0, sx, sy) for anillo in poligono]
+            if anillos and anillos[0]:
+                poligonos.append([anillo for anillo in anillos if anillo])
+        estructura.append(poligonos)
+
+    # 2) Cortamos los anillos en las uniones y guardamos cada tramo una sola vez
+    uniones = _uniones(anillo for poligonos in estructura for poligono in poligonos for anillo in poligono)
+    arcos, indices = [], {}
+
+    def indice_arco(tramo):
+        clave = tuple(tramo)
+        if clave in indices:
+            return indices[clave]
+        inversa = tuple(reversed(tramo))
+        if inversa in indices:
+            return ~indices[inversa]
+        indices[clave] = len(arcos)
+        arcos.append(tramo)
+        return indices[clave]
+
+    geometrias = []
+    for feature, poligonos in zip(features, estructura):
+        arcos_poligonos = [
+            [[indice_arco(tramo) for tramo in _cortar_anillo(anillo, uniones)] for anillo in poligono]
+            for poligono in poligonos
+        ]
+        geometria = {'id': feature.get('id'), 'properties': feature.get('properties', {})}
+        if not arcos_poligonos:
+            geometria['type'] = None
+        elif len(arcos_poligonos) == 1:
+            geometria.update(type='Polygon', arcs=arcos_poligonos[0])
+        else:
+            geometria.update(type='MultiPolygon', arcs=arcos_poligonos)
+        geometrias.append(geometria)
+
+    # 3) Simplificamos cada arco y lo codificamos como diferencias entre puntos
+    return {
+        'type': 'Topology',
+        'transform': {'scale': [sx, sy], 'translate': [x0, y0]},
+        'objects': {NOMBRE_OBJETO: {'type': 'GeometryCollection', 'geometries': geometrias}},
+        'arcs': [_codificar_delta(_simplificar_arco(arco, tolerancia, sx, sy)) for arco in arcos],
+    }
+
+
+def comprimir(contenido):
+    """
+    Devuelve {codificación: bytes comprimidos} para cada una de CODIFICACIONES disponible.
+    """
+    comprimidos = {'gzip': gzip.compress(contenido, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        comprimidos['br'] = brotli.compress(contenido, quality=11)
+    return comprimidos
+
+
+@lru_cache(maxsize=1)
+def paises_mapa():
+    """
+    Devuelve {id: nombre} de los países de la geometría del mapa. Se omiten los que
+    no tienen un ID propio ('-99' en el GeoJSON original).
+    """
+    with open(ORIGEN, encoding='utf-8') as fichero:
+        features = json.load(fichero)['features']
+    return {
+        feature['id']: feature['properties']['name']
+        for feature in features
+        if feature.get('id') and feature['id'] != '-99'
+    }
+
+
+_ACEPTA_CODIFICACION = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*(?:,|$)')
+
+
+def codificacion_preferida(accept_encoding):
+    """
+    Devuelve la primera de CODIFICACIONES que admite la cabecera Accept-Encoding, o None.
+    """
+    aceptadas = {}
+    for nombre, calidad in _ACEPTA_CODIFICACION.findall(accept_encoding or ''):
+        try:
+            aceptadas[nombre.lower()] = float(calidad) if calidad else 1.0
+        except ValueError:
+            continue
+    for codificacion, _ in CODIFICACIONES:
+        if aceptadas.get(codificacion, aceptadas.get('*', 0)) > 0:
+            return codificacion
+    return None
+
+
+@lru_cache(maxsize=4)
+def _leer_manifiesto(ruta, _mtime):
+    with open(ruta, encoding='utf-8') as fichero:
+        return json.load(fichero)
+
+
+def manifiesto():
+    """
+    Contenido de manifest.json generado por `construir_geometria`, o None si aún no existe.
+    Se vuelve a leer automáticamente cuando el fichero cambia.
+    """
+    try:
+        return _leer_manifiesto(str(MANIFIESTO), MANIFIESTO.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return None
+
+
+def version_geometria():
+    """
+    Huella de los ficheros enumerados en el manifiesto ('' si aún no existe). Cambia cada vez
+    que `construir_geometria` genera ficheros nuevos y borra los anteriores.
+    """
+    datos = manifiesto()
+    if not datos:
+        return ''
+    archivos = ','.join(nivel['archivo'] for nivel in datos['niveles'])
+    return hashlib.sha1(archivos.encode()).hexdigest()[:8]
@@ -0,0 +1,229 @@
+# En reactores/instrumentacion.py
+# Medición de cada petición (consultas SQL, tiempo en la BD, en plantillas y en
+# serializar JSON) y un histograma de latencias por endpoint que se publica en el
+# formato de texto de Prometheus. Lo activa InstrumentacionMiddleware.
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+# Límites (en segundos) de los cubos del histograma de latencias
+CUBOS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Cuantiles que se calculan sobre las últimas VENTANA_CUANTILES peticiones de cada endpoint
+# (_sum y _count del summary, en cambio, son los acumulados desde que arrancó el proceso)
+CUANTILES = (0.5, 0.9, 0.99)
+VENTANA_CUANTILES = 1000
+
+_medicion_actual = ContextVar('medicion_actual', default=None)
+
+
+class Medicion:
+    """
+    Lo que se ha medido durante una petición: consultas y segundos por tramo
+    ('db', 'plantilla', 'json').
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tramos = {}
+
+    def sumar(self, tramo, segundos):
+        self.tramos[tramo] = self.tramos.get(tramo, 0.0) + segundos
+
+    def ejecutar(self, execute, sql, params, many, context):
+        # Con la firma de connection.execute_wrapper: cuenta y cronometra cada consulta
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas += 1
+            self.sumar('db', time.perf_counter() - inicio)
+
+    def duracion(self):
+        return time.perf_counter() - self.inicio
+
+    def server_timing(self):
+        """
+        Valor de la cabecera Server-Timing (duraciones en milisegundos). 'app' es lo
+        que no se ha ido en la BD, las plantillas ni el JSON.
+        """
+        total = self.duracion()
+        consultas = f'{self.consultas} consulta' + ('' if self.consultas == 1 else 's')
+        partes = [f'db;dur={self.tramos.get("db", 0.0) * 1000:.1f};desc="{consultas}"']
+        partes += [
+            f'{tramo};dur={segundos * 1000:.1f}' for tramo, segundos in self.tramos.items() if tramo != 'db'
+        ]
+        partes.append(f'app;dur={max(total - sum(self.tramos.values()), 0.0) * 1000:.1f}')
+        partes.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(partes)
+
+
+@contextmanager
+def medir(medicion):
+    """
+    Hace de `medicion` la medición en curso (la que usan `tramo` y los medidores).
+    """
+    token = _medicion_actual.set(medicion)
+    try:
+        yield medicion
+    finally:
+        _medicion_actual.reset(token)
+
+
+@contextmanager
+def tramo(nombre):
+    """
+    Suma el tiempo del bloque al tramo `nombre` de la petición en curso, si se está midiendo.
+    """
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicion.sumar(nombre, time.perf_counter() - inicio)
+
+
+def _cronometrar(funcion, nombre):
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        with tramo(nombre):
+            return funcion(*args, **kwargs)
+    return envoltura
+
+
+def _ejecutar(execute, sql, params, many, context):
+    # Envoltorio de todas las conexiones: solo mide si hay una medición en curso
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    return medicion.ejecutar(execute, sql, params, many, context)
+
+
+def _envolver_conexion(sender=None, connection=None, **kwargs):
+    if _ejecutar not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_ejecutar)
+
+
+_medidores_instalados = False
+
+
+def instalar_medidores():
+    """
+    Instala los medidores: el de consultas en cada conexión a la BD (el mismo mecanismo
+    que connection.execute_wrapper, pero permanente, porque con vistas asíncronas las
+    consultas se hacen en otros hilos y cada hilo tiene su conexión) y los que cronometran
+    el renderizado de plantillas y la serialización de JsonResponse. Todos leen la
+    medición en curso de una ContextVar, que asgiref copia a esos hilos, y no hacen
+    nada si no la hay. Se puede llamar varias veces.
+    """
+    global _medidores_instalados
+    if _medidores_instalados:
+        return
+    from django.core.serializers.json import DjangoJSONEncoder
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+    from django.template.backends.django import Template
+
+    connection_created.connect(_envolver_conexion)
+    for conexion in connections.all(initialized_only=True):
+        _envolver_conexion(connection=conexion)
+    Template.render = _cronometrar(Template.render, 'plantilla')
+    DjangoJSONEncoder.encode = _cronometrar(DjangoJSONEncoder.encode, 'json')
+    _medidores_instalados = True
+
+
+class _Endpoint:
+    def __init__(self):
+        self.cubos = [0] * len(CUBOS_LATENCIA)
+        self.peticiones = 0
+        self.segundos = 0.0
+        self.consultas = 0
+        self.segundos_db = 0.0
+        self.recientes = deque(maxlen=VENTANA_CUANTILES)
+
+
+class Metricas:
+    """
+    Métricas por endpoint del proceso: histograma acumulado de latencias, consultas y
+    tiempo en la BD, y los cuantiles de las últimas VENTANA_CUANTILES peticiones.
+    Cada proceso del servidor tiene las suyas.
+    """
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, endpoint, segundos, consultas=0, segundos_db=0.0):
+        with self._lock:
+            datos = self._endpoints.setdefault(endpoint, _Endpoint())
+            for i, limite in enumerate(CUBOS_LATENCIA):
+                if segundos <= limite:
+                    datos.cubos[i] += 1
+            datos.peticiones += 1
+            datos.segundos += segundos
+            datos.consultas += consultas
+            datos.segundos_db += segundos_db
+            datos.recientes.append(segundos)
+
+    def vaciar(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def texto_prometheus(self):
+        """
+        Las métricas en el formato de texto de exposición de Prometheus.
+        """
+        with self._lock:
+            endpoints = sorted(
+                (nombre, datos.cubos[:], datos.peticiones, datos.segundos, datos.consultas,
+                 datos.segundos_db, sorted(datos.recientes))
+                for nombre, datos in self._endpoints.items()
+            )
+
+        lineas = [
+            '# HELP atlas_peticion_duracion_segundos Duración de las peticiones por endpoint.',
+            '# TYPE atlas_peticion_duracion_segundos histogram',
+        ]
+        for nombre, cubos, peticiones, segundos, _, _, _ in endpoints:
+            etiqueta = f'endpoint="{_escapar(nombre)}"'
+            for limite, cuenta in zip(CUBOS_LATENCIA, cubos):
+                lineas.append(f'atlas_peticion_duracion_segundos_bucket{{{etiqueta},le="{limite}"}} {cuenta}')
+            lineas.append(f'atlas_peticion_duracion_segundos_bucket{{{etiqueta},le="+Inf"}} {peticiones}')
+            lineas.append(f'atlas_peticion_duracion_segundos_sum{{{etiqueta}}} {segundos:.6f}')
+            lineas.append(f'atlas_peticion_duracion_segundos_count{{{etiqueta}}} {peticiones}')
+
+        lineas += [
+            f'# HELP atlas_peticion_latencia_reciente_segundos Cuantiles de latencia de las últimas {VENTANA_CUANTILES} peticiones por endpoint.',
+            '# TYPE atlas_peticion_latencia_reciente_segundos summary',
+        ]
+        for nombre, _, peticiones, segundos, _, _, recientes in endpoints:
+            etiqueta = f'endpoint="{_escapar(nombre)}"'
+            for cuantil in CUANTILES:
+                valor = recientes[min(len(recientes) - 1, int(cuantil * len(recientes)))]
+                lineas.append(f'atlas_peticion_latencia_reciente_segundos{{{etiqueta},quantile="{cuantil}"}} {valor:.6f}')
+            # Prometheus espera que _sum y _count solo crezcan (rate()): no salen de la ventana
+            lineas.append(f'atlas_peticion_latencia_reciente_segundos_sum{{{etiqueta}}} {segundos:.6f}')
+            lineas.append(f'atlas_peticion_latencia_reciente_segundos_count{{{etiqueta}}} {peticiones}')
+
+        for metrica, descripcion, posicion, formato in (
+            ('atlas_consultas_sql_total', 'Consultas SQL ejecutadas por endpoint.', 4, '{}'),
+            ('atlas_tiempo_bd_segundos_total', 'Segundos en la base de datos por endpoint.', 5, '{:.6f}'),
+        ):
+            lineas += [f'# HELP {metrica} {descripcion}', f'# TYPE {metrica} counter']
+            for datos in endpoints:
+                lineas.append(f'{metrica}{{endpoint="{_escapar(datos[0])}"}} {formato.format(datos[posicion])}')
+        return '\n'.join(lineas) + '\n'
+
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Métricas del proceso que alimenta el middleware y publica la vista de métricas
+metricas = Metricas()
@@ -1,67 +1,66 @@
-import requests
 import time
-from bs4 import BeautifulSoup
 from django.core.management.base import BaseCommand
+from reactores.cache import invalidar_datos
+from reactores.descargas import URL_DETALLE, descargar_coordenadas
 from reactores.models import Reactor
 
 class Command(BaseCommand):
-    help = 'Actualiza latitud y longitud extrayendo los datos de los campos ocultos del HTML.'
+    help = 'Actualiza latitud y longitud extrayendo los datos de los campos ocultos del HTML (descargas en paralelo).'
 
-    def handle(self, *args, **kwargs):
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36',
-            'Referer': 'https://world-nuclear.org/nuclear-reactor-database/'
-        }
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8, help='Descargas simultáneas.')
+        parser.add_argument('--tasa', type=float, default=4.0, help='Máximo de peticiones por segundo entre todos los hilos (0 = sin límite).')
+        parser.add_argument('--intentos', type=int, default=3, help='Intentos por página antes de darla por fallida.')
+        parser.add_argument('--lote', type=int, default=200, help='Reactores por cada bulk_update.')
+        parser.add_argument('--url-base', default=URL_DETALLE, help='URL base de las páginas de detalle (útil para pruebas con un servidor local).')
 
-        reactores_a_actualizar = Reactor.objects.filter(latitud__isnull=True)
-        total = reactores_a_actualizar.count()
+    def handle(self, *args, **options):
+        pendientes = list(Reactor.objects.filter(latitud__isnull=True).values_list('id', 'nombre'))
+        total = len(pendientes)
 
         if total == 0:
             self.stdout.write(self.style.SUCCESS("✅ ¡Todos los reactores ya tienen sus coordenadas!"))
             return
 
         self.stdout.write(self.style.SUCCESS(f"🚀 Iniciando la actualización de coordenadas para {total} reactores..."))
-        
-        for i, reactor in enumerate(reactores_a_actualizar):
-            self.stdout.write(f"({i+1}/{total}) Buscando coordenadas para: {reactor.nombre}...")
-            
-            reactor_name_slug = reactor.nombre.title().replace(' ', '-')
-            detail_page_url = f"https://world-nuclear.org/nuclear-reactor-database/details/{reactor_name_slug}"
 
-            try:
-                # 1. Descargamos el HTML de la página de detalles
-                page_response = requests.get(detail_page_url, headers=headers, timeout=15)
-                if page_response.status_code != 200:
-                    self.stdout.write(self.style.ERROR(f"  -> Error {page_response.status_code} al acceder a la página."))
-                    continue
+        inicio = time.perf_counter()
+        por_guardar = []
+        guardados = 0
+        resultados = descargar_coordenadas(
+            pendientes, url_base=options['url_base'], hilos=options['hilos'],
+            peticiones_por_segundo=options['tasa'], intentos=options['intentos'],
+        )
+        for i, resultado in enumerate(resultados):
+            self.stdout.write(f"({i+1}/{total}) Buscando coordenadas para: {resultado.nombre}...")
 
-                # 2. Analizamos el HTML con BeautifulSoup
-                soup = BeautifulSoup(page_response.content, 'html.parser')
-                
-                # 3. Buscamos los campos <input> por su ID
-                lat_input = soup.find('input', {'id': 'Latitude'})
-                lon_input = soup.find('input', {'id': 'Longitude'})
+            if resultado.estado == 'ok':
+                lat, lon = resultado.coordenadas
+                por_guardar.append(Reactor(id=resultado.reactor_id, latitud=lat, longitud=lon))
+                self.stdout.write(self.style.SUCCESS(f"  -> Coordenadas encontradas: ({lat}, {lon})"))
+            elif resultado.estado == 'sin_coordenadas':
+                self.stdout.write(self.style.WARNING("  -> No se encontraron los campos #Latitude o #Longitude en el HTML."))
+            elif resultado.estado == 'invalidas':
+                self.stdout.write(self.style.ERROR("  -> Se encontraron los campos, pero sus valores no son números válidos."))
+            elif resultado.estado == 'no_encontrado':
+                self.stdout.write(self.style.ERROR(f"  -> {resultado.error} al acceder a la página."))
+            else:
+                self.stdout.write(self.style.ERROR(f"  -> {resultado.error}"))
 
-                # 4. Verificamos que los encontramos y que tienen un valor
-                if lat_input and lon_input and lat_input.get('value') and lon_input.get('value'):
-                    try:
-                        lat = float(lat_input['value'])
-                        lon = float(lon_input['value'])
-                        
-                        reactor.latitud = lat
-                        reactor.longitud = lon
-                        reactor.save(update_fields=['latitud', 'longitud'])
-                        self.stdout.write(self.style.SUCCESS(f"  -> Coordenadas guardadas: ({lat}, {lon})"))
-                    except (ValueError, TypeError):
-                        self.stdout.write(self.style.ERROR("  -> Se encontraron los campos, pero sus valores no son números válidos."))
-                else:
-                    self.stdout.write(self.style.WARNING("  -> No se encontraron los campos #Latitude o #Longitude en el HTML."))
+            # Guardamos por lotes: un UPDATE por bloque en vez de un save() por reactor
+            if len(por_guardar) >= options['lote']:
+                guardados += self.guardar(por_guardar)
+                por_guardar = []
 
-            except requests.exceptions.RequestException as e:
-                self.stdout.write(self.style.ERROR(f"  -> Error de conexión: {e}"))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"  -> Ocurrió un error inesperado: {e}"))
-            
-            time.sleep(0.5)
+        guardados += self.guardar(por_guardar)
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(f"\n⏱️  {total} páginas en {duracion:.1f} s ({total / duracion:.2f} páginas/s), {guardados} reactores actualizados.")
 
-        self.stdout.write(self.style.SUCCESS("\n🎉 ¡Actualización de coordenadas completada!"))
\ No newline at end of file
+        if guardados:
+            # Nueva versión de datos: invalida las cachés y los ETag de las APIs
+            invalidar_datos()
+        self.stdout.write(self.style.SUCCESS("\n🎉 ¡Actualización de coordenadas completada!"))
+
+    def guardar(self, reactores):
+        Reactor.objects.bulk_update(reactores, ['latitud', 'longitud'])
+        return len(reactores)
\ No newline at end of file
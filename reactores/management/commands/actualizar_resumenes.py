@@ -0,0 +1,22 @@
+# En reactores/management/commands/actualizar_resumenes.py
+import time
+from django.core.management.base import BaseCommand
+from reactores.cache import invalidar_datos
+from reactores.resumen import actualizar_resumenes
+
+class Command(BaseCommand):
+    help = 'Recalcula desde el historial el resumen de rendimiento de todos los reactores (o de los indicados).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help='IDs de los reactores a recalcular (por defecto, todos).')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Recalculando resúmenes de rendimiento...")
+        inicio = time.perf_counter()
+        escritos = actualizar_resumenes(options['ids'] or None)
+        # Nueva versión de datos: invalida las cachés y los ETag de las APIs
+        invalidar_datos()
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(f"⏱️  {escritos} resúmenes calculados en {duracion:.2f} s.")
+        self.stdout.write(self.style.SUCCESS("¡Resúmenes actualizados!"))
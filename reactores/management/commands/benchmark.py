@@ -0,0 +1,73 @@
+# En reactores/management/commands/benchmark.py
+import time
+from contextlib import nullcontext
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from reactores.benchmarks import ESCENARIOS
+from reactores.benchmarks.informe import comparar, crear_informe, guardar_informe, leer_informe
+from reactores.benchmarks.sintetico import ANOS_HISTORIAL, ESCALAS, caches_aisladas, datos_temporales, generar_flota
+from reactores.cache import invalidar_datos
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los escenarios de rendimiento y muestra los tiempos medidos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('escenarios', nargs='*', help=f"Escenarios a ejecutar (por defecto todos): {', '.join(sorted(ESCENARIOS))}")
+        parser.add_argument('--repeticiones', type=int, default=20, help='Repeticiones por medición.')
+        parser.add_argument('--escala', choices=list(ESCALAS), help='Añade una flota sintética de ese tamaño (se descarta al terminar).')
+        parser.add_argument('--anos', type=int, default=ANOS_HISTORIAL, help='Años de historial por reactor de la flota sintética.')
+        parser.add_argument('--semilla', type=int, default=0, help='Semilla de la flota sintética (la misma semilla genera los mismos datos).')
+        parser.add_argument('--json', metavar='FICHERO', help='Guarda los resultados en un informe JSON.')
+        parser.add_argument('--comparar', metavar='FICHERO', help='Informe JSON de referencia: falla si alguna métrica empeora más del umbral.')
+        parser.add_argument('--umbral', type=float, default=0.2, help='Empeoramiento tolerado frente a --comparar (0.2 = 20%%).')
+
+    def handle(self, *args, **options):
+        nombres = options['escenarios'] or sorted(ESCENARIOS)
+        desconocidos = [n for n in nombres if n not in ESCENARIOS]
+        if desconocidos:
+            raise CommandError(f"Escenarios desconocidos: {', '.join(desconocidos)}")
+        base = leer_informe(options['comparar']) if options['comparar'] else None
+
+        resultados = {}
+        escala = options['escala']
+        # El cliente de pruebas de Django se presenta como 'testserver'. Sin DEBUG, como en
+        # producción: con DEBUG Django guarda en memoria cada consulta, lo que falsea
+        # los tiempos y los picos de memoria. Las cachés son propias del benchmark: la flota
+        # sintética solo existe en una transacción sin confirmar y lo cacheado a partir de
+        # ella no debe servirse nunca en la web
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], DEBUG=False), caches_aisladas():
+            with datos_temporales() if escala else nullcontext():
+                if escala:
+                    self.stdout.write(f"Generando flota sintética de {ESCALAS[escala]} reactores × {options['anos']} años...")
+                    inicio = time.perf_counter()
+                    registros = generar_flota(ESCALAS[escala], anos=options['anos'], semilla=options['semilla'])
+                    invalidar_datos()
+                    self.stdout.write(f"⏱️  {registros} registros de historial en {time.perf_counter() - inicio:.1f} s.")
+
+                for nombre in nombres:
+                    self.stdout.write(self.style.SUCCESS(f"🚀 Escenario: {nombre}"))
+                    resultado = ESCENARIOS[nombre](repeticiones=options['repeticiones'])
+                    resultados[nombre] = resultado
+                    for metrica, valor in resultado.items():
+                        if isinstance(valor, dict):
+                            valor = '  '.join(f"{k}={v}" for k, v in valor.items())
+                        self.stdout.write(f"  {metrica}: {valor}")
+
+        informe = crear_informe(
+            resultados, escala=escala, anos=options['anos'] if escala else None,
+            semilla=options['semilla'] if escala else None, repeticiones=options['repeticiones'],
+        )
+        if options['json']:
+            guardar_informe(informe, options['json'])
+            self.stdout.write(f"📄 Informe guardado en {options['json']}")
+
+        if base is not None:
+            regresiones = comparar(base, informe, options['umbral'])
+            for metrica, antes, despues in regresiones:
+                self.stdout.write(self.style.ERROR(f"  📉 {metrica}: {antes} → {despues}"))
+            if regresiones:
+                raise CommandError(f"{len(regresiones)} métricas empeoran respecto a {options['comparar']}")
+            self.stdout.write(self.style.SUCCESS(f"¡Sin regresiones respecto a {options['comparar']}!"))
@@ -0,0 +1,71 @@
+# En reactores/management/commands/construir_geometria.py
+import hashlib
+import json
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from reactores.geometria import (
+    CODIFICACIONES, DIRECTORIO_SALIDA, MANIFIESTO, NIVELES, ORIGEN, brotli, comprimir, construir_topologia,
+)
+
+def _tiempo_parseo(contenido, repeticiones=5):
+    # Mediana (ms) de json.loads: orientativo del coste de parseo en el navegador
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        json.loads(contenido)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+class Command(BaseCommand):
+    help = 'Genera la geometría del mapa del atlas simplificada por nivel de zoom (TopoJSON), con nombres con hash y versiones .gz/.br.'
+
+    def describir(self, etiqueta, contenido, comprimidos):
+        tamanos = ', '.join(f"{codificacion}: {len(datos) / 1024:.1f} KB" for codificacion, datos in comprimidos.items())
+        self.stdout.write(
+            f"  {etiqueta}: {len(contenido) / 1024:.1f} KB ({tamanos}), parseo {_tiempo_parseo(contenido):.1f} ms"
+        )
+
+    def handle(self, *args, **options):
+        if brotli is None:
+            self.stdout.write(self.style.WARNING("⚠️  El paquete 'Brotli' no está instalado: solo se generarán los .gz."))
+
+        original = ORIGEN.read_bytes()
+        geojson = json.loads(original)
+        self.stdout.write(self.style.SUCCESS(f"🚀 Generando geometría a partir de {ORIGEN.name}..."))
+        self.stdout.write("\n📦 Antes:")
+        self.describir(ORIGEN.name, original, comprimir(original))
+
+        DIRECTORIO_SALIDA.mkdir(parents=True, exist_ok=True)
+        self.stdout.write("\n📦 Después:")
+        niveles, generados = [], {MANIFIESTO.name}
+        for zoom_max, tolerancia, cuantizacion in NIVELES:
+            topologia = construir_topologia(geojson, tolerancia, cuantizacion)
+            contenido = json.dumps(topologia, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+            huella = hashlib.sha256(contenido).hexdigest()[:10]
+            archivo = f'paises-z{zoom_max}.{huella}.topo.json'
+            comprimidos = comprimir(contenido)
+
+            (DIRECTORIO_SALIDA / archivo).write_bytes(contenido)
+            generados.add(archivo)
+            for codificacion, extension in CODIFICACIONES:
+                if codificacion in comprimidos:
+                    (DIRECTORIO_SALIDA / (archivo + extension)).write_bytes(comprimidos[codificacion])
+                    generados.add(archivo + extension)
+
+            niveles.append({
+                'zoom_max': zoom_max,
+                'archivo': archivo,
+                'bytes': len(contenido),
+                **{codificacion: len(datos) for codificacion, datos in comprimidos.items()},
+            })
+            self.describir(f"zoom <= {zoom_max:<2} {archivo}", contenido, comprimidos)
+
+        MANIFIESTO.write_text(json.dumps({'origen': ORIGEN.name, 'niveles': niveles}, indent=2) + '\n', encoding='utf-8')
+
+        # Borramos las versiones anteriores (sus nombres llevan otro hash)
+        for fichero in DIRECTORIO_SALIDA.iterdir():
+            if fichero.name not in generados:
+                fichero.unlink()
+
+        self.stdout.write(self.style.SUCCESS(f"\n✅ Geometría generada en {DIRECTORIO_SALIDA} ({len(niveles)} niveles)."))
@@ -0,0 +1,56 @@
+# En reactores/management/commands/exportar_historial.py
+import time
+from django.core.management.base import BaseCommand, CommandError
+from reactores.exportacion import FORMATOS, TAMANO_BLOQUE, exportar, filas_exportacion
+
+try:
+    import resource
+except ImportError:  # No existe en Windows: allí no se informa del pico de memoria
+    resource = None
+
+class Command(BaseCommand):
+    help = 'Exporta el historial de rendimiento de los reactores (una fila por reactor y año) a un fichero.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('salida', help='Fichero de salida.')
+        parser.add_argument('--formato', choices=list(FORMATOS), default='csv', help='Formato del fichero (parquet y arrow necesitan pyarrow).')
+        parser.add_argument('--pais', help='Solo los reactores de este país.')
+        parser.add_argument('--tipo', help='Solo los reactores de esta categoría de tipo (PWR, BWR...).')
+        parser.add_argument('--desde', type=int, help='Primer año exportado.')
+        parser.add_argument('--hasta', type=int, help='Último año exportado.')
+        parser.add_argument('--lote', type=int, default=TAMANO_BLOQUE, help='Filas por lectura de la BD y por bloque escrito.')
+
+    def handle(self, *args, **options):
+        filas = filas_exportacion(
+            options['pais'], options['tipo'], options['desde'], options['hasta'], tamano_bloque=options['lote'],
+        )
+        contador = [0]
+
+        def contar(filas):
+            for fila in filas:
+                contador[0] += 1
+                yield fila
+
+        try:
+            contenido = exportar(contar(filas), options['formato'], options['lote'])
+        except ValueError as error:
+            raise CommandError(error)
+
+        self.stdout.write(f"Exportando historial en {options['formato']} a {options['salida']}...")
+        inicio = time.perf_counter()
+        escritos = 0
+        with open(options['salida'], 'wb') as fichero:
+            for trozo in contenido:
+                fichero.write(trozo)
+                escritos += len(trozo)
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(
+            f"⏱️  {contador[0]} filas ({escritos / 1e6:.1f} MB) en {duracion:.2f} s "
+            f"({contador[0] / max(duracion, 1e-9):,.0f} filas/s)."
+        )
+        if resource is not None:
+            # ru_maxrss viene en KB en Linux
+            pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.stdout.write(f"🧠 Pico de memoria del proceso: {pico / 1024:.0f} MB.")
+        self.stdout.write(self.style.SUCCESS("¡Exportación completada!"))
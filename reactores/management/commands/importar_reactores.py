@@ -1,72 +1,120 @@
 # En reactores/management/commands/importar_reactores.py
-import requests
 import time
+from datetime import date, datetime, timedelta
 from django.core.management.base import BaseCommand
-from reactores.models import Reactor, HistorialRendimiento
+from django.utils import timezone
+from reactores.cache import invalidar_datos
+from reactores.descargas import URL_HISTORIAL, cabeceras_condicionales, descargar_historiales
+from reactores.escritura import EscritorHistorial
+from reactores.models import EstadoImportacion, Reactor
+
+# Los reactores que dieron 404 no se vuelven a pedir hasta pasados estos días (salvo con --force)
+DIAS_SIN_HISTORIAL = 30
 
 class Command(BaseCommand):
-    help = 'Extrae la lista de reactores y su historial con lógica de reintentos para fallos de red.'
+    help = 'Extrae la lista de reactores y su historial de forma incremental: solo descarga y escribe lo que cambió.'
 
-    def handle(self, *args, **kwargs):
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36',
-            'Accept': 'application/json, text/javascript, */*; q=0.01',
-            'X-Requested-With': 'XMLHttpRequest',
-            'Referer': 'https://world-nuclear.org/nuclear-reactor-database/search/'
-        }
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8, help='Descargas simultáneas del historial.')
+        parser.add_argument('--tasa', type=float, default=4.0, help='Máximo de peticiones por segundo entre todos los hilos (0 = sin límite).')
+        parser.add_argument('--intentos', type=int, default=3, help='Intentos por reactor antes de darlo por fallido.')
+        parser.add_argument('--espera-base', type=float, default=1.0, help='Segundos base del backoff exponencial entre reintentos.')
+        parser.add_argument('--lote', type=int, default=1000, help='Registros de historial por escritura en bloque.')
+        parser.add_argument('--sin-copy', action='store_true', help='No usar COPY en PostgreSQL (solo INSERT ... ON CONFLICT).')
+        parser.add_argument('--since', type=date.fromisoformat, metavar='AAAA-MM-DD', help='Solo revisa los reactores que no se han comprobado desde esa fecha.')
+        parser.add_argument('--force', action='store_true', help='Ignora ETag y hash guardados: vuelve a descargar y comparar todo, también los reactores sin historial (solo se escriben los años que cambiaron).')
+        parser.add_argument('--dry-run', action='store_true', help='Descarga y compara, pero no escribe nada en la base de datos.')
+        parser.add_argument('--url-base', default=URL_HISTORIAL, help='URL base de las gráficas de historial (útil para pruebas con un servidor local).')
 
+    def handle(self, *args, **options):
         # --- FASE 1 (sin cambios) ---
         self.stdout.write(self.style.SUCCESS("🚀 Fase 1: Obteniendo la lista completa de reactores..."))
         # ... (la lógica de la fase 1 se queda exactamente igual)
         
-        # --- FASE 2 MEJORADA CON REINTENTOS ---
+        # --- FASE 2: DESCARGA INCREMENTAL EN PARALELO (ETag / HASH DEL CONTENIDO) ---
         self.stdout.write(self.style.SUCCESS("\n🚀 Fase 2: Obteniendo historial de rendimiento..."))
-        
-        all_reactors = Reactor.objects.all()
-        for i, reactor in enumerate(all_reactors):
-            # Si ya tenemos historial para este reactor, lo saltamos para ir más rápido
-            if reactor.historial.exists():
-                continue
 
-            self.stdout.write(f"({i+1}/{len(all_reactors)}) Procesando: {reactor.nombre}...")
-            
-            reactor_name_formatted = reactor.nombre.replace(' ', '%20')
-            history_url = f"https://world-nuclear.org/charts/{reactor_name_formatted}"
-            
-            # --- LÓGICA DE REINTENTOS ---
-            success = False
-            for attempt in range(3): # Intentará hasta 3 veces
-                try:
-                    history_response = requests.get(history_url, headers=headers, timeout=20)
-                    
-                    if history_response.status_code == 200:
-                        history_data = history_response.json()
-                        for record in history_data:
-                            HistorialRendimiento.objects.update_or_create(
-                                reactor=reactor,
-                                ano=record.get('Year'),
-                                defaults={ 'electricidad_suministrada': record.get('ElectricitySupplied'), 'potencia_referencia': record.get('ReferenceUnitPower'), 'tiempo_en_linea_anual': record.get('AnnualTimeOnLine'), 'factor_operacion': record.get('OperationFactor'), 'factor_carga_anual': record.get('LoadFactorAnnual'), }
-                            )
-                        self.stdout.write(self.style.SUCCESS(f"  -> Se guardaron {len(history_data)} registros del historial."))
-                        success = True
-                        break # Si tiene éxito, salimos del bucle de reintentos
-                    
-                    elif history_response.status_code == 404:
-                        self.stdout.write(self.style.WARNING(f"  -> No se encontró historial (404)."))
-                        success = True
-                        break # Es un 404, no tiene sentido reintentar
+        forzar = options['force']
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("Modo --dry-run: no se escribirá nada en la base de datos."))
 
-                    else:
-                         self.stdout.write(self.style.ERROR(f"  -> Error {history_response.status_code}. Reintentando..."))
+        reactores = Reactor.objects.all()
+        if options['since']:
+            desde = timezone.make_aware(datetime.combine(options['since'], datetime.min.time()))
+            reactores = reactores.exclude(estado_importacion__fecha_comprobacion__gte=desde)
+        if not forzar:
+            reactores = reactores.exclude(
+                estado_importacion__hash_contenido=EstadoImportacion.SIN_HISTORIAL,
+                estado_importacion__fecha_comprobacion__gte=timezone.now() - timedelta(days=DIAS_SIN_HISTORIAL),
+            )
+        pendientes = list(reactores.values_list('id', 'nombre'))
+        total = len(pendientes)
+
+        # Lo que sabemos de la última descarga de cada reactor (una sola consulta)
+        estados = {e.reactor_id: e for e in EstadoImportacion.objects.all()}
+        condiciones = {} if forzar else {
+            reactor_id: cabeceras_condicionales(estado.etag, estado.last_modified)
+            for reactor_id, estado in estados.items()
+        }
+        self.stdout.write(f"{total} reactores a revisar ({len(estados)} con estado de importación previo).")
 
-                except requests.exceptions.RequestException as e:
-                    self.stdout.write(self.style.ERROR(f"  -> Error de conexión: {e}. Reintentando en 5 segundos..."))
-                
-                time.sleep(5) # Espera 5 segundos antes del siguiente intento
+        inicio = time.perf_counter()
+        peticiones = 0
+        fallidos = 0
+        sin_cambios = 0
+        resultados = descargar_historiales(
+            pendientes, url_base=options['url_base'], hilos=options['hilos'],
+            peticiones_por_segundo=options['tasa'], intentos=options['intentos'],
+            espera_base=options['espera_base'], condiciones=condiciones,
+        )
+        # Los registros se acumulan y se guardan por lotes (upsert) en lugar de uno a uno
+        escritor = EscritorHistorial(tamano_lote=options['lote'], usar_copy=not options['sin_copy'], simular=options['dry_run'])
+        with escritor:
+            for i, resultado in enumerate(resultados):
+                peticiones += resultado.intentos
+                self.stdout.write(f"({i+1}/{total}) Procesando: {resultado.nombre}...")
+                anterior = estados.get(resultado.reactor_id)
 
-            if not success:
-                self.stdout.write(self.style.ERROR(f"  -> FALLO DEFINITIVO para {reactor.nombre} después de 3 intentos."))
+                if resultado.estado == 'no_modificado' or (
+                    resultado.estado == 'ok' and not forzar and anterior and anterior.hash_contenido == resultado.hash
+                ):
+                    # Mismo contenido que la última vez: no hay nada que escribir
+                    sin_cambios += 1
+                    estado = None
+                    if resultado.estado == 'ok' and (resultado.etag, resultado.last_modified) != (anterior.etag, anterior.last_modified):
+                        # Sin guardar el ETag nuevo, las próximas peticiones nunca recibirían un 304
+                        estado = {'etag': resultado.etag, 'last_modified': resultado.last_modified, 'hash_contenido': resultado.hash}
+                    escritor.registrar_comprobacion(resultado.reactor_id, estado)
+                    self.stdout.write("  -> Sin cambios desde la última importación.")
+                elif resultado.estado == 'ok':
+                    escritor.agregar(resultado.reactor_id, resultado.datos, estado={
+                        'etag': resultado.etag,
+                        'last_modified': resultado.last_modified,
+                        'hash_contenido': resultado.hash,
+                    })
+                    self.stdout.write(self.style.SUCCESS(f"  -> Se recibieron {len(resultado.datos)} registros del historial."))
+                elif resultado.estado == 'sin_historial':
+                    # Queda anotado para no volver a pedirlo en DIAS_SIN_HISTORIAL (el historial no se toca)
+                    escritor.registrar_comprobacion(resultado.reactor_id, {
+                        'etag': '', 'last_modified': '', 'hash_contenido': EstadoImportacion.SIN_HISTORIAL,
+                    })
+                    self.stdout.write(self.style.WARNING(f"  -> No se encontró historial (404)."))
+                else:
+                    fallidos += 1
+                    self.stdout.write(self.style.ERROR(f"  -> FALLO DEFINITIVO para {resultado.nombre} después de {resultado.intentos} intentos ({resultado.error})."))
 
-            time.sleep(0.5)
+        duracion = time.perf_counter() - inicio
+        if total:
+            self.stdout.write(
+                f"\n⏱️  {total} reactores y {peticiones} peticiones en {duracion:.1f} s "
+                f"({total / duracion:.2f} reactores/s, {sin_cambios} sin cambios, {fallidos} fallidos)."
+            )
+        self.stdout.write(
+            f"💾 Historial: {escritor.insertados} insertados, {escritor.actualizados} actualizados, "
+            f"{escritor.sin_cambios} sin cambios."
+        )
 
+        if (escritor.insertados or escritor.actualizados) and not options['dry_run']:
+            # Nueva versión de datos: invalida las cachés y los ETag de las APIs
+            invalidar_datos()
         self.stdout.write(self.style.SUCCESS("\n🎉 ¡Proceso de importación completado!"))
\ No newline at end of file
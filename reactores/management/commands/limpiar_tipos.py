@@ -1,37 +1,43 @@
 # En reactores/management/commands/limpiar_tipos.py
+import time
 from django.core.management.base import BaseCommand
+from reactores.cache import invalidar_datos
+from reactores.clasificacion import clasificar_tipo
 from reactores.models import Reactor
 
 class Command(BaseCommand):
     help = 'Limpia y estandariza el campo de tipo de reactor en categorías simples, leyendo desde el campo "modelo".'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=2000, help='Filas por lectura y por cada UPDATE.')
+
+    def handle(self, *args, **options):
         self.stdout.write("Iniciando limpieza de tipos de reactores...")
-        reactores = Reactor.objects.all()
+        inicio = time.perf_counter()
+        lote = options['lote']
+
+        # Solo leemos las tres columnas necesarias, en bloques, sin crear modelos completos
+        filas = Reactor.objects.values_list('id', 'modelo', 'tipo_reactor_categoria').iterator(chunk_size=lote)
+        cambios = {}
+        revisados = 0
+        for reactor_id, modelo, categoria_actual in filas:
+            revisados += 1
+            categoria = clasificar_tipo(modelo)
+            if categoria and categoria_actual != categoria:
+                cambios.setdefault(categoria, []).append(reactor_id)
+
+        # Como solo hay seis categorías, agrupamos por categoría y escribimos solo esa
+        # columna con un UPDATE ... WHERE id IN (...) por lote (mucho más barato que
+        # bulk_update, que genera un CASE WHEN por fila).
         actualizados = 0
+        for categoria, ids in cambios.items():
+            for i in range(0, len(ids), lote):
+                actualizados += Reactor.objects.filter(id__in=ids[i:i + lote]).update(tipo_reactor_categoria=categoria)
 
-        for reactor in reactores:
-            # --- CORRECCIÓN: Leemos desde reactor.modelo ---
-            texto_fuente = reactor.modelo or ""
-            categoria = None
+        if actualizados:
+            # Nueva versión de datos: invalida las cachés y los ETag de las APIs
+            invalidar_datos()
 
-            # Lógica para asignar categorías basadas en palabras clave
-            if "PWR" in texto_fuente.upper() or "PRESSURIZED" in texto_fuente.upper():
-                categoria = "PWR"
-            elif "BWR" in texto_fuente.upper() or "BOILING" in texto_fuente.upper():
-                categoria = "BWR"
-            elif "PHWR" in texto_fuente.upper() or "CANDU" in texto_fuente.upper():
-                categoria = "PHWR"
-            elif "GCR" in texto_fuente.upper() or "GAS" in texto_fuente.upper() or "AGR" in texto_fuente.upper():
-                categoria = "GCR"
-            elif "LWGR" in texto_fuente.upper() or "RBMK" in texto_fuente.upper():
-                categoria = "LWGR"
-            elif "FBR" in texto_fuente.upper() or "FAST" in texto_fuente.upper():
-                categoria = "FBR"
-            
-            if categoria and reactor.tipo_reactor_categoria != categoria:
-                reactor.tipo_reactor_categoria = categoria
-                reactor.save()
-                actualizados += 1
-        
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(f"⏱️  {revisados} reactores revisados en {duracion:.2f} s.")
         self.stdout.write(self.style.SUCCESS(f"¡Limpieza completada! Se actualizaron {actualizados} reactores."))
\ No newline at end of file
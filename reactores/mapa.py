@@ -0,0 +1,96 @@
+# En reactores/mapa.py
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Q, Sum
+
+from .cache import acachear, cachear
+from .geometria import paises_mapa
+from .models import AliasPais, Reactor
+
+ESTADO_OPERATIVO = 'Operational'
+ESTADO_PARADO = 'Permanent Shutdown'
+
+# Orden de los valores de cada país en la respuesta de api_datos_mapa
+CAMPOS_MAPA = ['pais', 'reactores', 'mwe', 'operativos', 'parados']
+
+
+def calcular_indice_paises():
+    """
+    Resuelve cada país de la BD al ID de su país en el mapa: primero con la tabla
+    de alias (editable en el admin) y si no, por nombre sin distinguir mayúsculas.
+    Devuelve {nombre en la BD: id del mapa}; los países sin correspondencia no aparecen.
+    """
+    ids_por_nombre = {nombre.casefold(): id_mapa for id_mapa, nombre in paises_mapa().items()}
+    alias = dict(AliasPais.objects.values_list('nombre_bd', 'id_mapa'))
+    indice = {}
+    for pais in Reactor.objects.exclude(pais__isnull=True).values_list('pais', flat=True).distinct().order_by('pais'):
+        id_mapa = alias.get(pais) or ids_por_nombre.get(pais.casefold())
+        if id_mapa:
+            indice[pais] = id_mapa
+    return indice
+
+
+def indice_paises():
+    """
+    Índice {nombre en la BD: id del mapa}, cacheado hasta que cambian los datos o los alias.
+    """
+    return cachear('indice_paises', calcular_indice_paises)
+
+
+def _consulta_mapa():
+    return (
+        Reactor.objects.exclude(pais__isnull=True).values('pais')
+        .annotate(
+            reactores=Count('id'),
+            mwe=Sum('potencia_neta'),
+            operativos=Count('id', filter=Q(status=ESTADO_OPERATIVO)),
+            parados=Count('id', filter=Q(status=ESTADO_PARADO)),
+        )
+        .order_by('-reactores', 'pais')
+    )
+
+
+def _indexar(filas, indice):
+    paises, sin_mapa = {}, []
+    for fila in filas:
+        id_mapa = indice.get(fila['pais'])
+        if id_mapa is None:
+            sin_mapa.append(fila['pais'])
+            continue
+        valores = [fila['pais'], fila['reactores'], fila['mwe'] or 0, fila['operativos'], fila['parados']]
+        if id_mapa in paises:
+            # Varios nombres de la BD para el mismo país del mapa: se suman
+            # (se conserva el nombre con más reactores, que llega primero)
+            anteriores = paises[id_mapa]
+            valores = [anteriores[0], *(a + b for a, b in zip(anteriores[1:], valores[1:]))]
+        paises[id_mapa] = valores
+
+    return {'campos': CAMPOS_MAPA, 'paises': paises, 'sin_mapa': sin_mapa}
+
+
+def calcular_datos_mapa():
+    """
+    Agrega los reactores por país con una sola consulta y los indexa por el ID del mapa:
+    {"campos": CAMPOS_MAPA, "paises": {id: [valores...]}, "sin_mapa": [países sin ID]}.
+    """
+    return _indexar(_consulta_mapa(), indice_paises())
+
+
+def datos_mapa():
+    """
+    Devuelve los datos del mapa del atlas desde la caché (se recalculan al cambiar los datos).
+    """
+    return cachear('mapa', calcular_datos_mapa)
+
+
+async def _acalcular_datos_mapa():
+    # El agregado por país y luego el índice de países (con sus propias consultas si no
+    # está en caché): el ORM asíncrono ejecuta las consultas una tras otra en el mismo hilo
+    filas = [fila async for fila in _consulta_mapa()]
+    return _indexar(filas, await sync_to_async(indice_paises)())
+
+
+async def adatos_mapa():
+    """
+    Versión asíncrona de datos_mapa() para las vistas asíncronas.
+    """
+    return await acachear('mapa', _acalcular_datos_mapa)
@@ -0,0 +1,88 @@
+# En reactores/middleware.py
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .instrumentacion import Medicion, instalar_medidores, medir, metricas
+
+logger = logging.getLogger(__name__)
+
+_FIN = object()
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide cada petición: cuenta y cronometra las consultas SQL, el renderizado de
+    plantillas y la serialización a JSON (ver instrumentacion.instalar_medidores). Lo
+    envía al navegador en la cabecera Server-Timing, lo acumula por endpoint en las
+    métricas de Prometheus y registra en JSON las peticiones que superan
+    UMBRAL_PETICION_LENTA_MS. Funciona con WSGI y con ASGI (vistas asíncronas).
+
+    En las respuestas en streaming la cabecera solo cubre hasta el primer byte, pero las
+    métricas y el registro de peticiones lentas esperan a que termine el contenido.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.umbral_lento = getattr(settings, 'UMBRAL_PETICION_LENTA_MS', 500) / 1000
+        instalar_medidores()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion = Medicion()
+        with medir(medicion):
+            respuesta = self.get_response(request)
+        return self._terminar(medicion, request, respuesta)
+
+    async def __acall__(self, request):
+        medicion = Medicion()
+        with medir(medicion):
+            respuesta = await self.get_response(request)
+        return self._terminar(medicion, request, respuesta)
+
+    def _terminar(self, medicion, request, respuesta):
+        respuesta['Server-Timing'] = ', '.join(filter(None, [respuesta.get('Server-Timing'), medicion.server_timing()]))
+        if respuesta.streaming and not respuesta.is_async:
+            respuesta.streaming_content = self._streaming_medido(respuesta.streaming_content, medicion, request, respuesta)
+        else:
+            self._registrar(medicion, request, respuesta)
+        return respuesta
+
+    def _streaming_medido(self, contenido, medicion, request, respuesta):
+        # Las consultas que se hacen mientras se genera el contenido también cuentan
+        iterador = iter(contenido)
+        try:
+            while True:
+                with medir(medicion):
+                    trozo = next(iterador, _FIN)
+                if trozo is _FIN:
+                    break
+                yield trozo
+        finally:
+            self._registrar(medicion, request, respuesta)
+
+    def _registrar(self, medicion, request, respuesta):
+        duracion = medicion.duracion()
+        # El nombre de la ruta, no la URL: las métricas no crecen con cada id o país
+        endpoint = request.resolver_match.view_name if request.resolver_match else 'sin_ruta'
+        metricas.registrar(endpoint, duracion, medicion.consultas, medicion.tramos.get('db', 0.0))
+
+        if duracion >= self.umbral_lento:
+            logger.warning(json.dumps({
+                'evento': 'peticion_lenta',
+                'metodo': request.method,
+                'ruta': request.path,
+                'endpoint': endpoint,
+                'estado': respuesta.status_code,
+                'duracion_ms': round(duracion * 1000, 1),
+                'consultas': medicion.consultas,
+                **{f'{tramo}_ms': round(segundos * 1000, 1) for tramo, segundos in medicion.tramos.items()},
+            }, ensure_ascii=False))
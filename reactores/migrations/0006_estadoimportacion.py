@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reactores', '0005_reactor_latitud_reactor_longitud'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadoImportacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etag', models.CharField(blank=True, default='', max_length=255)),
+                ('last_modified', models.CharField(blank=True, default='', max_length=64)),
+                ('hash_contenido', models.CharField(blank=True, default='', max_length=64, verbose_name='Hash SHA-256 del contenido')),
+                ('fecha_comprobacion', models.DateTimeField(blank=True, null=True, verbose_name='Última comprobación')),
+                ('fecha_cambio', models.DateTimeField(blank=True, null=True, verbose_name='Último cambio detectado')),
+                ('reactor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='estado_importacion', to='reactores.reactor')),
+            ],
+            options={
+                'verbose_name': 'Estado de importación',
+                'verbose_name_plural': 'Estados de importación',
+            },
+        ),
+    ]
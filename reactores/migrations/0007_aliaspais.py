@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:08
+
+from django.db import migrations, models
+
+
+# Alias que antes estaba fijo en el código de api_datos_mapa
+ALIAS_INICIALES = {
+    'United States Of America': 'USA',
+}
+
+
+def crear_alias_iniciales(apps, schema_editor):
+    AliasPais = apps.get_model('reactores', 'AliasPais')
+    for nombre_bd, id_mapa in ALIAS_INICIALES.items():
+        AliasPais.objects.get_or_create(nombre_bd=nombre_bd, defaults={'id_mapa': id_mapa})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reactores', '0006_estadoimportacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AliasPais',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre_bd', models.CharField(max_length=100, unique=True, verbose_name='Nombre en la BD')),
+                ('id_mapa', models.CharField(help_text="Código del país en la geometría del mapa (ISO 3166-1 alfa-3, p. ej. 'USA').", max_length=10, verbose_name='ID en el mapa')),
+            ],
+            options={
+                'verbose_name': 'Alias de país',
+                'verbose_name_plural': 'Alias de países',
+                'ordering': ['nombre_bd'],
+            },
+        ),
+        migrations.RunPython(crear_alias_iniciales, migrations.RunPython.noop),
+    ]
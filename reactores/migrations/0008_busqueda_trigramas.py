@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Campos de reactores/busqueda.py que llevan índice de trigramas
+CAMPOS = ['nombre', 'nombre_alternativo', 'operador', 'dueño', 'modelo']
+
+
+def crear_indices(apps, schema_editor):
+    # pg_trgm y sus índices GIN solo existen en PostgreSQL; en otras bases de datos la
+    # búsqueda usa el índice en memoria. (No usamos django.contrib.postgres para que la
+    # migración no necesite psycopg instalado fuera de PostgreSQL.)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    tabla = schema_editor.quote_name(apps.get_model('reactores', 'Reactor')._meta.db_table)
+    for i, campo in enumerate(CAMPOS):
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS reactor_busqueda_trgm_{i} '
+            f'ON {tabla} USING gin ({schema_editor.quote_name(campo)} gin_trgm_ops)'
+        )
+
+
+def borrar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for i, _ in enumerate(CAMPOS):
+        schema_editor.execute(f'DROP INDEX IF EXISTS reactor_busqueda_trgm_{i}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reactores', '0007_aliaspais'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, borrar_indices),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:17
+
+from django.db import migrations, models
+
+# Columnas que leen el detalle de un reactor y la analítica por tipo y año
+COLUMNAS_HISTORIAL = [
+    'electricidad_suministrada', 'potencia_referencia', 'tiempo_en_linea_anual',
+    'factor_operacion', 'factor_carga_anual',
+]
+
+
+def crear_indice_historial(apps, schema_editor):
+    # Índice (reactor_id, ano) que además incluye las columnas de rendimiento, para que
+    # el historial se lea solo del índice (index-only scan). INCLUDE solo existe en
+    # PostgreSQL; en las demás bases de datos basta el índice único de (reactor, ano).
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    tabla = schema_editor.quote_name(apps.get_model('reactores', 'HistorialRendimiento')._meta.db_table)
+    incluidas = ', '.join(schema_editor.quote_name(columna) for columna in COLUMNAS_HISTORIAL)
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS historial_reactor_ano_cubre '
+        f'ON {tabla} (reactor_id, ano) INCLUDE ({incluidas})'
+    )
+
+
+def borrar_indice_historial(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS historial_reactor_ano_cubre')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reactores', '0008_busqueda_trigramas'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reactor',
+            name='tipo_reactor_categoria',
+            field=models.CharField(blank=True, max_length=20, null=True, verbose_name='Categoría de Tipo'),
+        ),
+        migrations.AddIndex(
+            model_name='reactor',
+            index=models.Index(fields=['pais', 'nombre'], name='reactor_pais_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reactor',
+            index=models.Index(fields=['tipo_reactor_categoria', 'pais'], name='reactor_tipo_pais_idx'),
+        ),
+        migrations.RunPython(crear_indice_historial, borrar_indice_historial),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:20
+
+import calendar
+import django.db.models.deletion
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import migrations, models
+
+
+# Copia de reactores/resumen.py tal como estaba al crear la migración: una migración
+# no debe importar código de la app, que puede cambiar después
+COLUMNAS_HISTORIAL = ('ano', 'electricidad_suministrada', 'potencia_referencia', 'factor_carga_anual')
+
+
+def resumir(registros):
+    registros = list(registros)
+    producida = referencia = 0.0
+    factores = []
+    for ano, electricidad, potencia, factor in registros:
+        if electricidad is not None and potencia:
+            producida += electricidad
+            referencia += potencia * (8784 if calendar.isleap(ano) else 8760) / 1000
+        if factor is not None:
+            factores.append((factor, ano))
+
+    if referencia:
+        factor_carga_vida = round(100 * producida / referencia, 2)
+    elif factores:
+        factor_carga_vida = round(sum(f for f, _ in factores) / len(factores), 2)
+    else:
+        factor_carga_vida = None
+    mejor = max(factores, default=(None, None))
+    peor = min(factores, default=(None, None))
+
+    return {
+        'anos_reportados': len(registros),
+        'primer_ano': registros[0][0] if registros else None,
+        'ultimo_ano': registros[-1][0] if registros else None,
+        'produccion_ultimo_ano': registros[-1][1] if registros else None,
+        'factor_carga_vida': factor_carga_vida,
+        'mejor_ano': mejor[1],
+        'mejor_factor_carga': mejor[0],
+        'peor_ano': peor[1],
+        'peor_factor_carga': peor[0],
+        'twh_acumulados': round(sum(r[1] or 0 for r in registros) / 1000, 3),
+    }
+
+
+def calcular_resumenes(apps, schema_editor):
+    # Rellena los resúmenes a partir del historial que ya existe; a partir de aquí
+    # los mantiene reactores/resumen.py
+    HistorialRendimiento = apps.get_model('reactores', 'HistorialRendimiento')
+    ResumenRendimiento = apps.get_model('reactores', 'ResumenRendimiento')
+    filas = HistorialRendimiento.objects.order_by('reactor_id', 'ano').values_list(
+        'reactor_id', *COLUMNAS_HISTORIAL
+    ).iterator(chunk_size=5000)
+    ResumenRendimiento.objects.bulk_create(
+        [
+            ResumenRendimiento(reactor_id=reactor_id, **resumir(fila[1:] for fila in grupo))
+            for reactor_id, grupo in groupby(filas, key=itemgetter(0))
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reactores', '0009_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenRendimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anos_reportados', models.IntegerField(default=0, verbose_name='Años reportados')),
+                ('primer_ano', models.IntegerField(blank=True, null=True, verbose_name='Primer año')),
+                ('ultimo_ano', models.IntegerField(blank=True, null=True, verbose_name='Último año')),
+                ('produccion_ultimo_ano', models.FloatField(blank=True, null=True, verbose_name='Producción del último año (GWh)')),
+                ('factor_carga_vida', models.FloatField(blank=True, null=True, verbose_name='Factor de carga de vida (%)')),
+                ('mejor_ano', models.IntegerField(blank=True, null=True, verbose_name='Mejor año')),
+                ('mejor_factor_carga', models.FloatField(blank=True, null=True, verbose_name='Factor de carga del mejor año (%)')),
+                ('peor_ano', models.IntegerField(blank=True, null=True, verbose_name='Peor año')),
+                ('peor_factor_carga', models.FloatField(blank=True, null=True, verbose_name='Factor de carga del peor año (%)')),
+                ('twh_acumulados', models.FloatField(default=0, verbose_name='Electricidad acumulada (TWh)')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Última actualización')),
+                ('reactor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resumen', to='reactores.reactor')),
+            ],
+            options={
+                'verbose_name': 'Resumen de rendimiento',
+                'verbose_name_plural': 'Resúmenes de rendimiento',
+            },
+        ),
+        migrations.RunPython(calcular_resumenes, migrations.RunPython.noop),
+    ]
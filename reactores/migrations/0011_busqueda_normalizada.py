@@ -0,0 +1,54 @@
+from django.db import migrations
+
+# Campos de reactores/busqueda.py que llevan índice de trigramas
+CAMPOS = ['nombre', 'nombre_alternativo', 'operador', 'dueño', 'modelo']
+
+# Lo mismo que busqueda.normalizar: minúsculas, sin tildes y los signos convertidos en
+# espacios. unaccent() no es IMMUTABLE (depende del diccionario), así que no se puede
+# usar directamente en un índice; con el diccionario explícito sí se puede declarar así.
+FUNCION = """
+    CREATE OR REPLACE FUNCTION reactor_normalizar(texto text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT trim(regexp_replace(lower(unaccent('unaccent', coalesce(texto, ''))), '[^0-9a-z]+', ' ', 'g'))
+    $$
+"""
+
+
+def crear_indices(apps, schema_editor):
+    # Sustituye los índices de la 0008, sobre el texto tal cual, por índices sobre el texto
+    # normalizado, que es con lo que compara la búsqueda
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    schema_editor.execute(FUNCION)
+    tabla = schema_editor.quote_name(apps.get_model('reactores', 'Reactor')._meta.db_table)
+    for i, campo in enumerate(CAMPOS):
+        schema_editor.execute(f'DROP INDEX IF EXISTS reactor_busqueda_trgm_{i}')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS reactor_busqueda_normalizada_trgm_{i} '
+            f'ON {tabla} USING gin (reactor_normalizar({schema_editor.quote_name(campo)}) gin_trgm_ops)'
+        )
+
+
+def borrar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    tabla = schema_editor.quote_name(apps.get_model('reactores', 'Reactor')._meta.db_table)
+    for i, campo in enumerate(CAMPOS):
+        schema_editor.execute(f'DROP INDEX IF EXISTS reactor_busqueda_normalizada_trgm_{i}')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS reactor_busqueda_trgm_{i} '
+            f'ON {tabla} USING gin ({schema_editor.quote_name(campo)} gin_trgm_ops)'
+        )
+    schema_editor.execute('DROP FUNCTION IF EXISTS reactor_normalizar(text)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reactores', '0010_resumenrendimiento'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, borrar_indices),
+    ]
@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 
 class Reactor(models.Model):
@@ -10,7 +11,7 @@ class Reactor(models.Model):
     operador = models.CharField(max_length=255, null=True, blank=True, verbose_name="Operador")
     modelo = models.CharField(max_length=100, null=True, blank=True, verbose_name="Modelo")
     potencia_neta = models.IntegerField(null=True, blank=True, verbose_name="Potencia Neta (MWe)")
-    tipo_reactor_categoria = models.CharField(max_length=20, null=True, blank=True, db_index=True, verbose_name="Categoría de Tipo")
+    tipo_reactor_categoria = models.CharField(max_length=20, null=True, blank=True, verbose_name="Categoría de Tipo")
     latitud = models.FloatField(null=True, blank=True)
     longitud = models.FloatField(null=True, blank=True)
     capacidad_termica = models.IntegerField(null=True, blank=True, verbose_name="Capacidad Térmica (MWt)")
@@ -23,6 +24,12 @@ class Reactor(models.Model):
         verbose_name = "Reactor"
         verbose_name_plural = "Reactores"
         ordering = ['nombre']
+        # Las APIs filtran por país (y por tipo y país) y ordenan por nombre; el índice
+        # (tipo, país) también sirve para los filtros solo por tipo
+        indexes = [
+            models.Index(fields=['pais', 'nombre'], name='reactor_pais_nombre_idx'),
+            models.Index(fields=['tipo_reactor_categoria', 'pais'], name='reactor_tipo_pais_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
@@ -46,4 +53,72 @@ class HistorialRendimiento(models.Model):
         ordering = ['ano']
 
     def __str__(self):
-        return f"{self.reactor.nombre} - {self.ano}"
\ No newline at end of file
+        return f"{self.reactor.nombre} - {self.ano}"
+
+
+class ResumenRendimiento(models.Model):
+    # Resumen de toda la vida del reactor calculado a partir de su historial, para no
+    # tener que recorrerlo entero en los modales, el comparador o los rankings.
+    # Lo mantiene reactores/resumen.py (la importación lo refresca por lotes).
+    reactor = models.OneToOneField(Reactor, related_name='resumen', on_delete=models.CASCADE)
+    anos_reportados = models.IntegerField(default=0, verbose_name="Años reportados")
+    primer_ano = models.IntegerField(null=True, blank=True, verbose_name="Primer año")
+    ultimo_ano = models.IntegerField(null=True, blank=True, verbose_name="Último año")
+    produccion_ultimo_ano = models.FloatField(null=True, blank=True, verbose_name="Producción del último año (GWh)")
+    factor_carga_vida = models.FloatField(null=True, blank=True, verbose_name="Factor de carga de vida (%)")
+    mejor_ano = models.IntegerField(null=True, blank=True, verbose_name="Mejor año")
+    mejor_factor_carga = models.FloatField(null=True, blank=True, verbose_name="Factor de carga del mejor año (%)")
+    peor_ano = models.IntegerField(null=True, blank=True, verbose_name="Peor año")
+    peor_factor_carga = models.FloatField(null=True, blank=True, verbose_name="Factor de carga del peor año (%)")
+    twh_acumulados = models.FloatField(default=0, verbose_name="Electricidad acumulada (TWh)")
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
+
+    class Meta:
+        verbose_name = "Resumen de rendimiento"
+        verbose_name_plural = "Resúmenes de rendimiento"
+
+    def __str__(self):
+        return f"{self.reactor.nombre} - {self.anos_reportados} años"
+
+
+class EstadoImportacion(models.Model):
+    # Lo último que descargamos de la WNA para cada reactor, para que la importación
+    # pueda pedir solo lo que cambió (ETag / Last-Modified) y saltarse lo idéntico (hash)
+    # Valor de hash_contenido de los reactores sin gráfica de historial (404)
+    SIN_HISTORIAL = 'sin-historial'
+
+    reactor = models.OneToOneField(Reactor, related_name='estado_importacion', on_delete=models.CASCADE)
+    etag = models.CharField(max_length=255, blank=True, default='')
+    last_modified = models.CharField(max_length=64, blank=True, default='')
+    hash_contenido = models.CharField(max_length=64, blank=True, default='', verbose_name="Hash SHA-256 del contenido")
+    fecha_comprobacion = models.DateTimeField(null=True, blank=True, verbose_name="Última comprobación")
+    fecha_cambio = models.DateTimeField(null=True, blank=True, verbose_name="Último cambio detectado")
+
+    class Meta:
+        verbose_name = "Estado de importación"
+        verbose_name_plural = "Estados de importación"
+
+    def __str__(self):
+        return f"{self.reactor.nombre} - {self.fecha_comprobacion}"
+
+
+class AliasPais(models.Model):
+    # Para los países cuyo nombre en la BD no coincide con el del mapa del atlas
+    nombre_bd = models.CharField(max_length=100, unique=True, verbose_name="Nombre en la BD")
+    id_mapa = models.CharField(
+        max_length=10, verbose_name="ID en el mapa",
+        help_text="Código del país en la geometría del mapa (ISO 3166-1 alfa-3, p. ej. 'USA').",
+    )
+
+    class Meta:
+        verbose_name = "Alias de país"
+        verbose_name_plural = "Alias de países"
+        ordering = ['nombre_bd']
+
+    def __str__(self):
+        return f"{self.nombre_bd} → {self.id_mapa}"
+
+    def clean(self):
+        from .geometria import paises_mapa
+        if self.id_mapa not in paises_mapa():
+            raise ValidationError({'id_mapa': f"'{self.id_mapa}' no es el ID de ningún país del mapa."})
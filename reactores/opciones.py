@@ -0,0 +1,32 @@
+# En reactores/opciones.py
+# Opciones de los menús desplegables de las páginas (países y tipos de reactor). Se
+# cachean con la versión de los datos, así que solo se consultan cuando cambian.
+from .cache import cachear
+from .models import Reactor
+
+
+def calcular_paises():
+    return list(
+        Reactor.objects.exclude(pais__isnull=True).values_list('pais', flat=True).distinct().order_by('pais')
+    )
+
+
+def paises():
+    """
+    Países con algún reactor, por orden alfabético.
+    """
+    return cachear('opciones:paises', calcular_paises)
+
+
+def calcular_tipos():
+    return list(
+        Reactor.objects.exclude(tipo_reactor_categoria__isnull=True)
+        .values_list('tipo_reactor_categoria', flat=True).distinct().order_by('tipo_reactor_categoria')
+    )
+
+
+def tipos():
+    """
+    Categorías de reactor que tienen algún reactor, por orden alfabético.
+    """
+    return cachear('opciones:tipos', calcular_tipos)
@@ -0,0 +1,125 @@
+# En reactores/proyeccion.py
+import hashlib
+import json
+
+import numpy as np
+
+from .cache import cachear
+from .ciclo_vida import VIDA_UTIL_ANOS
+from .models import Reactor
+
+# Escenarios de vida útil que ofrece la página de ciclo de vida
+ESCENARIOS_VIDA = (40, 60, 80)
+VIDA_MINIMA, VIDA_MAXIMA = 1, 150
+
+# La curva llega hasta aquí (los reactores más recientes a 80 años rondan 2100)
+ANO_FINAL = 2100
+
+
+def leer_vidas_por_tipo(texto):
+    """
+    Convierte 'PHWR:50,GCR:35' en {'PHWR': 50, 'GCR': 35}. Lanza ValueError si el
+    formato o alguna vida no son válidos.
+    """
+    vidas = {}
+    for parte in filter(None, (p.strip() for p in (texto or '').split(','))):
+        tipo, separador, anos = parte.partition(':')
+        if not separador or not tipo.strip():
+            raise ValueError(f"'{parte}' no tiene el formato TIPO:AÑOS")
+        try:
+            vidas[tipo.strip()] = int(anos)
+        except ValueError:
+            raise ValueError(f"'{anos}' no es un número de años") from None
+    for vida in vidas.values():
+        if not VIDA_MINIMA <= vida <= VIDA_MAXIMA:
+            raise ValueError(f'La vida útil debe estar entre {VIDA_MINIMA} y {VIDA_MAXIMA} años')
+    return vidas
+
+
+def calcular_proyeccion(filas, vida=VIDA_UTIL_ANOS, vidas_por_tipo=None, por=None, ano_final=ANO_FINAL):
+    """
+    Potencia instalada (MWe) de cada año, desde la primera conexión hasta `ano_final`.
+    `filas` son tuplas (pais, tipo, potencia_neta, ano_conexion, ano_cierre).
+
+    Un reactor cuenta desde el año en que se conectó hasta el anterior a su cierre real
+    o, si sigue abierto, al de su cierre proyectado con la vida útil de su tipo (o `vida`).
+    En lugar de recorrer los años de cada reactor se suma +potencia en el año de inicio
+    y -potencia en el de fin, y la suma acumulada da la curva (barrido de eventos).
+
+    Devuelve {'anos': [...], 'series': {grupo: [...]}}, con un grupo por país o por tipo
+    según `por` ('pais', 'tipo' o None para una única serie 'total').
+    """
+    filas = list(filas)
+    if not filas:
+        return {'anos': [], 'series': {}}
+    pais, tipo, potencia, conexion, cierre = zip(*filas)
+    # NumPy convierte los None en NaN al crear un array de floats
+    potencia = np.nan_to_num(np.array(potencia, dtype=np.float64))
+    inicio = np.array(conexion, dtype=np.int64)
+
+    vidas = np.full(len(filas), vida, dtype=np.int64)
+    tipos = np.array(tipo, dtype=object)
+    for nombre_tipo, vida_tipo in (vidas_por_tipo or {}).items():
+        vidas[tipos == nombre_tipo] = vida_tipo
+    cierre = np.array(cierre, dtype=np.float64)
+    fin = np.where(np.isnan(cierre), inicio + vidas, cierre).astype(np.int64)
+
+    primer_ano = int(inicio.min())
+    anos = np.arange(primer_ano, ano_final + 1)
+    n = len(anos)
+    # Posición de cada evento en la rejilla; lo que pasa después de ano_final no se ve
+    desde = np.clip(inicio - primer_ano, 0, n)
+    hasta = np.clip(np.maximum(fin, inicio) - primer_ano, 0, n)
+
+    if por is None:
+        etiquetas, grupo = ['total'], np.zeros(len(filas), dtype=np.int64)
+    else:
+        valores = pais if por == 'pais' else tipo
+        etiquetas = sorted({v for v in valores if v is not None})
+        codigo = {etiqueta: i for i, etiqueta in enumerate(etiquetas)}
+        grupo = np.array([codigo.get(v, -1) for v in valores], dtype=np.int64)
+        potencia = np.where(grupo >= 0, potencia, 0.0)
+        grupo = np.maximum(grupo, 0)
+
+    # Una fila de n+1 casillas por grupo: np.bincount suma todos los eventos de una vez
+    ancho = n + 1
+    eventos = np.bincount(grupo * ancho + desde, weights=potencia, minlength=len(etiquetas) * ancho)
+    eventos -= np.bincount(grupo * ancho + hasta, weights=potencia, minlength=len(etiquetas) * ancho)
+    curvas = np.cumsum(eventos.reshape(len(etiquetas), ancho), axis=1)[:, :n]
+
+    return {
+        'anos': anos.tolist(),
+        'series': {etiqueta: np.rint(curva).astype(np.int64).tolist() for etiqueta, curva in zip(etiquetas, curvas)},
+    }
+
+
+def filas_proyeccion(pais=None, tipo=None):
+    """
+    Filas (pais, tipo, potencia_neta, ano_conexion, ano_cierre) de los reactores conectados.
+    """
+    reactores = Reactor.objects.exclude(fecha_primera_conexion__isnull=True).order_by()
+    if pais:
+        reactores = reactores.filter(pais=pais)
+    if tipo:
+        reactores = reactores.filter(tipo_reactor_categoria=tipo)
+    for pais, tipo, potencia, conexion, cierre in reactores.values_list(
+        'pais', 'tipo_reactor_categoria', 'potencia_neta', 'fecha_primera_conexion', 'fecha_cierre_permanente'
+    ):
+        yield pais, tipo, potencia, conexion.year, cierre.year if cierre else None
+
+
+def proyeccion(vida=VIDA_UTIL_ANOS, vidas_por_tipo=None, por=None, pais=None, tipo=None):
+    """
+    Proyección de potencia instalada por escenario (vida útil y excepciones por tipo),
+    desglose y filtros. Solo se cachean los escenarios de ESCENARIOS_VIDA sin excepciones,
+    los que ofrece la página: con cualquier otra combinación se calcula sin guardarla, para
+    que nadie pueda llenar la caché probando vidas. `pais` y `tipo` deben venir ya validados.
+    """
+    def calcular():
+        return calcular_proyeccion(filas_proyeccion(pais, tipo), vida, vidas_por_tipo, por)
+
+    if vidas_por_tipo or vida not in ESCENARIOS_VIDA:
+        return calcular()
+    # Los nombres de país pueden llevar espacios, que algunos backends no admiten en las claves
+    escenario = hashlib.sha1(json.dumps([vida, por, pais, tipo]).encode()).hexdigest()[:16]
+    return cachear(f'proyeccion:{escenario}', calcular)
@@ -0,0 +1,110 @@
+# En reactores/resumen.py
+import calendar
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import HistorialRendimiento, ResumenRendimiento
+
+# Campos del resumen que se envían al navegador (en el mismo orden que el modelo)
+CAMPOS_RESUMEN = [
+    'anos_reportados', 'primer_ano', 'ultimo_ano', 'produccion_ultimo_ano', 'factor_carga_vida',
+    'mejor_ano', 'mejor_factor_carga', 'peor_ano', 'peor_factor_carga', 'twh_acumulados',
+]
+
+# Columnas del historial que hacen falta para calcular el resumen
+COLUMNAS_HISTORIAL = ('ano', 'electricidad_suministrada', 'potencia_referencia', 'factor_carga_anual')
+
+
+def resumir(registros):
+    """
+    Calcula los valores de CAMPOS_RESUMEN a partir de los registros anuales de un
+    reactor, tuplas (ano, electricidad_suministrada, potencia_referencia, factor_carga_anual)
+    ordenadas por año.
+
+    El factor de carga de vida es, como en PRIS, la energía producida entre la que se
+    habría producido a la potencia de referencia todo el tiempo; si no hay potencia de
+    referencia, la media de los factores de carga anuales.
+    """
+    registros = list(registros)
+    producida = referencia = 0.0
+    factores = []
+    for ano, electricidad, potencia, factor in registros:
+        if electricidad is not None and potencia:
+            producida += electricidad
+            # GWh que daría la potencia de referencia (MW) funcionando todo el año
+            referencia += potencia * (8784 if calendar.isleap(ano) else 8760) / 1000
+        if factor is not None:
+            factores.append((factor, ano))
+
+    if referencia:
+        factor_carga_vida = round(100 * producida / referencia, 2)
+    elif factores:
+        factor_carga_vida = round(sum(f for f, _ in factores) / len(factores), 2)
+    else:
+        factor_carga_vida = None
+    # A igualdad de factor, el mejor año es el más reciente y el peor, el más antiguo
+    mejor = max(factores, default=(None, None))
+    peor = min(factores, default=(None, None))
+
+    return {
+        'anos_reportados': len(registros),
+        'primer_ano': registros[0][0] if registros else None,
+        'ultimo_ano': registros[-1][0] if registros else None,
+        'produccion_ultimo_ano': registros[-1][1] if registros else None,
+        'factor_carga_vida': factor_carga_vida,
+        'mejor_ano': mejor[1],
+        'mejor_factor_carga': mejor[0],
+        'peor_ano': peor[1],
+        'peor_factor_carga': peor[0],
+        'twh_acumulados': round(sum(r[1] or 0 for r in registros) / 1000, 3),
+    }
+
+
+def actualizar_resumenes(reactor_ids=None):
+    """
+    Recalcula el resumen de los reactores indicados (o de todos, con None) con una
+    sola consulta al historial y un "upsert" de los resúmenes. Los reactores que se
+    han quedado sin historial pierden su resumen. Devuelve cuántos resúmenes escribió.
+    """
+    historial = HistorialRendimiento.objects.order_by('reactor_id', 'ano')
+    resumenes_viejos = ResumenRendimiento.objects.all()
+    if reactor_ids is not None:
+        reactor_ids = set(reactor_ids)
+        if not reactor_ids:
+            return 0
+        historial = historial.filter(reactor_id__in=reactor_ids)
+        resumenes_viejos = resumenes_viejos.filter(reactor_id__in=reactor_ids)
+
+    filas = historial.values_list('reactor_id', *COLUMNAS_HISTORIAL).iterator(chunk_size=5000)
+    resumenes = [
+        ResumenRendimiento(reactor_id=reactor_id, **resumir(fila[1:] for fila in grupo))
+        for reactor_id, grupo in groupby(filas, key=itemgetter(0))
+    ]
+
+    with transaction.atomic():
+        resumenes_viejos.exclude(
+            Exists(HistorialRendimiento.objects.filter(reactor_id=OuterRef('reactor_id')))
+        ).delete()
+        ResumenRendimiento.objects.bulk_create(
+            resumenes,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['reactor'],
+            update_fields=[*CAMPOS_RESUMEN, 'fecha_actualizacion'],
+        )
+    return len(resumenes)
+
+
+def resumen_como_dict(reactor):
+    """
+    El resumen de un reactor (cargado con select_related('resumen')) como diccionario,
+    o None si el reactor no tiene historial.
+    """
+    try:
+        resumen = reactor.resumen
+    except ResumenRendimiento.DoesNotExist:
+        return None
+    return {campo: getattr(resumen, campo) for campo in CAMPOS_RESUMEN}
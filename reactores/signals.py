@@ -0,0 +1,53 @@
+# En reactores/signals.py
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidar_datos
+from .clasificacion import clasificar_tipo
+from .models import AliasPais, HistorialRendimiento, Reactor
+from .resumen import actualizar_resumenes
+
+
+@receiver(pre_save, sender=Reactor)
+def clasificar_reactor(sender, instance, **kwargs):
+    """
+    Al guardar un reactor sin categoría, se la asigna a partir de su modelo.
+    """
+    if not instance.tipo_reactor_categoria:
+        instance.tipo_reactor_categoria = clasificar_tipo(instance.modelo)
+
+
+@receiver(post_save, sender=HistorialRendimiento)
+@receiver(post_delete, sender=HistorialRendimiento)
+def actualizar_resumen_reactor(sender, instance, origin=None, **kwargs):
+    """
+    Al editar o borrar un año del historial (p. ej. desde el admin), se recalcula el
+    resumen de su reactor. La importación masiva no pasa por aquí: lo hace EscritorHistorial.
+    """
+    # Si se está borrando el reactor entero, su resumen se borra con él
+    if origin is not None and getattr(origin, 'model', type(origin)) is not HistorialRendimiento:
+        return
+    actualizar_resumenes([instance.reactor_id])
+
+
+@receiver(post_save, sender=Reactor)
+@receiver(post_delete, sender=Reactor)
+@receiver(post_save, sender=HistorialRendimiento)
+@receiver(post_delete, sender=HistorialRendimiento)
+@receiver(post_save, sender=AliasPais)
+@receiver(post_delete, sender=AliasPais)
+def invalidar_cache_reactores(sender, **kwargs):
+    """
+    Cualquier alta, cambio o baja de un reactor, de su historial o de un alias de país
+    deja obsoleto lo cacheado.
+    """
+    invalidar_datos()
+
+
+@receiver(post_migrate)
+def invalidar_cache_tras_migrar(sender, app_config, **kwargs):
+    """
+    Una migración puede cambiar los datos sin pasar por save(): lo cacheado antes deja de valer.
+    """
+    if app_config.label == 'reactores':
+        invalidar_datos()
@@ -0,0 +1,85 @@
+# En reactores/teselas.py
+import math
+
+from .cache import cachear
+from .espacial import indice_espacial
+
+TAMANO_TESELA = 256
+# Cada tesela se divide en CELDAS_POR_LADO x CELDAS_POR_LADO celdas de agrupación (32 px),
+# así que una tesela nunca devuelve más de 64 puntos, haya los reactores que haya.
+CELDAS_POR_LADO = 8
+ZOOM_MAXIMO = 18
+LATITUD_MAXIMA = 85.05112878  # Límite de la proyección Web Mercator
+
+# Orden de los valores de cada punto de la respuesta; id y nombre solo en puntos de un reactor
+CAMPOS_TESELA = ['lat', 'lon', 'reactores', 'mwe', 'id', 'nombre']
+
+
+def _pixel_global(lat, lon, zoom):
+    # Posición en píxeles del punto en el mundo Web Mercator a ese zoom
+    escala = TAMANO_TESELA * 2 ** zoom
+    seno = math.sin(math.radians(lat))
+    x = (lon + 180) / 360 * escala
+    y = (0.5 - math.log((1 + seno) / (1 - seno)) / (4 * math.pi)) * escala
+    # La longitud 180 (y la latitud máxima) quedan dentro de la última tesela
+    return min(x, escala - 1e-6), min(max(y, 0.0), escala - 1e-6)
+
+
+def _latitud_de_fila(y, zoom):
+    n = math.pi - 2 * math.pi * y / 2 ** zoom
+    return math.degrees(math.atan(math.sinh(n)))
+
+
+def limites_tesela(zoom, x, y):
+    """
+    Caja (sur, oeste, norte, este) en grados de la tesela z/x/y (esquema XYZ de Leaflet).
+    """
+    oeste = x / 2 ** zoom * 360 - 180
+    este = (x + 1) / 2 ** zoom * 360 - 180
+    return _latitud_de_fila(y + 1, zoom), oeste, _latitud_de_fila(y, zoom), este
+
+
+def calcular_tesela(zoom, x, y, indice=None):
+    """
+    Agrupa en una rejilla los reactores de la tesela, con su número, la potencia neta
+    sumada y el centroide de cada grupo: {"campos": CAMPOS_TESELA, "puntos": [[...], ...]}.
+    Por defecto usa el índice espacial de los reactores de la BD.
+    """
+    if indice is None:
+        indice = indice_espacial()
+    tamano_celda = TAMANO_TESELA / CELDAS_POR_LADO
+    sur, oeste, norte, este = limites_tesela(zoom, x, y)
+    # Un margen mínimo para no perder por redondeo los reactores justo en el borde
+    margen = 1e-9
+    grupos = {}
+    for reactor in indice.en_caja(sur - margen, oeste - margen, norte + margen, este + margen):
+        lat, lon = reactor[-2], reactor[-1]
+        if abs(lat) > LATITUD_MAXIMA:
+            continue
+        px, py = _pixel_global(lat, lon, zoom)
+        # Los reactores justo en el borde pertenecen solo a una de las dos teselas
+        if int(px // TAMANO_TESELA) != x or int(py // TAMANO_TESELA) != y:
+            continue
+        celda = (int(px % TAMANO_TESELA // tamano_celda), int(py % TAMANO_TESELA // tamano_celda))
+        grupos.setdefault(celda, []).append(reactor)
+
+    puntos = []
+    for reactores in grupos.values():
+        n = len(reactores)
+        lat = sum(r[-2] for r in reactores) / n
+        lon = sum(r[-1] for r in reactores) / n
+        mwe = sum(r[4] or 0 for r in reactores)
+        unico = reactores[0] if n == 1 else None
+        puntos.append([
+            round(lat, 5), round(lon, 5), n, mwe,
+            unico[0] if unico else None, unico[1] if unico else None,
+        ])
+    return {'campos': CAMPOS_TESELA, 'puntos': puntos}
+
+
+def tesela(zoom, x, y):
+    """
+    Devuelve la tesela desde la caché; se recalcula cuando cambian los datos
+    (por ejemplo, al ejecutar actualizar_coordenadas).
+    """
+    return cachear(f'tesela:{zoom}:{x}:{y}', lambda: calcular_tesela(zoom, x, y))
@@ -1,3 +1,1577 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import hashlib
+import json
+import random
+import re
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+from urllib.parse import unquote
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.template import engines
+from django.template.loaders.cached import Loader as CargadorConCache
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from . import decorators, geometria, urls, views
+from .api_async import VISTAS
+from .analitica_tipos import datos_tipo
+from .benchmarks.informe import comparar
+from .cache import cachear, invalidar_datos, version_datos
+from .benchmarks.rutas import urls_a_medir
+from .benchmarks.servidor import servidor_local
+from .benchmarks.sintetico import caches_aisladas, generar_flota
+from .ciclo_vida import EPOCA, ESTADOS, VIDA_UTIL_ANOS, json_columnar_ciclo_vida
+from .clasificacion import clasificar_tipo
+from .descargas import _en_paralelo
+from .detalle import MAX_REACTORES_POR_LOTE
+from .escritura import MINIMO_PARA_COPY, EscritorHistorial
+from .espacial import IndiceEspacial, distancia_km
+from .estadisticas import estadisticas_dashboard
+from .exportacion import NOMBRES_COLUMNAS, exportar, filas_exportacion, pyarrow
+from .extraccion import extraer_coordenadas
+from .geometria import NOMBRE_OBJETO, codificacion_preferida, construir_topologia, manifiesto
+from .instrumentacion import VENTANA_CUANTILES, Metricas, metricas
+from .management.commands.importar_reactores import DIAS_SIN_HISTORIAL
+from .mapa import calcular_indice_paises
+from .models import AliasPais, EstadoImportacion, HistorialRendimiento, Reactor, ResumenRendimiento
+
+
+class VersionDatosTests(TestCase):
+    """
+    La versión de los datos vive en su propia caché y sobrevive a que se llene la de por defecto.
+    """
+
+    def test_version_no_se_pierde_al_llenarse_la_cache(self):
+        with tempfile.TemporaryDirectory() as datos, tempfile.TemporaryDirectory() as estado:
+            configuracion = {
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': datos,
+                    'OPTIONS': {'MAX_ENTRIES': 20},
+                },
+                'estado': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': estado},
+            }
+            with override_settings(CACHES=configuracion):
+                version = version_datos()
+                for i in range(100):
+                    cachear(f'tesela:{i}', lambda: i)
+                self.assertEqual(version_datos(), version)
+                invalidar_datos()
+                self.assertNotEqual(version_datos(), version)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_cada_despliegue_estrena_version_y_etag(self):
+        cache.clear()
+        with self.settings(VERSION_DESPLIEGUE='v1'):
+            etag = self.client.get(reverse('api_datos_mapa'))['ETag']
+            self.assertEqual(self.client.get(reverse('api_datos_mapa'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.settings(VERSION_DESPLIEGUE='v2'):
+            respuesta = self.client.get(reverse('api_datos_mapa'), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertNotEqual(respuesta['ETag'], etag)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_migrar_invalida_los_datos(self):
+        version = version_datos()
+        call_command('migrate', 'reactores', verbosity=0)
+        self.assertNotEqual(version_datos(), version)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class EstadisticasDashboardTests(TestCase):
+    """
+    Los KPIs del dashboard salen de una consulta agrupada, se cachean y se recalculan
+    cuando cambian los reactores.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Reactor.objects.bulk_create([
+            Reactor(nombre='ALMARAZ-1', pais='Spain', potencia_neta=1000),
+            Reactor(nombre='ALMARAZ-2', pais='Spain', potencia_neta=1000),
+            Reactor(nombre='ZORITA', pais='Spain'),
+            Reactor(nombre='CHOOZ-B1', pais='France', potencia_neta=1500),
+            Reactor(nombre='CHOOZ-B2', pais='France', potencia_neta=1500),
+            Reactor(nombre='TSURUGA-2', pais='Japan', potencia_neta=1100),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_kpis_con_una_consulta_y_desde_la_cache(self):
+        with self.assertNumQueries(1):
+            datos = estadisticas_dashboard()
+        self.assertEqual(datos['total_reactores'], 6)
+        self.assertEqual(datos['paises_con_reactores'], 3)
+        self.assertEqual(datos['potencia_total_gw'], 6)
+        self.assertEqual(datos['todos_los_paises'], [
+            {'pais': 'Spain', 'total': 3}, {'pais': 'France', 'total': 2}, {'pais': 'Japan', 'total': 1},
+        ])
+        self.assertEqual(json.loads(datos['top_paises_chart_json']), {'labels': ['Spain', 'France', 'Japan'], 'data': [3, 2, 1]})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(estadisticas_dashboard(), datos)
+
+    def test_cambios_en_los_reactores_invalidan_la_cache(self):
+        estadisticas_dashboard()
+
+        nuevo = Reactor.objects.create(nombre='TRINO', pais='Italy', potencia_neta=260)
+        datos = estadisticas_dashboard()
+        self.assertEqual((datos['total_reactores'], datos['paises_con_reactores']), (7, 4))
+
+        nuevo.potencia_neta = 1400
+        nuevo.save()
+        self.assertEqual(estadisticas_dashboard()['potencia_total_gw'], 8)
+
+        nuevo.delete()
+        datos = estadisticas_dashboard()
+        self.assertEqual((datos['total_reactores'], datos['potencia_total_gw']), (6, 6))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ApiCondicionalTests(TestCase):
+    """
+    Las APIs devuelven ETag/Cache-Control y responden 304 sin consultar la BD
+    cuando el navegador ya tiene la versión actual de los datos.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reactor = Reactor.objects.create(
+            nombre='ALMARAZ-1', pais='Spain', status='Operational', modelo='PWR',
+            tipo_reactor_categoria='PWR', potencia_neta=1011,
+            fecha_inicio_construccion=date(1973, 7, 3), fecha_primera_conexion=date(1981, 5, 1),
+        )
+        HistorialRendimiento.objects.create(reactor=cls.reactor, ano=2020, electricidad_suministrada=8000.0)
+
+    def setUp(self):
+        cache.clear()
+
+    def urls_api(self):
+        pk = self.reactor.pk
+        return [
+            reverse('api_datos_mapa'),
+            reverse('api_reactores_por_pais') + '?pais=Spain',
+            reverse('api_paises_por_tipo') + '?tipo=PWR',
+            reverse('api_reactores_por_tipo_y_pais') + '?tipo=PWR&pais=Spain',
+            reverse('api_reactores') + f'?ids={pk}&include=historial',
+            reverse('api_reactor_datos', args=[pk]),
+            reverse('api_reactor_historial', args=[pk]),
+            reverse('api_datos_ciclo_vida') + '?pais=Spain',
+            reverse('api_datos_tipo', args=['PWR']),
+        ]
+
+    def test_segunda_peticion_responde_304_sin_consultas(self):
+        for url in self.urls_api():
+            with self.subTest(url=url):
+                respuesta = self.client.get(url)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertIn('no-cache', respuesta['Cache-Control'])
+                self.assertTrue(respuesta.has_header('Last-Modified'))
+                etag = respuesta['ETag']
+
+                with self.assertNumQueries(0):
+                    respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(respuesta.status_code, 304)
+
+    def test_cambio_de_datos_genera_nuevo_etag(self):
+        url = reverse('api_reactor_datos', args=[self.reactor.pk])
+        etag = self.client.get(url)['ETag']
+
+        self.reactor.potencia_neta = 1049
+        self.reactor.save()
+
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+        self.assertEqual(respuesta.json()['datos']['potencia_neta'], 1049)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ApiReactoresLoteTests(TestCase):
+    """
+    api_reactores devuelve varios reactores en el orden pedido con dos consultas como mucho,
+    y las APIs de un solo reactor mantienen su formato.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.almaraz = Reactor.objects.create(nombre='ALMARAZ-1', pais='Spain', potencia_neta=1011)
+        cls.trillo = Reactor.objects.create(nombre='TRILLO-1', pais='Spain', potencia_neta=1003)
+        for ano in (2019, 2020):
+            HistorialRendimiento.objects.create(reactor=cls.almaraz, ano=ano, electricidad_suministrada=8000.0)
+        HistorialRendimiento.objects.create(reactor=cls.trillo, ano=2020, electricidad_suministrada=7500.0)
+
+    def setUp(self):
+        cache.clear()
+
+    def lote(self, **parametros):
+        return self.client.get(reverse('api_reactores'), parametros)
+
+    def test_orden_repetidos_y_no_encontrados(self):
+        ids = f'{self.trillo.pk},{self.almaraz.pk},{self.trillo.pk},999999'
+        datos = self.lote(ids=ids).json()
+        self.assertTrue(datos['success'])
+        self.assertEqual([r['nombre'] for r in datos['reactores']], ['TRILLO-1', 'ALMARAZ-1'])
+        self.assertEqual(datos['no_encontrados'], [999999])
+        self.assertNotIn('historial', datos['reactores'][0])
+
+    def test_historial_con_dos_consultas(self):
+        with self.assertNumQueries(2):
+            datos = self.lote(ids=f'{self.almaraz.pk},{self.trillo.pk}', include='historial').json()
+        almaraz, trillo = datos['reactores']
+        self.assertEqual([h['ano'] for h in almaraz['historial']], [2019, 2020])
+        self.assertEqual([h['ano'] for h in trillo['historial']], [2020])
+
+    def test_parametros_invalidos(self):
+        respuesta = self.lote(ids='1,dos')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(respuesta.json()['success'])
+
+        ids = ','.join(str(i) for i in range(1, MAX_REACTORES_POR_LOTE + 2))
+        self.assertEqual(self.lote(ids=ids).status_code, 400)
+        ids = ','.join(str(i) for i in range(1, MAX_REACTORES_POR_LOTE + 1))
+        self.assertEqual(self.lote(ids=ids).status_code, 200)
+
+    def test_apis_de_un_solo_reactor(self):
+        datos = self.client.get(reverse('api_reactor_datos', args=[self.almaraz.pk])).json()
+        self.assertTrue(datos['success'])
+        self.assertEqual(datos['datos']['nombre'], 'ALMARAZ-1')
+        self.assertNotIn('historial', datos['datos'])
+
+        datos = self.client.get(reverse('api_reactor_historial', args=[self.almaraz.pk])).json()
+        self.assertTrue(datos['success'])
+        self.assertEqual([h['ano'] for h in datos['historial']], [2019, 2020])
+        self.assertEqual(datos['historial'][0]['reactor_id'], self.almaraz.pk)
+
+        for nombre in ('api_reactor_datos', 'api_reactor_historial'):
+            respuesta = self.client.get(reverse(nombre, args=[999999]))
+            self.assertEqual(respuesta.status_code, 404)
+            self.assertFalse(respuesta.json()['success'])
+
+
+class ServidorHistorialFalso(BaseHTTPRequestHandler):
+    """
+    Imita /charts/<nombre> de la World Nuclear Association: responde con el JSON
+    de `historiales`, un 404 si el reactor no está y un 500 la primera vez para
+    los nombres de `fallos_transitorios`. Con `con_etag` envía ETag y responde 304
+    a las peticiones condicionales que coinciden (y las anota en `no_modificados`).
+    """
+    historiales = {}
+    fallos_transitorios = set()
+    peticiones = []
+    no_modificados = []
+    con_etag = True
+
+    def do_GET(self):
+        nombre = unquote(self.path.rsplit('/', 1)[-1])
+        self.peticiones.append(nombre)
+        if nombre in self.fallos_transitorios:
+            self.fallos_transitorios.discard(nombre)
+            self.send_response(500)
+            self.end_headers()
+            return
+        if nombre not in self.historiales:
+            self.send_response(404)
+            self.end_headers()
+            return
+        cuerpo = json.dumps(self.historiales[nombre]).encode()
+        etag = '"%s"' % hashlib.md5(cuerpo).hexdigest()
+        if self.con_etag and self.headers.get('If-None-Match') == etag:
+            self.no_modificados.append(nombre)
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        if self.con_etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ImportarHistorialTests(TestCase):
+    """
+    La fase 2 de importar_reactores contra un servidor HTTP local.
+    """
+
+    def setUp(self):
+        ServidorHistorialFalso.historiales = {
+            'ALMARAZ 1': [
+                {'Year': 2019, 'ElectricitySupplied': 7900.5, 'LoadFactorAnnual': 88.1},
+                {'Year': 2020, 'ElectricitySupplied': 8000.0, 'LoadFactorAnnual': 90.2},
+            ],
+            'TRILLO 1': [{'Year': 2020, 'ElectricitySupplied': 7500.0}],
+        }
+        ServidorHistorialFalso.fallos_transitorios = {'TRILLO 1'}
+        ServidorHistorialFalso.peticiones = []
+        ServidorHistorialFalso.no_modificados = []
+        ServidorHistorialFalso.con_etag = True
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), ServidorHistorialFalso)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+        self.url_base = f'http://127.0.0.1:{self.servidor.server_port}/charts/'
+
+        self.almaraz = Reactor.objects.create(nombre='ALMARAZ 1', pais='Spain')
+        self.trillo = Reactor.objects.create(nombre='TRILLO 1', pais='Spain')
+        self.sin_datos = Reactor.objects.create(nombre='ZORITA', pais='Spain')
+        self.con_historial = Reactor.objects.create(nombre='COFRENTES', pais='Spain')
+        HistorialRendimiento.objects.create(reactor=self.con_historial, ano=2020)
+
+    def importar(self, **opciones):
+        salida = StringIO()
+        call_command('importar_reactores', url_base=self.url_base, hilos=4, tasa=0, espera_base=0, stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def test_descarga_en_paralelo_con_reintentos(self):
+        salida = self.importar()
+
+        self.assertEqual(list(self.almaraz.historial.values_list('ano', 'factor_carga_anual')), [(2019, 88.1), (2020, 90.2)])
+        self.assertEqual(self.trillo.historial.count(), 1)
+        self.assertFalse(self.sin_datos.historial.exists())
+        # El 500 se reintentó y el 404 de COFRENTES no borró el historial que ya tenía
+        self.assertEqual(ServidorHistorialFalso.peticiones.count('TRILLO 1'), 2)
+        self.assertTrue(self.con_historial.historial.exists())
+        self.assertIn('reactores/s', salida)
+        self.assertIn('3 insertados', salida)
+        self.assertEqual(EstadoImportacion.objects.get(reactor=self.almaraz).etag[:1], '"')
+
+    def test_reimportacion_solo_escribe_lo_que_cambio(self):
+        self.importar()
+
+        salida = self.importar()
+        self.assertIn('2 sin cambios, 0 fallidos', salida)
+        self.assertIn('0 insertados, 0 actualizados', salida)
+
+        ServidorHistorialFalso.historiales['ALMARAZ 1'][1]['LoadFactorAnnual'] = 91.0
+        salida = self.importar()
+        self.assertIn('1 sin cambios, 0 fallidos', salida)
+        self.assertIn('0 insertados, 1 actualizados, 1 sin cambios', salida)
+        self.assertEqual(self.almaraz.historial.get(ano=2020).factor_carga_anual, 91.0)
+
+    def test_hash_del_contenido_sin_etag(self):
+        ServidorHistorialFalso.con_etag = False
+        self.importar()
+
+        salida = self.importar()
+        self.assertIn('2 sin cambios, 0 fallidos', salida)
+
+        # --force ignora el hash y vuelve a comparar registro a registro
+        salida = self.importar(force=True)
+        self.assertIn('0 insertados, 0 actualizados, 3 sin cambios', salida)
+
+    def test_force_descarga_todo_aunque_no_haya_cambios(self):
+        self.importar()
+        ServidorHistorialFalso.peticiones = []
+
+        salida = self.importar(force=True)
+        # Sin cabeceras condicionales ni hash: se descarga y se compara todo, pero no se reescribe
+        self.assertIn('0 sin cambios, 0 fallidos', salida)
+        self.assertIn('0 insertados, 0 actualizados, 3 sin cambios', salida)
+        self.assertCountEqual(ServidorHistorialFalso.peticiones, ['ALMARAZ 1', 'TRILLO 1', 'ZORITA', 'COFRENTES'])
+
+    def test_since_solo_revisa_los_no_comprobados(self):
+        self.importar()
+        EstadoImportacion.objects.filter(reactor=self.trillo).delete()
+        ServidorHistorialFalso.peticiones = []
+
+        # Los demás (también los que dieron 404) se comprobaron hoy
+        salida = self.importar(since=date.today())
+        self.assertIn('1 reactores a revisar', salida)
+        self.assertEqual(ServidorHistorialFalso.peticiones, ['TRILLO 1'])
+
+        # Con una fecha posterior a la última comprobación se revisan todos los que tienen historial
+        salida = self.importar(since=date.today() + timedelta(days=1))
+        self.assertIn('2 reactores a revisar', salida)
+
+    def test_sin_historial_no_se_vuelve_a_pedir(self):
+        self.importar()
+        estado = EstadoImportacion.objects.get(reactor=self.sin_datos)
+        self.assertEqual(estado.hash_contenido, EstadoImportacion.SIN_HISTORIAL)
+        ServidorHistorialFalso.peticiones = []
+
+        self.importar()
+        self.assertCountEqual(ServidorHistorialFalso.peticiones, ['ALMARAZ 1', 'TRILLO 1'])
+
+        # Pasado DIAS_SIN_HISTORIAL se vuelve a probar, y si ya hay historial se importa
+        ServidorHistorialFalso.historiales['ZORITA'] = [{'Year': 2006, 'ElectricitySupplied': 1000.0}]
+        EstadoImportacion.objects.filter(reactor=self.sin_datos).update(
+            fecha_comprobacion=timezone.now() - timedelta(days=DIAS_SIN_HISTORIAL + 1)
+        )
+        self.importar()
+        self.assertTrue(self.sin_datos.historial.exists())
+        self.assertNotEqual(EstadoImportacion.objects.get(reactor=self.sin_datos).hash_contenido, EstadoImportacion.SIN_HISTORIAL)
+
+    def test_etag_nuevo_con_el_mismo_contenido_se_guarda(self):
+        self.importar()
+        EstadoImportacion.objects.filter(reactor=self.almaraz).update(etag='"viejo"')
+
+        salida = self.importar()
+        self.assertIn('2 sin cambios', salida)
+        self.assertNotEqual(EstadoImportacion.objects.get(reactor=self.almaraz).etag, '"viejo"')
+
+        # Con el ETag actualizado el servidor vuelve a responder 304
+        ServidorHistorialFalso.no_modificados = []
+        self.importar()
+        self.assertIn('ALMARAZ 1', ServidorHistorialFalso.no_modificados)
+
+    def test_dry_run_no_escribe(self):
+        salida = self.importar(dry_run=True)
+
+        self.assertIn('3 insertados', salida)
+        self.assertFalse(self.almaraz.historial.exists())
+        self.assertFalse(EstadoImportacion.objects.exists())
+
+    def test_fallo_al_guardar_cancela_las_descargas_pendientes(self):
+        lanzadas = []
+
+        def tarea(sesion, reactor_id, nombre):
+            lanzadas.append(reactor_id)
+            time.sleep(0.01)
+            return nombre
+
+        with self.assertRaises(RuntimeError):
+            for _ in _en_paralelo([(i, f'R{i}') for i in range(200)], tarea, hilos=2, cabeceras={}):
+                raise RuntimeError('fallo al guardar')
+        self.assertLess(len(lanzadas), 10)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class EscritorHistorialTests(TestCase):
+
+    def setUp(self):
+        self.reactor = Reactor.objects.create(nombre='ASCO-1', pais='Spain')
+
+    def escribir(self, records, tamano_lote=2):
+        with EscritorHistorial(tamano_lote=tamano_lote) as escritor:
+            escritor.agregar(self.reactor.pk, records)
+        return escritor.insertados, escritor.actualizados, escritor.sin_cambios
+
+    def test_upsert_cuenta_insertados_actualizados_y_sin_cambios(self):
+        records = [{'Year': ano, 'ElectricitySupplied': 7000.0 + ano} for ano in (2018, 2019, 2020)]
+        self.assertEqual(self.escribir(records), (3, 0, 0))
+
+        records[1] = {'Year': 2019, 'ElectricitySupplied': 1.5}
+        self.assertEqual(self.escribir(records + [{'Year': 2021}]), (1, 1, 2))
+        self.assertEqual(
+            list(self.reactor.historial.values_list('ano', 'electricidad_suministrada')),
+            [(2018, 9018.0), (2019, 1.5), (2020, 9020.0), (2021, None)],
+        )
+
+    def test_valores_con_el_tipo_de_cada_campo(self):
+        records = [{'Year': 2020, 'ReferenceUnitPower': 1000.0, 'LoadFactorAnnual': 85}]
+        self.assertEqual(self.escribir(records), (1, 0, 0))
+        self.assertEqual(self.reactor.historial.get().potencia_referencia, 1000)
+        # 1000.0 y 1000 son el mismo valor: no cuenta como cambio
+        self.assertEqual(self.escribir([{'Year': 2020, 'ReferenceUnitPower': 1000, 'LoadFactorAnnual': 85.0}]), (0, 0, 1))
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'COPY solo se usa con PostgreSQL')
+    def test_copy_con_valores_decimales_en_campos_enteros(self):
+        records = [{'Year': ano, 'ReferenceUnitPower': 1000.0, 'ElectricitySupplied': 7.5} for ano in range(MINIMO_PARA_COPY)]
+        with EscritorHistorial(tamano_lote=MINIMO_PARA_COPY * 2) as escritor:
+            escritor.agregar(self.reactor.pk, records)
+        self.assertEqual(escritor.insertados, MINIMO_PARA_COPY)
+        self.assertEqual(
+            set(self.reactor.historial.values_list('potencia_referencia', 'electricidad_suministrada')), {(1000, 7.5)},
+        )
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ResumenRendimientoTests(TestCase):
+    """
+    El resumen por reactor se mantiene al importar y al editar el historial, y las APIs lo sirven.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.reactor = Reactor.objects.create(nombre='ASCO-1', pais='Spain', tipo_reactor_categoria='PWR')
+
+    def importar(self, records):
+        with EscritorHistorial(tamano_lote=100) as escritor:
+            escritor.agregar(self.reactor.pk, records)
+
+    def test_resumen_se_mantiene_con_el_historial(self):
+        # 2020 es bisiesto: 1000 MW todo el año son 8784 GWh
+        self.importar([
+            {'Year': 2019, 'ElectricitySupplied': 8760.0, 'ReferenceUnitPower': 1000, 'LoadFactorAnnual': 100.0},
+            {'Year': 2020, 'ElectricitySupplied': 4392.0, 'ReferenceUnitPower': 1000, 'LoadFactorAnnual': 50.0},
+        ])
+        resumen = ResumenRendimiento.objects.get(reactor=self.reactor)
+        self.assertEqual(
+            (resumen.anos_reportados, resumen.primer_ano, resumen.ultimo_ano, resumen.produccion_ultimo_ano),
+            (2, 2019, 2020, 4392.0),
+        )
+        self.assertEqual(resumen.factor_carga_vida, 74.97)
+        self.assertEqual((resumen.mejor_ano, resumen.peor_ano, resumen.twh_acumulados), (2019, 2020, 13.152))
+
+        # Un cambio en la importación refresca el resumen
+        self.importar([{'Year': 2021, 'ElectricitySupplied': 0.0, 'ReferenceUnitPower': 1000, 'LoadFactorAnnual': 0.0}])
+        resumen.refresh_from_db()
+        self.assertEqual((resumen.anos_reportados, resumen.ultimo_ano, resumen.peor_ano), (3, 2021, 2021))
+
+        # Y también una edición o un borrado sueltos (p. ej. desde el admin)
+        self.reactor.historial.get(ano=2021).delete()
+        resumen.refresh_from_db()
+        self.assertEqual((resumen.anos_reportados, resumen.peor_ano), (2, 2020))
+        self.reactor.historial.all().delete()
+        self.assertFalse(ResumenRendimiento.objects.filter(reactor=self.reactor).exists())
+
+    def test_apis_sirven_el_resumen(self):
+        self.importar([{'Year': 2019, 'ElectricitySupplied': 7000.0, 'LoadFactorAnnual': 80.0}])
+        datos = self.client.get(reverse('api_reactores'), {'ids': self.reactor.pk, 'include': 'resumen'}).json()
+        self.assertEqual(datos['reactores'][0]['resumen']['factor_carga_vida'], 80.0)
+        self.assertNotIn('historial', datos['reactores'][0])
+        lista = self.client.get(reverse('api_datos_tipo', args=['PWR'])).json()['lista_reactores']
+        self.assertEqual((lista[0]['factor_carga_vida'], lista[0]['twh_acumulados']), (80.0, 7.0))
+
+        sin_historial = Reactor.objects.create(nombre='ASCO-2', pais='Spain')
+        datos = self.client.get(reverse('api_reactores'), {'ids': sin_historial.pk, 'include': 'resumen'}).json()
+        self.assertIsNone(datos['reactores'][0]['resumen'])
+
+        # Borrar el reactor se lleva su historial y su resumen
+        self.reactor.delete()
+        self.assertFalse(ResumenRendimiento.objects.exists())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ActualizarCoordenadasTests(TestCase):
+
+    def test_extraccion_rapida_y_fallback(self):
+        self.assertEqual(
+            extraer_coordenadas(b'<INPUT type=hidden value="39.2" id=Latitude><input id="Longitude" value=\'-2.5\'>'),
+            (39.2, -2.5),
+        )
+        # Marcado que el camino rápido no reconoce: lo resuelve BeautifulSoup
+        self.assertEqual(extraer_coordenadas(b'<input title="a>b" id="Latitude" value="1.5"><input id="Longitude" value="2">'), (1.5, 2.0))
+        self.assertIsNone(extraer_coordenadas(b'<input id="Latitude" value="">'))
+        # data-id y data-value no son los atributos id y value
+        self.assertEqual(
+            extraer_coordenadas(
+                b'<input data-value="0" id="Latitude" value="40.5">'
+                b'<input data-id="Longitude" id="otro" value="9"><input id="Longitude" value="-3.5">'
+            ),
+            (40.5, -3.5),
+        )
+
+    def test_actualiza_en_paralelo_con_bulk_update(self):
+        almaraz = Reactor.objects.create(nombre='ALMARAZ 1', pais='Spain')
+        zorita = Reactor.objects.create(nombre='ZORITA', pais='Spain')
+        paginas = {
+            '/details/Almaraz-1': b'<html><input type="hidden" id="Latitude" value="39.807" />'
+                                  b'<input type="hidden" id="Longitude" value="-5.697" /></html>',
+        }
+
+        def responder(ruta):
+            if ruta in paginas:
+                return 200, paginas[ruta], 'text/html'
+            return 404, b'', 'text/html'
+
+        with servidor_local(responder) as url_base:
+            call_command('actualizar_coordenadas', url_base=url_base + 'details/', tasa=0, stdout=StringIO())
+
+        almaraz.refresh_from_db()
+        zorita.refresh_from_db()
+        self.assertEqual((almaraz.latitud, almaraz.longitud), (39.807, -5.697))
+        self.assertIsNone(zorita.latitud)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ClasificacionTiposTests(TestCase):
+    """
+    El clasificador respeta la prioridad de categorías y limpiar_tipos solo escribe lo que cambia.
+    """
+
+    def test_prioridad_de_categorias(self):
+        self.assertEqual(clasificar_tipo('VVER-1000 (Pressurized water)'), 'PWR')
+        self.assertEqual(clasificar_tipo('Fast gas-cooled'), 'GCR')
+        self.assertEqual(clasificar_tipo('candu 6'), 'PHWR')
+        self.assertIsNone(clasificar_tipo('HTR-PM'))
+        self.assertIsNone(clasificar_tipo(None))
+
+    def test_limpiar_tipos_y_clasificacion_al_guardar(self):
+        Reactor.objects.bulk_create([
+            Reactor(nombre='A', pais='Spain', modelo='BWR-6', tipo_reactor_categoria='PWR'),
+            Reactor(nombre='B', pais='Spain', modelo='RBMK-1000'),
+            Reactor(nombre='C', pais='Spain', modelo='CANDU 6', tipo_reactor_categoria='PHWR'),
+        ])
+        salida = StringIO()
+        call_command('limpiar_tipos', lote=2, stdout=salida)
+        self.assertIn('Se actualizaron 2 reactores', salida.getvalue())
+        self.assertEqual(
+            dict(Reactor.objects.values_list('nombre', 'tipo_reactor_categoria')),
+            {'A': 'BWR', 'B': 'LWGR', 'C': 'PHWR'},
+        )
+
+        # Al crear un reactor sin categoría se clasifica a partir del modelo
+        nuevo = Reactor.objects.create(nombre='D', pais='Spain', modelo='AGR')
+        self.assertEqual(nuevo.tipo_reactor_categoria, 'GCR')
+
+
+class GeometriaMapaTests(TestCase):
+    """
+    La topología comparte las fronteras entre países y la geometría se sirve precomprimida.
+    """
+
+    def test_frontera_compartida_se_guarda_una_vez(self):
+        def cuadrado(x):
+            return {'type': 'Feature', 'properties': {'name': str(x)}, 'geometry': {
+                'type': 'Polygon', 'coordinates': [[[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]],
+            }}
+        topologia = construir_topologia({'features': [cuadrado(0), cuadrado(1)]}, cuantizacion=3)
+        anillos = [g['arcs'][0] for g in topologia['objects'][NOMBRE_OBJETO]['geometries']]
+        # El lado x=1 aparece en los dos cuadrados, una vez en cada sentido
+        compartidos = {i if i >= 0 else ~i for i in anillos[0]} & {i if i >= 0 else ~i for i in anillos[1]}
+        self.assertEqual(len(compartidos), 1)
+        self.assertEqual(len(topologia['arcs']), 3)
+
+    def test_negociacion_de_codificacion(self):
+        self.assertEqual(codificacion_preferida('gzip, deflate, br'), 'br')
+        self.assertEqual(codificacion_preferida('gzip, br;q=0'), 'gzip')
+        self.assertIsNone(codificacion_preferida('identity'))
+        self.assertIsNone(codificacion_preferida(None))
+
+    def test_sirve_la_version_precomprimida(self):
+        archivo = manifiesto()['niveles'][0]['archivo']
+        url = reverse('geometria_mapa', args=[archivo])
+
+        respuesta = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(respuesta['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', respuesta['Vary'])
+        self.assertIn('immutable', respuesta['Cache-Control'])
+        self.assertEqual(json.loads(gzip.decompress(b''.join(respuesta.streaming_content)))['type'], 'Topology')
+
+        respuesta = self.client.get(url)
+        self.assertFalse(respuesta.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(b''.join(respuesta.streaming_content))['type'], 'Topology')
+
+        self.assertEqual(self.client.get(reverse('geometria_mapa', args=['manifest.json'])).status_code, 404)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class DatosMapaTests(TestCase):
+    """
+    api_datos_mapa resuelve los países de la BD a IDs del mapa (alias o nombre) y agrega por país.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Reactor.objects.bulk_create([
+            Reactor(nombre='A', pais='United States Of America', status='Operational', potencia_neta=1000),
+            Reactor(nombre='B', pais='United States Of America', status='Permanent Shutdown', potencia_neta=500),
+            Reactor(nombre='C', pais='SPAIN', status='Under Construction'),
+            Reactor(nombre='D', pais='Atlantis', status='Operational', potencia_neta=10),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_datos_indexados_por_id_del_mapa(self):
+        datos = self.client.get(reverse('api_datos_mapa')).json()
+        self.assertEqual(datos['campos'], ['pais', 'reactores', 'mwe', 'operativos', 'parados'])
+        # El alias inicial (migración) resuelve USA; España se encuentra por nombre
+        self.assertEqual(datos['paises'], {
+            'USA': ['United States Of America', 2, 1500, 1, 1],
+            'ESP': ['SPAIN', 1, 0, 0, 0],
+        })
+        self.assertEqual(datos['sin_mapa'], ['Atlantis'])
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse('api_datos_mapa'))
+
+    def test_alias_editable(self):
+        with self.assertRaises(ValidationError):
+            AliasPais(nombre_bd='Atlantis', id_mapa='XXX').full_clean()
+
+        AliasPais.objects.create(nombre_bd='Atlantis', id_mapa='GRC')
+        datos = self.client.get(reverse('api_datos_mapa')).json()
+        self.assertEqual(datos['paises']['GRC'], ['Atlantis', 1, 10, 1, 0])
+        self.assertEqual(datos['sin_mapa'], [])
+
+    def test_indice_de_paises_trae_cada_pais_una_vez(self):
+        # El orden por defecto del modelo (por nombre) no debe colarse en el DISTINCT:
+        # si lo hace, la consulta devuelve una fila por reactor en lugar de una por país
+        with CaptureQueriesContext(connection) as consultas:
+            calcular_indice_paises()
+        sql = next(c['sql'] for c in consultas if 'DISTINCT' in c['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            self.assertEqual(sorted(fila[0] for fila in cursor.fetchall()), ['Atlantis', 'SPAIN', 'United States Of America'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ConsultaEspacialTests(TestCase):
+    """
+    El índice espacial coincide con una búsqueda exhaustiva (incluido el antimeridiano y los polos)
+    y alimenta las APIs de zona visible y reactores cercanos.
+    """
+
+    def test_indice_coincide_con_busqueda_exhaustiva(self):
+        azar = random.Random(7)
+        puntos = [(i, '', '', '', 0, azar.uniform(-89, 89), azar.uniform(-180, 180)) for i in range(2000)]
+        indice = IndiceEspacial(puntos, tamano_celda=2.0)
+        for _ in range(50):
+            sur = azar.uniform(-90, 60)
+            norte = sur + azar.uniform(0, 30)
+            oeste, este = azar.uniform(-180, 180), azar.uniform(-180, 180)
+            esperado = {
+                p[0] for p in puntos
+                if sur <= p[5] <= norte and (oeste <= p[6] <= este if oeste <= este else (p[6] >= oeste or p[6] <= este))
+            }
+            self.assertEqual({p[0] for p in indice.en_caja(sur, oeste, norte, este)}, esperado)
+
+            lat, lon = azar.uniform(-90, 90), azar.uniform(-180, 180)
+            radio = azar.choice([None, 300, 3000])
+            distancias = sorted((distancia_km(lat, lon, p[5], p[6]), p[0]) for p in puntos)
+            esperado = [pk for d, pk in distancias if radio is None or d <= radio][:5]
+            self.assertEqual([r[0] for _, r in indice.cercanos(lat, lon, k=5, radio_km=radio)], esperado)
+
+    def test_apis_de_caja_y_cercanos(self):
+        Reactor.objects.bulk_create([
+            Reactor(nombre='ALMARAZ-1', pais='Spain', latitud=39.81, longitud=-5.70),
+            Reactor(nombre='TRILLO-1', pais='Spain', latitud=40.70, longitud=-2.62),
+            Reactor(nombre='FUKUSHIMA DAIICHI-1', pais='Japan', latitud=37.42, longitud=141.03),
+            Reactor(nombre='SIN COORDENADAS', pais='Spain'),
+        ])
+
+        respuesta = self.client.get(reverse('api_reactores_en_caja'), {'bbox': '-10,35,5,44'})
+        self.assertEqual({r['nombre'] for r in respuesta.json()['reactores']}, {'ALMARAZ-1', 'TRILLO-1'})
+        respuesta = self.client.get(reverse('api_reactores_en_caja'), {'bbox': '-10,35,5,44', 'limite': 1})
+        self.assertTrue(respuesta.json()['truncado'])
+        # Caja que cruza el antimeridiano (de 140°E a 2°W)
+        respuesta = self.client.get(reverse('api_reactores_en_caja'), {'bbox': '140,30,-2,45'})
+        self.assertEqual({r['nombre'] for r in respuesta.json()['reactores']}, {'FUKUSHIMA DAIICHI-1', 'TRILLO-1', 'ALMARAZ-1'})
+
+        respuesta = self.client.get(reverse('api_reactores_cercanos'), {'lat': 40.42, 'lon': -3.70, 'k': 2})
+        cercanos = respuesta.json()['reactores']
+        self.assertEqual([r['nombre'] for r in cercanos], ['TRILLO-1', 'ALMARAZ-1'])
+        self.assertLess(cercanos[0]['distancia_km'], cercanos[1]['distancia_km'])
+        respuesta = self.client.get(reverse('api_reactores_cercanos'), {'lat': 40.42, 'lon': -3.70, 'radio_km': 50})
+        self.assertEqual(respuesta.json()['reactores'], [])
+
+        self.assertEqual(self.client.get(reverse('api_reactores_en_caja'), {'bbox': '1,2,3'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_reactores_cercanos'), {'lat': 95, 'lon': 0}).status_code, 400)
+        for parametros in ({'lat': 'nan', 'lon': 0}, {'lat': 40, 'lon': 'inf'}, {'lat': 40, 'lon': -3, 'radio_km': 'nan'},
+                           {'lat': 40, 'lon': -3, 'radio_km': 'inf'}):
+            self.assertEqual(self.client.get(reverse('api_reactores_cercanos'), parametros).status_code, 400)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TeselasTests(TestCase):
+    """
+    Las teselas agrupan los reactores, cada reactor cae en una sola tesela y se cachean por versión de datos.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_clusters_por_tesela(self):
+        Reactor.objects.bulk_create([
+            Reactor(nombre='ALMARAZ-1', latitud=39.8069, longitud=-5.6967, potencia_neta=1011),
+            Reactor(nombre='ALMARAZ-2', latitud=39.8070, longitud=-5.6968, potencia_neta=1006),
+            Reactor(nombre='FUKUSHIMA DAIICHI-1', latitud=37.42, longitud=141.03, potencia_neta=439),
+            Reactor(nombre='ANTIMERIDIANO', latitud=0.0, longitud=180.0),
+        ])
+
+        puntos = []
+        for x in range(2):
+            for y in range(2):
+                datos = self.client.get(reverse('api_tesela', args=[1, x, y])).json()
+                puntos += [dict(zip(datos['campos'], p)) for p in datos['puntos']]
+        self.assertEqual(sum(p['reactores'] for p in puntos), 4)
+
+        almaraz = next(p for p in puntos if p['mwe'] == 2017)
+        self.assertEqual(almaraz['reactores'], 2)
+        self.assertIsNone(almaraz['id'])
+        fukushima = next(p for p in puntos if p['mwe'] == 439)
+        self.assertEqual(fukushima['nombre'], 'FUKUSHIMA DAIICHI-1')
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse('api_tesela', args=[1, 0, 0]))
+        self.assertEqual(self.client.get(reverse('api_tesela', args=[1, 2, 0])).status_code, 404)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BusquedaTests(TestCase):
+    """
+    La búsqueda ordena por relevancia, ignora tildes y mayúsculas y tolera errores de tecleo.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Reactor.objects.bulk_create([
+            Reactor(nombre='ALMARAZ-1', pais='Spain', operador='Centrales Nucleares Almaraz-Trillo', modelo='WH 3LP'),
+            Reactor(nombre='ALMARAZ-2', pais='Spain', operador='Centrales Nucleares Almaraz-Trillo', modelo='WH 3LP'),
+            Reactor(nombre='TRILLO-1', pais='Spain', operador='Centrales Nucleares Almaraz-Trillo', modelo='PWR 3 loops'),
+            Reactor(nombre='FLAMANVILLE-3', pais='France', operador='Électricité de France', modelo='EPR'),
+            Reactor(nombre='KORI-2', pais='South Korea', nombre_alternativo='Gori 2', modelo='WH F'),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def buscar(self, q, **extra):
+        return self.client.get(reverse('api_buscar_reactores'), {'q': q, **extra}).json()['resultados']
+
+    def test_busqueda(self):
+        self.assertEqual([r['nombre'] for r in self.buscar('alma')][:2], ['ALMARAZ-1', 'ALMARAZ-2'])
+        # El nombre pesa más que el operador: TRILLO-1 primero, y los ALMARAZ por su operador
+        self.assertEqual([r['nombre'] for r in self.buscar('trillo')], ['TRILLO-1', 'ALMARAZ-1', 'ALMARAZ-2'])
+        self.assertEqual([r['nombre'] for r in self.buscar('electricite')], ['FLAMANVILLE-3'])
+        self.assertEqual([r['nombre'] for r in self.buscar('ÉLECTRICITÉ')], ['FLAMANVILLE-3'])
+        self.assertEqual([r['nombre'] for r in self.buscar('flamanvile')], ['FLAMANVILLE-3'])
+        self.assertEqual([r['nombre'] for r in self.buscar('gori')], ['KORI-2'])
+        self.assertEqual(self.buscar('a'), [])
+        self.assertEqual(len(self.buscar('almaraz', limite=1)), 1)
+        self.assertEqual(
+            self.client.get(reverse('api_buscar_reactores'), {'q': 'alma', 'limite': 0}).status_code, 400
+        )
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AnalisisTiposTests(TestCase):
+    """
+    El análisis de la enciclopedia se precalcula para todos los tipos a la vez, se sirve
+    desde la caché y se recalcula cuando cambian los reactores o su historial.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.a = Reactor.objects.create(
+            nombre='A-1', pais='Spain', tipo_reactor_categoria='PWR', potencia_neta=1000,
+            fecha_inicio_construccion=date(2000, 1, 1), fecha_primera_conexion=date(2005, 1, 1),
+        )
+        cls.b = Reactor.objects.create(
+            nombre='B-1', pais='France', tipo_reactor_categoria='PWR', potencia_neta=1500,
+            fecha_inicio_construccion=date(2000, 1, 1), fecha_primera_conexion=date(2010, 1, 1),
+        )
+        # Sin inicio de obra: no cuenta para el tiempo de construcción
+        cls.c = Reactor.objects.create(nombre='C-1', tipo_reactor_categoria='PWR', fecha_primera_conexion=date(2010, 6, 1))
+        Reactor.objects.create(nombre='D-1', pais='Japan', tipo_reactor_categoria='BWR', potencia_neta=1100)
+        HistorialRendimiento.objects.create(reactor=cls.a, ano=2020, electricidad_suministrada=100.0, factor_carga_anual=80.0)
+        HistorialRendimiento.objects.create(reactor=cls.b, ano=2020, electricidad_suministrada=200.0)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_analisis_de_un_tipo(self):
+        datos = datos_tipo('PWR')
+        estadisticas = datos['estadisticas']
+        self.assertEqual(estadisticas['unidades_totales'], 3)
+        self.assertEqual(estadisticas['potencia_total_gw'], 2.5)
+        self.assertEqual(estadisticas['paises_operadores'], ['France', 'Spain', None])
+        # La misma media que daba Avg() sobre la duración en SQL: (1827 + 3653) / 2 días
+        self.assertEqual(estadisticas['tiempo_promedio_construccion'], round((1827 + 3653) / 2 / 365.25, 1))
+        self.assertEqual(datos['grafica_rendimiento'], [{'ano': 2020, 'produccion_promedio': 150.0}])
+        self.assertEqual(datos['grafica_despliegue'], [{'ano_conexion': 2005, 'total': 1}, {'ano_conexion': 2010, 'total': 2}])
+        self.assertEqual([r['nombre'] for r in datos['lista_reactores']], ['A-1', 'B-1', 'C-1'])
+        self.assertEqual(datos['lista_reactores'][0]['factor_carga_vida'], 80.0)
+        self.assertIsNone(datos['lista_reactores'][2]['factor_carga_vida'])
+
+        # Un tipo sin reactores devuelve la misma estructura vacía
+        vacio = datos_tipo('FBR')
+        self.assertEqual(vacio['estadisticas']['unidades_totales'], 0)
+        self.assertIsNone(vacio['estadisticas']['tiempo_promedio_construccion'])
+        self.assertEqual(vacio['lista_reactores'], [])
+
+    def test_todos_los_tipos_desde_la_cache(self):
+        datos_tipo('PWR')
+        with self.assertNumQueries(0):
+            self.assertEqual(datos_tipo('BWR')['estadisticas']['unidades_totales'], 1)
+            respuesta = self.client.get(reverse('api_datos_tipo', args=['PWR']))
+            self.assertEqual(datos_tipo('FBR')['estadisticas']['unidades_totales'], 0)
+        self.assertEqual(respuesta.json()['estadisticas']['unidades_totales'], 3)
+
+        # Cada tipo tiene su propia clave: leer uno no carga los demás
+        version = version_datos()
+        self.assertEqual(cache.get(f'reactores:tipos:BWR:{version}')['estadisticas']['unidades_totales'], 1)
+        self.assertEqual(cache.get(f'reactores:tipos:{version}'), {'PWR', 'BWR'})
+
+        # Si se pierde la clave de un tipo, se recalcula
+        cache.delete(f'reactores:tipos:BWR:{version}')
+        self.assertEqual(datos_tipo('BWR')['estadisticas']['unidades_totales'], 1)
+
+    def test_cambios_invalidan_el_analisis(self):
+        datos_tipo('PWR')
+
+        HistorialRendimiento.objects.create(reactor=self.c, ano=2021, electricidad_suministrada=50.0)
+        self.assertEqual(datos_tipo('PWR')['grafica_rendimiento'][-1], {'ano': 2021, 'produccion_promedio': 50.0})
+
+        self.c.tipo_reactor_categoria = 'BWR'
+        self.c.save()
+        self.assertEqual(datos_tipo('PWR')['estadisticas']['unidades_totales'], 2)
+        self.assertEqual(datos_tipo('BWR')['estadisticas']['unidades_totales'], 2)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AnaliticaFlotaTests(TestCase):
+    """
+    Percentiles, series y agregados calculados sobre la matriz de la flota.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.a, cls.b, cls.c = Reactor.objects.bulk_create([
+            Reactor(nombre='A-1', pais='Spain', tipo_reactor_categoria='PWR'),
+            Reactor(nombre='B-1', pais='Spain', tipo_reactor_categoria='PWR'),
+            Reactor(nombre='C-1', pais='France', tipo_reactor_categoria='PWR'),
+        ])
+        HistorialRendimiento.objects.bulk_create([
+            HistorialRendimiento(reactor=cls.a, ano=2018, electricidad_suministrada=100.0, factor_carga_anual=90.0),
+            HistorialRendimiento(reactor=cls.a, ano=2020, electricidad_suministrada=200.0, factor_carga_anual=70.0),
+            HistorialRendimiento(reactor=cls.b, ano=2019, electricidad_suministrada=None, factor_carga_anual=60.0),
+            HistorialRendimiento(reactor=cls.c, ano=2020, electricidad_suministrada=50.0, factor_carga_anual=95.0),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, nombre, args=(), **params):
+        return self.client.get(reverse(nombre, args=args), params).json()
+
+    def test_percentil_dentro_del_grupo(self):
+        # Medias de vida: A 80, B 60, C 95 (los tres PWR)
+        datos = self.get('api_percentil_reactor', [self.a.pk])
+        self.assertEqual(
+            (datos['grupo'], datos['valor'], datos['percentil'], datos['posicion'], datos['total']),
+            ('PWR', 80.0, 50.0, 2, 3),
+        )
+        datos = self.get('api_percentil_reactor', [self.a.pk], por='pais', metrica='produccion', ano=2020)
+        self.assertEqual((datos['grupo'], datos['percentil'], datos['total']), ('Spain', 50.0, 1))
+        self.assertIsNone(self.get('api_percentil_reactor', [self.b.pk], metrica='produccion')['percentil'])
+        self.assertEqual(self.client.get(reverse('api_percentil_reactor', args=[0])).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse('api_percentil_reactor', args=[self.a.pk]), {'metrica': 'x'}).status_code, 400
+        )
+
+    def test_serie_con_media_movil_y_variacion(self):
+        datos = self.get('api_serie_reactor', [self.a.pk], metrica='factor_carga', ventana=2)
+        self.assertEqual(datos['anos'], [2018, 2019, 2020])
+        self.assertEqual(datos['valores'], [90.0, None, 70.0])
+        self.assertEqual(datos['media_movil'], [90.0, 90.0, 70.0])
+        self.assertEqual(datos['variacion_anual'], [None, None, None])
+
+    def test_agregados_y_enciclopedia(self):
+        datos = self.get('api_agregado_flota', por='pais', funcion='suma')
+        self.assertEqual(datos['anos'], [2018, 2019, 2020])
+        self.assertEqual(datos['grupos'], {'France': [None, None, 50.0], 'Spain': [100.0, None, 200.0]})
+        # La enciclopedia muestra los mismos años que antes daba el AVG de SQL (2019 tiene
+        # registro pero sin producción)
+        rendimiento = self.get('api_datos_tipo', ['PWR'])['grafica_rendimiento']
+        self.assertEqual(rendimiento, [
+            {'ano': 2018, 'produccion_promedio': 100.0},
+            {'ano': 2019, 'produccion_promedio': None},
+            {'ano': 2020, 'produccion_promedio': 125.0},
+        ])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CicloVidaTests(TestCase):
+    """
+    La línea de tiempo se emite como JSON columnar por bloques, con países y estados
+    como índices de sus diccionarios y el país filtrado en SQL.
+    """
+
+    @staticmethod
+    def decodificar(trozos):
+        datos = json.loads(''.join(trozos))
+        return [
+            (nombre, datos['paises'][pais], datos['estados'][estado], EPOCA + timedelta(days=inicio), EPOCA + timedelta(days=fin))
+            for bloque in datos['bloques']
+            for nombre, pais, estado, inicio, fin in zip(bloque['nombre'], bloque['pais'], bloque['estado'], bloque['inicio'], bloque['fin'])
+        ]
+
+    def test_columnas_por_bloques(self):
+        filas = [
+            ('ALMARAZ-1', 'Spain', date(1981, 5, 1), None),
+            ('FESSENHEIM-1', 'France', date(1977, 4, 6), date(2020, 2, 22)),
+            ('TRILLO-1', 'Spain', date(1988, 5, 23), None),
+        ]
+        trozos = list(json_columnar_ciclo_vida(filas, tamano_bloque=2))
+        datos = json.loads(''.join(trozos))
+        self.assertEqual([len(bloque['nombre']) for bloque in datos['bloques']], [2, 1])
+        self.assertEqual(datos['paises'], ['Spain', 'France'])
+        self.assertEqual(datos['bloques'][1]['pais'], [0])
+
+        operativo, desmantelado = ESTADOS[1], ESTADOS[0]
+        self.assertEqual(self.decodificar(trozos), [
+            ('ALMARAZ-1', 'Spain', operativo, date(1981, 5, 1), date(1981, 5, 1) + timedelta(days=VIDA_UTIL_ANOS * 365.25)),
+            ('FESSENHEIM-1', 'France', desmantelado, date(1977, 4, 6), date(2020, 2, 22)),
+            ('TRILLO-1', 'Spain', operativo, date(1988, 5, 23), date(1988, 5, 23) + timedelta(days=VIDA_UTIL_ANOS * 365.25)),
+        ])
+        self.assertEqual(self.decodificar(json_columnar_ciclo_vida([])), [])
+
+    def test_api_filtra_el_pais_en_sql(self):
+        Reactor.objects.create(nombre='ALMARAZ-1', pais='Spain', fecha_primera_conexion=date(1981, 5, 1))
+        Reactor.objects.create(nombre='ZORITA', pais='Spain', fecha_primera_conexion=date(1968, 7, 14),
+                               fecha_cierre_permanente=date(2006, 4, 30))
+        Reactor.objects.create(nombre='FLAMANVILLE-3', pais='France')
+        Reactor.objects.create(nombre='FESSENHEIM-1', pais='France', fecha_primera_conexion=date(1977, 4, 6))
+
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('api_datos_ciclo_vida'), {'pais': 'Spain'})
+            intervalos = self.decodificar(chunk.decode() for chunk in respuesta.streaming_content)
+        self.assertEqual(len(consultas), 1)
+        self.assertIn("'Spain'", consultas[0]['sql'])
+        self.assertEqual([(nombre, estado) for nombre, _, estado, _, _ in intervalos],
+                         [('ALMARAZ-1', ESTADOS[1]), ('ZORITA', ESTADOS[0])])
+
+        # Sin país vienen todos los conectados; FLAMANVILLE-3 aún no lo está
+        respuesta = self.client.get(reverse('api_datos_ciclo_vida'))
+        intervalos = self.decodificar(chunk.decode() for chunk in respuesta.streaming_content)
+        self.assertEqual([nombre for nombre, *_ in intervalos], ['ALMARAZ-1', 'FESSENHEIM-1', 'ZORITA'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ProyeccionCapacidadTests(TestCase):
+    """
+    Curva de potencia instalada por año con distintos escenarios de vida útil.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Reactor.objects.bulk_create([
+            Reactor(nombre='A-1', pais='Spain', tipo_reactor_categoria='PWR', potencia_neta=1000,
+                    fecha_primera_conexion=date(2000, 6, 1)),
+            Reactor(nombre='B-1', pais='Spain', tipo_reactor_categoria='BWR', potencia_neta=500,
+                    fecha_primera_conexion=date(2001, 1, 1), fecha_cierre_permanente=date(2003, 1, 1)),
+            Reactor(nombre='C-1', pais='France', tipo_reactor_categoria='PWR', potencia_neta=200,
+                    fecha_primera_conexion=date(2002, 1, 1)),
+            # Sin conectar: no cuenta
+            Reactor(nombre='D-1', pais='France', tipo_reactor_categoria='PWR', potencia_neta=900),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def proyeccion(self, **params):
+        return self.client.get(reverse('api_proyeccion_capacidad'), params).json()
+
+    def test_curva_total_y_vida_util(self):
+        datos = self.proyeccion(vida=40)
+        self.assertEqual(datos['anos'][0], 2000)
+        self.assertEqual(datos['anos'][-1], 2100)
+        total = dict(zip(datos['anos'], datos['series']['total']))
+        # B-1 cierra en 2003; A-1 llega a 2039 con 40 años y C-1 a 2041
+        self.assertEqual(
+            [total[ano] for ano in (2000, 2001, 2002, 2003, 2039, 2040, 2041, 2042)],
+            [1000, 1500, 1700, 1200, 1200, 200, 200, 0],
+        )
+        datos = self.proyeccion(vida=80)
+        self.assertEqual(datos['series']['total'][datos['anos'].index(2079)], 1200)
+
+    def test_desglose_excepciones_por_tipo_y_filtros(self):
+        datos = self.proyeccion(vida=60, vida_tipo='PWR:10', por='pais')
+        self.assertEqual(datos['vida_por_tipo'], {'PWR': 10})
+        anos = datos['anos']
+        self.assertEqual(datos['series']['Spain'][anos.index(2010)], 0)
+        self.assertEqual(datos['series']['France'][anos.index(2011)], 200)
+        self.assertEqual(datos['series']['France'][anos.index(2012)], 0)
+
+        datos = self.proyeccion(pais='Spain', por='tipo')
+        self.assertEqual(sorted(datos['series']), ['BWR', 'PWR'])
+        self.assertEqual(self.client.get(reverse('api_proyeccion_capacidad'), {'vida_tipo': 'PWR'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_proyeccion_capacidad'), {'vida': 0}).status_code, 400)
+
+    def test_solo_se_cachean_los_escenarios_de_la_pagina(self):
+        for parametros in ({'pais': 'Atlantis'}, {'tipo': 'XYZ'}):
+            respuesta = self.client.get(reverse('api_proyeccion_capacidad'), parametros)
+            self.assertEqual(respuesta.status_code, 400)
+            self.assertFalse(respuesta.json()['success'])
+
+        self.proyeccion(vida=60, por='tipo', pais='Spain')
+        claves = len(cache._cache)
+        with self.assertNumQueries(0):
+            self.proyeccion(vida=60, por='tipo', pais='Spain')
+        # Vidas fuera de los escenarios o con excepciones por tipo se calculan sin guardarse
+        for parametros in ({'vida': 41}, {'vida': 42}, {'vida': 60, 'vida_tipo': 'PWR:10'}):
+            self.assertTrue(self.proyeccion(**parametros)['success'])
+        self.assertEqual(len(cache._cache), claves)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ExportacionHistorialTests(TestCase):
+    """
+    Exportación en streaming del historial en CSV, NDJSON, Parquet y Arrow.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        espana = Reactor.objects.create(nombre='ES-1', pais='Spain', tipo_reactor_categoria='PWR', potencia_neta=1000)
+        francia = Reactor.objects.create(nombre='FR-1', pais='France', tipo_reactor_categoria='BWR')
+        HistorialRendimiento.objects.bulk_create([
+            HistorialRendimiento(reactor=reactor, ano=ano, electricidad_suministrada=ano - 2000.5, factor_carga_anual=80.0)
+            for reactor in (espana, francia) for ano in range(2010, 2015)
+        ])
+        Reactor.objects.create(nombre='SIN-HISTORIAL', pais='Spain')
+
+    def setUp(self):
+        cache.clear()
+
+    def descargar(self, **params):
+        respuesta = self.client.get(reverse('api_exportar_historial'), params)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        return respuesta, b''.join(respuesta.streaming_content)
+
+    def test_csv_con_filtros_en_sql(self):
+        respuesta, cuerpo = self.descargar(formato='csv', pais='Spain', desde=2011, hasta=2013)
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('historial_reactores.csv', respuesta['Content-Disposition'])
+        lineas = cuerpo.decode().splitlines()
+        self.assertEqual(lineas[0].split(','), NOMBRES_COLUMNAS)
+        self.assertEqual([linea.split(',')[7] for linea in lineas[1:]], ['2011', '2012', '2013'])
+        self.assertTrue(all(linea.startswith(f'{Reactor.objects.get(nombre="ES-1").pk},ES-1,Spain,PWR') for linea in lineas[1:]))
+
+        _, cuerpo = self.descargar(formato='csv', tipo='PHWR')
+        self.assertEqual(cuerpo.decode().splitlines(), [','.join(NOMBRES_COLUMNAS)])
+
+    def test_ndjson_y_bloques(self):
+        _, cuerpo = self.descargar(formato='ndjson', tipo='BWR')
+        filas = [json.loads(linea) for linea in cuerpo.decode().splitlines()]
+        self.assertEqual(len(filas), 5)
+        self.assertEqual(filas[0]['nombre'], 'FR-1')
+        self.assertIsNone(filas[0]['potencia_neta'])
+        self.assertEqual([f['ano'] for f in filas], list(range(2010, 2015)))
+
+        # El resultado no depende del tamaño de bloque, solo cuántos trozos se emiten
+        for formato in ('csv', 'ndjson'):
+            trozos = list(exportar(filas_exportacion(tamano_bloque=3), formato, tamano_bloque=3))
+            self.assertEqual(b''.join(trozos), b''.join(exportar(filas_exportacion(), formato)))
+            self.assertGreater(len(trozos), 3)
+
+    def test_formato_invalido(self):
+        respuesta = self.client.get(reverse('api_exportar_historial'), {'formato': 'xml'})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(respuesta.json()['success'])
+        self.assertEqual(self.client.get(reverse('api_exportar_historial'), {'desde': 'ayer'}).status_code, 400)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow no está instalado')
+    def test_parquet_y_arrow(self):
+        import pyarrow.parquet
+
+        _, cuerpo = self.descargar(formato='parquet', desde=2014)
+        tabla = pyarrow.parquet.read_table(pyarrow.BufferReader(cuerpo))
+        self.assertEqual(tabla.column_names, NOMBRES_COLUMNAS)
+        self.assertEqual(sorted(tabla.column('nombre').to_pylist()), ['ES-1', 'FR-1'])
+        self.assertEqual(tabla.column('electricidad_suministrada').to_pylist(), [13.5, 13.5])
+
+        respuesta, cuerpo = self.descargar(formato='arrow')
+        self.assertIn('historial_reactores.arrows', respuesta['Content-Disposition'])
+        self.assertEqual(pyarrow.ipc.open_stream(cuerpo).read_all().num_rows, 10)
+
+    def test_comando_exportar_historial(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = Path(directorio) / 'historial.csv'
+            salida = StringIO()
+            call_command('exportar_historial', str(ruta), '--pais', 'France', '--hasta', '2011', stdout=salida)
+            self.assertEqual(len(ruta.read_text().splitlines()), 3)
+        self.assertIn('2 filas', salida.getvalue())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class InstrumentacionTests(TestCase):
+    """
+    Server-Timing, registro de peticiones lentas y métricas de Prometheus del middleware.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reactor = Reactor.objects.create(nombre='MED-1', pais='Spain', tipo_reactor_categoria='PWR')
+        HistorialRendimiento.objects.create(reactor=cls.reactor, ano=2020, electricidad_suministrada=7.0)
+
+    def setUp(self):
+        cache.clear()
+        metricas.vaciar()
+
+    def tramos(self, respuesta):
+        return {
+            parte.split(';')[0].strip(): parte
+            for parte in respuesta['Server-Timing'].split(',')
+        }
+
+    def test_server_timing_cuenta_consultas_y_tramos(self):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('api_reactores'), {'ids': self.reactor.pk, 'include': 'historial'})
+        tramos = self.tramos(respuesta)
+        self.assertIn(f'desc="{len(consultas)} consultas"', tramos['db'])
+        self.assertEqual(set(tramos), {'db', 'json', 'app', 'total'})
+
+        respuesta = self.client.get(reverse('enciclopedia_tipos'))
+        self.assertIn('plantilla', self.tramos(respuesta))
+
+    def test_peticiones_lentas_en_json(self):
+        with override_settings(UMBRAL_PETICION_LENTA_MS=0):
+            with self.assertLogs('reactores.middleware', 'WARNING') as registros:
+                self.client.get(reverse('api_datos_tipo', args=['PWR']))
+        registro = json.loads(registros.records[0].getMessage())
+        self.assertEqual(registro['endpoint'], 'api_datos_tipo')
+        self.assertEqual(registro['estado'], 200)
+        self.assertGreater(registro['consultas'], 0)
+
+    def test_metricas_prometheus(self):
+        for _ in range(3):
+            self.client.get(reverse('api_reactor_historial', args=[self.reactor.pk]))
+        respuesta = self.client.get(reverse('api_datos_ciclo_vida'))
+        b''.join(respuesta.streaming_content)
+
+        texto = self.client.get(reverse('metricas')).content.decode()
+        self.assertIn('atlas_peticion_duracion_segundos_bucket{endpoint="api_reactor_historial",le="+Inf"} 3', texto)
+        self.assertIn('atlas_peticion_latencia_reciente_segundos_count{endpoint="api_reactor_historial"} 3', texto)
+        self.assertIn('atlas_peticion_latencia_reciente_segundos_sum{endpoint="api_reactor_historial"}', texto)
+        self.assertRegex(texto, r'atlas_peticion_latencia_reciente_segundos\{endpoint="api_reactor_historial",quantile="0.99"\} \d')
+        # Las consultas hechas mientras se emite una respuesta en streaming también cuentan
+        self.assertIn('atlas_consultas_sql_total{endpoint="api_datos_ciclo_vida"} 1', texto)
+
+        # Solo desde IPS_METRICAS
+        self.assertEqual(self.client.get(reverse('metricas'), REMOTE_ADDR='10.0.0.1').status_code, 404)
+
+        # Con TOKEN_METRICAS la IP no cuenta (detrás de un proxy siempre sería la suya)
+        with self.settings(TOKEN_METRICAS='secreto'):
+            self.assertEqual(self.client.get(reverse('metricas')).status_code, 404)
+            self.assertEqual(self.client.get(reverse('metricas'), HTTP_AUTHORIZATION='Bearer otro').status_code, 404)
+            respuesta = self.client.get(reverse('metricas'), REMOTE_ADDR='10.0.0.1', HTTP_AUTHORIZATION='Bearer secreto')
+            self.assertEqual(respuesta.status_code, 200)
+
+    def test_sum_y_count_del_summary_no_bajan_al_llenarse_la_ventana(self):
+        metricas_locales = Metricas()
+        for _ in range(VENTANA_CUANTILES + 10):
+            metricas_locales.registrar('api', 0.5)
+        texto = metricas_locales.texto_prometheus()
+        self.assertIn(f'atlas_peticion_latencia_reciente_segundos_count{{endpoint="api"}} {VENTANA_CUANTILES + 10}', texto)
+        self.assertIn(f'atlas_peticion_latencia_reciente_segundos_sum{{endpoint="api"}} {(VENTANA_CUANTILES + 10) * 0.5:.6f}', texto)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class VistasAsyncTests(TestCase):
+    """
+    Las variantes asíncronas (api_async) responden lo mismo que las vistas síncronas.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_flota(6, anos=3)
+
+    def setUp(self):
+        cache.clear()
+
+    def pedir_async(self, url):
+        with override_settings(ROOT_URLCONF='reactores.urls_async'):
+            return async_to_sync(self.async_client.get)(url)
+
+    def test_mismas_respuestas_que_las_sincronas(self):
+        sincronas = dict(urls_a_medir())
+        with override_settings(ROOT_URLCONF='reactores.urls_async'):
+            asincronas = {nombre: url for nombre, url in urls_a_medir() if nombre in VISTAS}
+        self.assertEqual(set(asincronas), set(VISTAS))
+
+        for nombre, url in asincronas.items():
+            with self.subTest(ruta=nombre):
+                self.assertTrue(iscoroutinefunction(resolve(url.split('?')[0], 'reactores.urls_async').func))
+                cache.clear()
+                respuesta = self.pedir_async(url)
+                self.assertEqual(respuesta.status_code, 200)
+                # Los enlaces del HTML no llevan el prefijo de config/urls.py con urls_async
+                esperada = self.client.get(sincronas[nombre]).content.replace(b'/comparador/', b'/')
+                self.assertEqual(respuesta.content, esperada)
+                # Y con la caché caliente (la síncrona la ha dejado llena)
+                self.assertEqual(self.pedir_async(url).content, esperada)
+
+    def test_errores_y_peticiones_condicionales(self):
+        with override_settings(ROOT_URLCONF='reactores.urls_async'):
+            url = reverse('api_reactores')
+        respuesta = self.pedir_async(url + '?ids=1,x')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(respuesta.json()['success'])
+
+        respuesta = self.pedir_async(url + '?ids=1')
+        self.assertIn('no-cache', respuesta['Cache-Control'])
+        with override_settings(ROOT_URLCONF='reactores.urls_async'):
+            condicional = async_to_sync(self.async_client.get)(url + '?ids=1', headers={'if-none-match': respuesta['ETag']})
+        self.assertEqual(condicional.status_code, 304)
+
+    def test_estado_de_los_datos_una_vez_y_fuera_del_bucle(self):
+        lecturas = []
+
+        def estado():
+            # Desde el bucle de eventos habría un bucle en marcha en este hilo
+            try:
+                asyncio.get_running_loop()
+                lecturas.append('bucle')
+            except RuntimeError:
+                lecturas.append('hilo')
+            return estado_real()
+
+        estado_real = decorators.estado_datos
+        with unittest.mock.patch.object(decorators, 'estado_datos', estado):
+            self.client.get(reverse('api_reactores_por_pais'), {'pais': 'Spain'})
+            self.assertEqual(lecturas, ['hilo'])
+            with override_settings(ROOT_URLCONF='reactores.urls_async'):
+                url = reverse('api_reactores_por_pais')
+            self.assertEqual(self.pedir_async(url + '?pais=Spain').status_code, 200)
+        self.assertEqual(lecturas, ['hilo', 'hilo'])
+
+    def test_listas_vacias_sin_parametros(self):
+        for nombre, clave in [('api_reactores_por_pais', 'reactores'), ('api_paises_por_tipo', 'paises'),
+                              ('api_reactores_por_tipo_y_pais', 'reactores')]:
+            with self.subTest(nombre=nombre), self.assertNumQueries(0):
+                self.assertEqual(self.client.get(reverse(nombre)).json(), {clave: []})
+                with override_settings(ROOT_URLCONF='reactores.urls_async'):
+                    url = reverse(nombre)
+                self.assertEqual(self.pedir_async(url).json(), {clave: []})
+
+    def test_server_timing_cuenta_las_consultas_asincronas(self):
+        reactor = Reactor.objects.order_by('pk').first()
+        with override_settings(ROOT_URLCONF='reactores.urls_async'):
+            url = reverse('api_reactores') + f'?ids={reactor.pk}&include=historial'
+        respuesta = self.pedir_async(url)
+        self.assertIn('desc="2 consultas"', respuesta['Server-Timing'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CachePaginasTests(TestCase):
+    """
+    Las páginas no consultan la BD con la caché caliente y, con CACHE_PAGINAS, se sirven
+    enteras desde la caché a los anónimos hasta que cambian los datos.
+    """
+
+    PAGINAS = ['dashboard', 'atlas', 'comparador', 'ciclo_vida', 'enciclopedia_tipos']
+
+    @classmethod
+    def setUpTestData(cls):
+        Reactor.objects.create(nombre='PAG-1', pais='Spain', tipo_reactor_categoria='PWR')
+        Reactor.objects.create(nombre='PAG-2', pais=None, tipo_reactor_categoria='BWR')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_paginas_calientes_sin_consultas(self):
+        for pagina in self.PAGINAS:
+            with self.subTest(pagina=pagina):
+                self.client.get(reverse(pagina))
+                with self.assertNumQueries(0):
+                    self.assertEqual(self.client.get(reverse(pagina)).status_code, 200)
+
+    def test_desplegables_se_actualizan_con_los_datos(self):
+        contenido = self.client.get(reverse('atlas')).content.decode()
+        self.assertIn('<option value="Spain">', contenido)
+        self.assertNotIn('<option value="None">', contenido)
+
+        Reactor.objects.create(nombre='PAG-3', pais='France', tipo_reactor_categoria='PHWR')
+        self.assertIn('<option value="France">', self.client.get(reverse('atlas')).content.decode())
+        self.assertIn('<option value="PHWR">', self.client.get(reverse('comparador')).content.decode())
+
+    @override_settings(CACHE_PAGINAS=True)
+    def test_pagina_completa_para_anonimos(self):
+        url = reverse('comparador')
+        primera = self.client.get(url)
+        self.assertIn('plantilla', primera['Server-Timing'])
+        segunda = self.client.get(url)
+        self.assertNotIn('plantilla', segunda['Server-Timing'])
+        self.assertEqual(segunda.content, primera.content)
+
+        # Una consulta cualquiera no crea otra entrada en la caché: se renderiza sin guardarse
+        claves = len(cache._cache)
+        for i in range(3):
+            self.assertIn('plantilla', self.client.get(url, {'x': i})['Server-Timing'])
+        self.assertEqual(len(cache._cache), claves)
+
+        # Una importación (o cualquier cambio en los reactores) invalida la página
+        Reactor.objects.create(nombre='PAG-3', pais='France', tipo_reactor_categoria='PHWR')
+        self.assertIn('<option value="PHWR">', self.client.get(url).content.decode())
+
+        # Los usuarios identificados siempre ven la página recién renderizada
+        self.client.force_login(User.objects.create_user('editor'))
+        self.assertIn('plantilla', self.client.get(url)['Server-Timing'])
+
+    @override_settings(CACHE_PAGINAS=True)
+    def test_geometria_regenerada_invalida_la_pagina(self):
+        url = reverse('atlas')
+        self.client.get(url)
+        self.assertNotIn('plantilla', self.client.get(url)['Server-Timing'])
+
+        # Los ficheros con el hash anterior ya no existen: el atlas no puede salir de la caché
+        nuevo = {'origen': 'countries.geo.json', 'niveles': [{'zoom_max': 18, 'archivo': 'paises-z18.nuevo.topo.json'}]}
+        with unittest.mock.patch.object(geometria, 'manifiesto', return_value=nuevo), \
+                unittest.mock.patch.object(views, 'manifiesto', return_value=nuevo):
+            respuesta = self.client.get(url)
+        self.assertIn('plantilla', respuesta['Server-Timing'])
+        self.assertIn('paises-z18.nuevo.topo.json', respuesta.content.decode())
+
+    def test_cargador_de_plantillas_con_cache(self):
+        cargador = engines['django'].engine.template_loaders[0]
+        self.assertIsInstance(cargador, CargadorConCache)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BenchmarkTests(TestCase):
+    """
+    Flota sintética, recorrido de todas las rutas y comparación de informes.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def flota(self):
+        return list(Reactor.objects.order_by('nombre').values_list(
+            'nombre', 'pais', 'tipo_reactor_categoria', 'latitud', 'historial__ano', 'historial__factor_carga_anual',
+        ))
+
+    def test_flota_sintetica_reproducible(self):
+        self.assertEqual(generar_flota(12, anos=4, semilla=7, lote=5), 48)
+        self.assertEqual(ResumenRendimiento.objects.count(), 12)
+        primera = self.flota()
+        Reactor.objects.all().delete()
+        generar_flota(12, anos=4, semilla=7, lote=5)
+        self.assertEqual(self.flota(), primera)
+
+    def test_todas_las_rutas_responden(self):
+        generar_flota(5, anos=3)
+        rutas = urls_a_medir()
+        self.assertEqual(len(rutas), len([p for p in urls.urlpatterns if p.name]))
+        for nombre, url in rutas:
+            with self.subTest(ruta=nombre):
+                respuesta = self.client.get(url)
+                if respuesta.streaming:
+                    b''.join(respuesta.streaming_content)
+                self.assertEqual(respuesta.status_code, 200, url)
+
+    def test_caches_aisladas_no_tocan_las_reales(self):
+        with tempfile.TemporaryDirectory() as datos, tempfile.TemporaryDirectory() as estado:
+            configuracion = {
+                'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': datos},
+                'estado': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': estado},
+            }
+            with override_settings(CACHES=configuracion):
+                version = version_datos()
+                with self.assertRaises(KeyboardInterrupt), caches_aisladas():
+                    invalidar_datos()
+                    cachear('dashboard', lambda: 'flota sintética')
+                    raise KeyboardInterrupt
+                self.assertEqual(version_datos(), version)
+                self.assertEqual(cachear('dashboard', lambda: 'datos reales'), 'datos reales')
+
+    def test_comparar_informes(self):
+        base = {'escenarios': {'rutas': {'api': {
+            'caliente': {'mediana_ms': 10.0, 'max_ms': 10.0}, 'consultas_frio': 2, 'pico_memoria_kb': 100.0,
+        }}}}
+        actual = {'escenarios': {'rutas': {'api': {
+            'caliente': {'mediana_ms': 11.5, 'max_ms': 50.0}, 'consultas_frio': 3, 'pico_memoria_kb': 400.0,
+        }}}}
+        # 15 % más lento no supera el umbral; max_ms no se compara; una consulta de más sí cuenta
+        self.assertEqual(
+            comparar(base, actual, umbral=0.2),
+            [('rutas.api.consultas_frio', 2, 3), ('rutas.api.pico_memoria_kb', 100.0, 400.0)],
+        )
+        self.assertIn(('rutas.api.caliente.mediana_ms', 10.0, 11.5), comparar(base, actual, umbral=0.1))
+
+        # Con otra escala (o base de datos, años, semilla o repeticiones) no se compara nada
+        with self.assertRaisesMessage(CommandError, 'escala (1k → 10k)'):
+            comparar({**base, 'escala': '1k'}, {**actual, 'escala': '10k'})
+        with self.assertRaisesMessage(CommandError, 'base_de_datos'):
+            comparar({**base, 'base_de_datos': 'sqlite'}, {**actual, 'base_de_datos': 'postgresql'})
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PlanesConsultaTests(TestCase):
+    """
+    Ejecuta cada API caliente, captura sus consultas y comprueba con EXPLAIN que
+    ninguna recorre entera la tabla de reactores o la de historial.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        paises = ['Spain', 'France', 'Japan', 'United States Of America']
+        tipos = ['PWR', 'BWR', 'PHWR']
+        Reactor.objects.bulk_create([
+            Reactor(
+                nombre=f'PLAN-{i}', pais=paises[i % len(paises)], tipo_reactor_categoria=tipos[i % len(tipos)],
+                status='Operational', potencia_neta=900 + i, fecha_primera_conexion=date(1980 + i % 30, 1, 1),
+            )
+            for i in range(60)
+        ])
+        HistorialRendimiento.objects.bulk_create([
+            HistorialRendimiento(reactor=reactor, ano=ano, electricidad_suministrada=7.0, factor_carga_anual=85.0)
+            for reactor in Reactor.objects.all() for ano in range(2015, 2020)
+        ])
+        cls.reactor = Reactor.objects.get(nombre='PLAN-0')
+
+    def setUp(self):
+        cache.clear()
+        self.tablas = [Reactor._meta.db_table, HistorialRendimiento._meta.db_table]
+
+    def urls_calientes(self):
+        # (url, si lee la tabla entera a propósito): las agregaciones de todo el parque
+        # pueden recorrer un índice completo, pero nunca la tabla a secas
+        r = self.reactor
+        return [
+            (reverse('api_reactores_por_pais') + f'?pais={r.pais}', False),
+            (reverse('api_paises_por_tipo') + f'?tipo={r.tipo_reactor_categoria}', False),
+            (reverse('api_reactores_por_tipo_y_pais') + f'?tipo={r.tipo_reactor_categoria}&pais={r.pais}', False),
+            (reverse('api_reactores') + f'?ids={r.pk}&include=historial', False),
+            (reverse('api_reactor_historial', args=[r.pk]), False),
+            (reverse('api_datos_ciclo_vida') + f'?pais={r.pais}', False),
+            (reverse('api_exportar_historial') + f'?pais={r.pais}&desde=2016', False),
+            (reverse('api_datos_mapa'), True),
+            (reverse('api_datos_tipo', args=[r.tipo_reactor_categoria]), True),
+        ]
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Con tan pocas filas PostgreSQL siempre preferiría un Seq Scan: lo
+                # penalizamos para ver si existe un índice que la consulta pueda usar
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql)
+            else:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return '\n'.join(str(fila[-1]) for fila in cursor.fetchall())
+
+    def escaneos_completos(self, plan, recorre_todo):
+        if connection.vendor == 'postgresql':
+            patron = r'Seq Scan on "?({})"?\b'
+        elif recorre_todo:
+            # "SCAN tabla" a secas recorre la tabla; "SCAN tabla USING ... INDEX", un índice
+            patron = r'\bSCAN "?({})"?(?! USING)'
+        else:
+            # Una consulta filtrada tiene que buscar en un índice (SEARCH), no recorrerlo
+            patron = r'\bSCAN "?({})"?\b'
+        return re.findall(patron.format('|'.join(map(re.escape, self.tablas))), plan)
+
+    def test_apis_calientes_usan_indices(self):
+        for url, recorre_todo in self.urls_calientes():
+            cache.clear()
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as consultas:
+                    respuesta = self.client.get(url)
+                    if respuesta.streaming:
+                        b''.join(respuesta.streaming_content)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertTrue(consultas.captured_queries)
+                for consulta in consultas.captured_queries:
+                    plan = self.plan(consulta['sql'])
+                    self.assertFalse(
+                        self.escaneos_completos(plan, recorre_todo),
+                        f"Recorrido completo en {url}:\n{consulta['sql']}\n{plan}",
+                    )
@@ -1,6 +1,8 @@
 # En reactores/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
+from .api_async import con_vistas_async
 
 urlpatterns = [
     # --- VISTAS DE PÁGINAS PRINCIPALES ---
@@ -18,12 +20,33 @@ urlpatterns = [
     # API para el mapa del atlas (colores y conteo)
     path('api/datos-mapa/', views.api_datos_mapa, name='api_datos_mapa'),
     
+    # Geometría de países simplificada y precomprimida (nombres con hash, ver construir_geometria)
+    path('geometria/<str:archivo>', views.geometria_mapa, name='geometria_mapa'),
+
     # API para obtener reactores de un país (usada por el atlas)
     path('api/reactores-por-pais/', views.api_reactores_por_pais, name='api_reactores_por_pais'),
     
     path('api/paises-por-tipo/', views.api_paises_por_tipo, name='api_paises_por_tipo'),
     path('api/reactores-por-tipo-y-pais/', views.api_reactores_por_tipo_y_pais, name='api_reactores_por_tipo_y_pais'),
     
+    # API por lotes: datos (y opcionalmente historial) de varios reactores a la vez
+    path('api/reactores/', views.api_reactores, name='api_reactores'),
+
+    # Búsqueda de reactores por texto (autocompletado)
+    path('api/buscar/', views.api_buscar_reactores, name='api_buscar_reactores'),
+
+    # Consultas espaciales (índice en memoria): zona visible del mapa y reactores más cercanos
+    path('api/reactores/caja/', views.api_reactores_en_caja, name='api_reactores_en_caja'),
+    path('api/reactores/cercanos/', views.api_reactores_cercanos, name='api_reactores_cercanos'),
+
+    # Teselas con los reactores agrupados (clusters) para los marcadores del atlas
+    path('api/tiles/<int:z>/<int:x>/<int:y>/', views.api_tesela, name='api_tesela'),
+
+    # Analítica de la flota (matrices de NumPy en memoria): percentiles, series y agregados
+    path('api/analitica/reactor/<int:pk>/percentil/', views.api_percentil_reactor, name='api_percentil_reactor'),
+    path('api/analitica/reactor/<int:pk>/serie/', views.api_serie_reactor, name='api_serie_reactor'),
+    path('api/analitica/flota/', views.api_agregado_flota, name='api_agregado_flota'),
+
     # API para obtener los datos JSON completos de un reactor (usada por los modales de detalle)
     path('api/reactor-datos/<int:pk>/', views.api_reactor_datos, name='api_reactor_datos'),
 
@@ -35,8 +58,18 @@ urlpatterns = [
     # --- AÑADE ESTA NUEVA RUTA DE API ---
     path('api/datos-ciclo-vida/', views.api_datos_ciclo_vida, name='api_datos_ciclo_vida'),
 
+    # Proyección de la potencia instalada por año según la vida útil de los reactores
+    path('api/proyeccion-capacidad/', views.api_proyeccion_capacidad, name='api_proyeccion_capacidad'),
+
+    # Exportación masiva del historial (CSV, NDJSON, Parquet o Arrow) en streaming
+    path('api/exportar/historial/', views.api_exportar_historial, name='api_exportar_historial'),
+
 
      # --- NUEVAS RUTAS PARA LA ENCICLOPEDIA DE MODELOS ---
     path('enciclopedia-tipos/', views.vista_enciclopedia_tipos, name='enciclopedia_tipos'),
     path('api/datos-tipo/<str:tipo>/', views.api_datos_tipo, name='api_datos_tipo'),
-]
\ No newline at end of file
+]
+
+# Con ASGI, las APIs que consultan la BD se sirven con sus variantes asíncronas
+if settings.APIS_ASYNC:
+    urlpatterns = con_vistas_async(urlpatterns)
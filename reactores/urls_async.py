@@ -0,0 +1,7 @@
+# En reactores/urls_async.py
+# Las rutas de la app tal como las sirve urls.py con APIS_ASYNC activado. Las usan las
+# pruebas y el benchmark de carga (como ROOT_URLCONF) sin cambiar la configuración.
+from .api_async import con_vistas_async
+from .urls import urlpatterns as _rutas
+
+urlpatterns = con_vistas_async(_rutas)
@@ -1,72 +1,108 @@
 import json
+import math
 from django.shortcuts import render
-from django.http import JsonResponse
-from django.db.models import Count, Sum, F
-from django.forms.models import model_to_dict
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.crypto import constant_time_compare
 from .models import HistorialRendimiento, Reactor
-from django.db.models import Avg
-from datetime import timedelta
+from .estadisticas import estadisticas_dashboard
+from .analitica_tipos import datos_tipo
+from .busqueda import MAX_RESULTADOS, buscar_reactores
+from .ciclo_vida import VIDA_UTIL_ANOS, filas_ciclo_vida, json_columnar_ciclo_vida
+from .detalle import MAX_REACTORES_POR_LOTE, obtener_reactores
+from .espacial import LIMITE_CAJA, MAX_VECINOS, como_dict, indice_espacial
+from .exportacion import FORMATOS, exportar, filas_exportacion
+from .flota import AGRUPACIONES, FUNCIONES, MAX_VENTANA, METRICAS, a_lista, matriz_flota, media_movil
+from .decorators import api_condicional, pagina_cacheada
+from .geometria import CODIFICACIONES, DIRECTORIO_SALIDA, codificacion_preferida, manifiesto
+from .instrumentacion import metricas
+from .mapa import datos_mapa
+from . import opciones
+from .proyeccion import ESCENARIOS_VIDA, VIDA_MAXIMA, VIDA_MINIMA, leer_vidas_por_tipo, proyeccion
+from .teselas import ZOOM_MAXIMO, tesela
 
 # ==============================================================================
 # ## VISTAS PRINCIPALES DE PÁGINAS ##
 # ==============================================================================
 
+@pagina_cacheada
 def vista_dashboard(request):
     """
     Renderiza la página principal del dashboard con estadísticas, gráficas y guías.
     """
-    # --- Cálculos para las tarjetas de métricas (KPIs) ---
-    total_reactores = Reactor.objects.count()
-    paises_con_reactores = Reactor.objects.values('pais').distinct().count()
-    potencia_total = Reactor.objects.aggregate(total_power=Sum('potencia_neta'))['total_power']
-
-    # --- Datos para la lista completa y la gráfica de barras ---
-    top_paises = Reactor.objects.values('pais').annotate(total=Count('id')).order_by('-total')[:5]
-    todos_los_paises = Reactor.objects.values('pais').annotate(total=Count('id')).order_by('-total')
-    
-    top_paises_chart_data = {
-        'labels': [p['pais'] for p in top_paises],
-        'data': [p['total'] for p in top_paises],
-    }
-    
+    # --- KPIs, ranking de países y gráfica de barras (cacheados) ---
+    return render(request, 'reactores/dashboard.html', _contexto_dashboard(estadisticas_dashboard()))
+
+
+def _contexto_dashboard(estadisticas):
     # --- Datos estáticos para la gráfica de donut ---
     energy_mix_data = {
         'labels': ['Combustibles Fósiles', 'Hidroeléctrica', 'Nuclear', 'Eólica y Solar', 'Otras Renovables'],
         'data': [59, 15, 9, 13, 4],
     }
 
-    context = {
-        'total_reactores': total_reactores,
-        'paises_con_reactores': paises_con_reactores,
-        'potencia_total_gw': round(potencia_total / 1000) if potencia_total else 0,
-        'todos_los_paises': todos_los_paises,
+    return {
+        **estadisticas,
         'energy_mix_json': json.dumps(energy_mix_data),
-        'top_paises_chart_json': json.dumps(top_paises_chart_data)
     }
-    return render(request, 'reactores/dashboard.html', context)
 
 
 
+@pagina_cacheada
 def vista_atlas(request):
     """
     Renderiza la página del atlas interactivo.
     Pasa la lista de países para el menú desplegable.
     """
-    paises = Reactor.objects.values('pais').distinct().order_by('pais')
+    geometria = manifiesto()
     context = {
-        'paises': paises
+        'paises': opciones.paises(),
+        # Niveles de detalle del mapa; vacío si aún no se ha ejecutado construir_geometria
+        'niveles_mapa': [
+            {'zoom_max': nivel['zoom_max'], 'url': reverse('geometria_mapa', args=[nivel['archivo']])}
+            for nivel in (geometria['niveles'] if geometria else [])
+        ],
     }
     return render(request, 'reactores/atlas.html', context)
 
 
+def geometria_mapa(request, archivo):
+    """
+    Sirve un fichero de geometría del mapa en la versión precomprimida (.br o .gz)
+    que acepte el navegador. Como el nombre lleva un hash del contenido, se puede
+    cachear indefinidamente.
+    """
+    geometria = manifiesto()
+    if not geometria or archivo not in {nivel['archivo'] for nivel in geometria['niveles']}:
+        raise Http404("Geometría no encontrada")
+
+    ruta = DIRECTORIO_SALIDA / archivo
+    codificacion = codificacion_preferida(request.headers.get('Accept-Encoding'))
+    if codificacion:
+        comprimido = ruta.with_name(archivo + dict(CODIFICACIONES)[codificacion])
+        if comprimido.exists():
+            ruta = comprimido
+        else:
+            codificacion = None
+
+    respuesta = FileResponse(open(ruta, 'rb'), content_type='application/json')
+    if codificacion:
+        respuesta['Content-Encoding'] = codificacion
+    patch_vary_headers(respuesta, ['Accept-Encoding'])
+    patch_cache_control(respuesta, public=True, max_age=365 * 24 * 3600, immutable=True)
+    return respuesta
+
+
+@pagina_cacheada
 def vista_comparador(request):
     """
     Renderiza la página del comparador interactivo.
     Pasa la lista de tipos de reactores para el primer filtro.
     """
-    tipos = Reactor.objects.exclude(tipo_reactor_categoria__isnull=True).values_list('tipo_reactor_categoria', flat=True).distinct().order_by('tipo_reactor_categoria')
     context = {
-        'tipos': tipos
+        'tipos': opciones.tipos()
     }
     return render(request, 'reactores/comparador.html', context)
 
@@ -75,200 +111,407 @@ def vista_comparador(request):
 # ## VISTAS DE API (PARA SER USADAS POR JAVASCRIPT) ##
 # ==============================================================================
 
+@api_condicional
 def api_datos_mapa(request):
     """
-    API que devuelve datos agregados por país para colorear el mapa del atlas.
-    Incluye el diccionario de alias definitivo y verificado.
+    API que devuelve datos agregados por país para colorear el mapa del atlas,
+    indexados por el ID del país en el mapa (ver reactores/mapa.py).
     """
-    # --- DICCIONARIO DE ALIAS DEFINITIVO ---
-    alias_paises = {
-        # El nombre en la BD es 'United States Of America', el del mapa es 'United States of America'
-        "United States Of America": "United States of America",
-        
-        # 'South Korea' y 'Russia' ya coinciden en la BD y en el mapa, por lo que no necesitan alias.
-    }
-
-    datos_paises = Reactor.objects.values('pais').annotate(total_reactores=Count('id')).order_by('pais')
-    
-    resultado = []
-    for item in datos_paises:
-        # Usamos el alias si existe; si no, usamos el nombre original de la base de datos
-        nombre_pais_mapa = alias_paises.get(item['pais'], item['pais'])
-        resultado.append({
-            'pais': nombre_pais_mapa,
-            'db_name': item['pais'], # El nombre original para hacer búsquedas
-            'total_reactores': item['total_reactores']
-        })
-        
-    return JsonResponse(resultado, safe=False)
+    return JsonResponse(datos_mapa())
 
 
+@api_condicional
 def api_reactores_por_pais(request):
     """
     API: Devuelve la lista de reactores de un país específico.
     Usado por el atlas.
     """
-    pais = request.GET.get('pais')
-    if not pais:
-        return JsonResponse({'reactores': []})
-    
-    reactores = Reactor.objects.filter(pais=pais).order_by('nombre')
-    lista_reactores = list(reactores.values('id', 'nombre', 'potencia_neta'))
-    return JsonResponse({'reactores': lista_reactores})
+    return JsonResponse({'reactores': list(_consulta_reactores_por_pais(request))})
 
 
+@api_condicional
 def api_paises_por_tipo(request):
     """
     API: Devuelve los países que tienen un TIPO de reactor específico.
     """
-    tipo = request.GET.get('tipo')
-    if not tipo:
-        return JsonResponse({'paises': []})
-    
-    paises = Reactor.objects.filter(tipo_reactor_categoria=tipo).values('pais').distinct().order_by('pais')
-    return JsonResponse({'paises': list(paises)})
+    return JsonResponse({'paises': list(_consulta_paises_por_tipo(request))})
 
 
+@api_condicional
 def api_reactores_por_tipo_y_pais(request):
     """
     API: Devuelve los reactores para un TIPO y país específicos.
     """
+    return JsonResponse({'reactores': list(_consulta_reactores_por_tipo_y_pais(request))})
+
+
+# Las consultas de las tres APIs anteriores, compartidas con sus variantes asíncronas
+# (api_async.py), que solo cambian la forma de recorrerlas. Sin los parámetros
+# necesarios devuelven none(): una lista vacía sin tocar la BD.
+
+def _consulta_reactores_por_pais(request):
+    pais = request.GET.get('pais')
+    if not pais:
+        return Reactor.objects.none()
+    return Reactor.objects.filter(pais=pais).order_by('nombre').values('id', 'nombre', 'potencia_neta')
+
+
+def _consulta_paises_por_tipo(request):
+    tipo = request.GET.get('tipo')
+    if not tipo:
+        return Reactor.objects.none()
+    return Reactor.objects.filter(tipo_reactor_categoria=tipo).values('pais').distinct().order_by('pais')
+
+
+def _consulta_reactores_por_tipo_y_pais(request):
     tipo = request.GET.get('tipo')
     pais = request.GET.get('pais')
     if not tipo or not pais:
-        return JsonResponse({'reactores': []})
-    
-    reactores = Reactor.objects.filter(tipo_reactor_categoria=tipo, pais=pais).order_by('nombre')
-    lista_reactores = list(reactores.values('id', 'nombre'))
-    return JsonResponse({'reactores': lista_reactores})
+        return Reactor.objects.none()
+    return Reactor.objects.filter(tipo_reactor_categoria=tipo, pais=pais).order_by('nombre').values('id', 'nombre')
 
 
-def api_reactor_datos(request, pk):
+@api_condicional
+def api_reactores(request):
     """
-    API: Devuelve todos los datos de un solo reactor en formato JSON.
-    Usado por el modal de detalles tanto en el atlas como en el comparador.
+    API: Devuelve los datos de varios reactores en una sola petición.
+    Uso: ?ids=1,2,3 y, opcionalmente, &include=historial,resumen para añadir su historial
+    año a año y/o su resumen de rendimiento (una fila por reactor).
+    Usado por los modales del atlas y por el comparador.
+    """
+    try:
+        ids, incluir = _parametros_lote(request)
+    except ValueError as error:
+        return JsonResponse({'success': False, 'error': str(error)}, status=400)
+
+    reactores = obtener_reactores(ids, incluir_historial='historial' in incluir, incluir_resumen='resumen' in incluir)
+    return _respuesta_lote(ids, reactores)
+
+
+def _parametros_lote(request):
+    # (ids sin repetir, lo que se pide con include); ValueError si los ids no son válidos
+    try:
+        ids = list(dict.fromkeys(int(i) for i in request.GET.get('ids', '').split(',') if i.strip()))
+    except ValueError:
+        raise ValueError('El parámetro ids debe ser una lista de números') from None
+    if len(ids) > MAX_REACTORES_POR_LOTE:
+        raise ValueError(f'Máximo {MAX_REACTORES_POR_LOTE} reactores por petición')
+    return ids, request.GET.get('include', '').split(',')
+
+
+def _respuesta_lote(ids, reactores):
+    encontrados = {r['id'] for r in reactores}
+    return JsonResponse({
+        'success': True,
+        'reactores': reactores,
+        'no_encontrados': [pk for pk in ids if pk not in encontrados],
+    })
+
+
+@api_condicional
+def api_buscar_reactores(request):
+    """
+    API: Búsqueda "mientras se escribe" por nombre, nombre alternativo, operador, dueño o modelo.
+    Uso: ?q=texto y, opcionalmente, &limite=N. Tolera tildes, mayúsculas y errores de tecleo.
     """
     try:
-        reactor = Reactor.objects.get(pk=pk)
-        datos = model_to_dict(reactor)
-        return JsonResponse({'success': True, 'datos': datos})
-    except Reactor.DoesNotExist:
+        limite = int(request.GET.get('limite', 10))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'El límite debe ser un número'}, status=400)
+    if not 1 <= limite <= MAX_RESULTADOS:
+        return JsonResponse({'success': False, 'error': f'El límite debe estar entre 1 y {MAX_RESULTADOS}'}, status=400)
+    return JsonResponse({'success': True, 'resultados': buscar_reactores(request.GET.get('q', ''), limite)})
+
+
+@api_condicional
+def api_reactores_en_caja(request):
+    """
+    API: Devuelve los reactores dentro de una zona del mapa, desde el índice espacial en memoria.
+    Uso: ?bbox=oeste,sur,este,norte (como Leaflet) y, opcionalmente, &limite=N.
+    Si oeste > este, la zona cruza el antimeridiano.
+    """
+    try:
+        oeste, sur, este, norte = (float(v) for v in request.GET.get('bbox', '').split(','))
+        limite = int(request.GET.get('limite', LIMITE_CAJA))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'El parámetro bbox debe ser oeste,sur,este,norte'}, status=400)
+    if not (-90 <= sur <= norte <= 90 and -180 <= oeste <= 180 and -180 <= este <= 180):
+        return JsonResponse({'success': False, 'error': 'bbox fuera de rango'}, status=400)
+    if not 1 <= limite <= LIMITE_CAJA:
+        return JsonResponse({'success': False, 'error': f'El límite debe estar entre 1 y {LIMITE_CAJA}'}, status=400)
+
+    # Pedimos uno más para saber si la respuesta se ha quedado corta
+    reactores = indice_espacial().en_caja(sur, oeste, norte, este, limite=limite + 1)
+    return JsonResponse({
+        'success': True,
+        'reactores': [como_dict(r) for r in reactores[:limite]],
+        'truncado': len(reactores) > limite,
+    })
+
+
+@api_condicional
+def api_reactores_cercanos(request):
+    """
+    API: Devuelve los k reactores más cercanos a un punto, ordenados por distancia.
+    Uso: ?lat=40.4&lon=-3.7 y, opcionalmente, &k=10 y &radio_km=500.
+    """
+    try:
+        lat = float(request.GET['lat'])
+        lon = float(request.GET['lon'])
+        k = int(request.GET.get('k', 10))
+        radio_km = float(request.GET['radio_km']) if request.GET.get('radio_km') else None
+        # float() acepta 'nan' e 'inf', que se colarían en las comparaciones de abajo
+        if not all(math.isfinite(v) for v in (lat, lon, radio_km) if v is not None):
+            raise ValueError
+    except (KeyError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Se necesitan lat y lon numéricos'}, status=400)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return JsonResponse({'success': False, 'error': 'Coordenadas fuera de rango'}, status=400)
+    if not 1 <= k <= MAX_VECINOS or (radio_km is not None and radio_km <= 0):
+        return JsonResponse({'success': False, 'error': f'k debe estar entre 1 y {MAX_VECINOS} y radio_km ser positivo'}, status=400)
+
+    vecinos = indice_espacial().cercanos(lat, lon, k=k, radio_km=radio_km)
+    return JsonResponse({'success': True, 'reactores': [como_dict(r, distancia) for distancia, r in vecinos]})
+
+
+@api_condicional
+def api_tesela(request, z, x, y):
+    """
+    API: Devuelve los reactores de una tesela z/x/y del mapa agrupados en clusters,
+    con su número y la potencia neta sumada. Como mucho 64 puntos por tesela.
+    """
+    if z > ZOOM_MAXIMO or x >= 2 ** z or y >= 2 ** z:
+        return JsonResponse({'success': False, 'error': 'Tesela fuera de rango'}, status=404)
+    return JsonResponse(tesela(z, x, y))
+
+
+def _opcion(request, nombre, opciones, defecto):
+    # Parámetro que tiene que ser uno de `opciones`; ValueError con el mensaje para el 400 si no
+    valor = request.GET.get(nombre) or defecto
+    if valor not in opciones:
+        raise ValueError(f"{nombre} debe ser uno de: {', '.join(opciones)}")
+    return valor
+
+
+def _entero(request, nombre, defecto=None):
+    valor = request.GET.get(nombre)
+    if not valor:
+        return defecto
+    try:
+        return int(valor)
+    except ValueError:
+        raise ValueError(f'{nombre} debe ser un número') from None
+
+
+def _ventana(request, defecto):
+    ventana = _entero(request, 'ventana', defecto)
+    if not 1 <= ventana <= MAX_VENTANA:
+        raise ValueError(f'ventana debe estar entre 1 y {MAX_VENTANA}')
+    return ventana
+
+
+@api_condicional
+def api_percentil_reactor(request, pk):
+    """
+    API: Rango percentil de un reactor dentro de su tipo o su país, calculado sobre la
+    matriz de la flota en memoria. Uso: ?metrica=factor_carga&por=tipo y, opcionalmente,
+    &ano=2020 (por defecto se compara la media de toda su vida).
+    """
+    try:
+        metrica = _opcion(request, 'metrica', METRICAS, 'factor_carga')
+        por = _opcion(request, 'por', AGRUPACIONES, 'tipo')
+        ano = _entero(request, 'ano')
+    except ValueError as error:
+        return JsonResponse({'success': False, 'error': str(error)}, status=400)
+
+    resultado = matriz_flota().percentil(pk, metrica, por=por, ano=ano)
+    if resultado is None:
         return JsonResponse({'success': False, 'error': 'Reactor no encontrado'}, status=404)
+    return JsonResponse({'success': True, 'reactor_id': pk, 'metrica': metrica, 'por': por, 'ano': ano, **resultado})
 
 
-def api_reactor_historial(request, pk):
+@api_condicional
+def api_serie_reactor(request, pk):
+    """
+    API: Serie anual de una métrica de un reactor con su media móvil y la variación
+    interanual. Uso: ?metrica=produccion&ventana=3.
+    """
     try:
-        reactor = Reactor.objects.get(pk=pk)
-        # Obtenemos todo el historial relacionado y lo convertimos a una lista de diccionarios
-        historial = list(reactor.historial.all().values())
-        return JsonResponse({'success': True, 'historial': historial})
-    except Reactor.DoesNotExist:
+        metrica = _opcion(request, 'metrica', METRICAS, 'produccion')
+        ventana = _ventana(request, 3)
+    except ValueError as error:
+        return JsonResponse({'success': False, 'error': str(error)}, status=400)
+
+    serie = matriz_flota().serie(pk, metrica, ventana=ventana)
+    if serie is None:
         return JsonResponse({'success': False, 'error': 'Reactor no encontrado'}, status=404)
+    return JsonResponse({'success': True, 'reactor_id': pk, 'metrica': metrica, 'ventana': ventana, **serie})
+
+
+@api_condicional
+def api_agregado_flota(request):
+    """
+    API: Una métrica agregada por país o por tipo y año (media o suma de los reactores
+    del grupo). Uso: ?metrica=produccion&por=pais&funcion=suma y, opcionalmente,
+    &ventana=N para suavizar cada serie con una media móvil de N años.
+    """
+    try:
+        metrica = _opcion(request, 'metrica', METRICAS, 'produccion')
+        por = _opcion(request, 'por', AGRUPACIONES, 'pais')
+        funcion = _opcion(request, 'funcion', FUNCIONES, 'media')
+        ventana = _ventana(request, 1)
+    except ValueError as error:
+        return JsonResponse({'success': False, 'error': str(error)}, status=400)
+
+    matriz = matriz_flota()
+    etiquetas, valores, _ = matriz.agregado(metrica, por, funcion)
+    if ventana > 1:
+        valores = media_movil(valores, ventana)
+    return JsonResponse({
+        'success': True,
+        'metrica': metrica, 'por': por, 'funcion': funcion, 'ventana': ventana,
+        'anos': matriz.anos.tolist(),
+        'grupos': {etiqueta: a_lista(fila, 3) for etiqueta, fila in zip(etiquetas, valores)},
+    })
+
+
+@api_condicional
+def api_reactor_datos(request, pk):
+    """
+    API: Devuelve todos los datos de un solo reactor en formato JSON.
+    Se mantiene por compatibilidad; los modales usan ahora api_reactores.
+    """
+    return _respuesta_reactor(obtener_reactores([pk]))
+
+
+@api_condicional
+def api_reactor_historial(request, pk):
+    return _respuesta_historial(obtener_reactores([pk], incluir_historial=True))
 
 
+def _respuesta_reactor(reactores):
+    # Compartida con api_async.py, como _respuesta_historial: 404 si no existe el reactor
+    if not reactores:
+        return JsonResponse({'success': False, 'error': 'Reactor no encontrado'}, status=404)
+    return JsonResponse({'success': True, 'datos': reactores[0]})
+
+
+def _respuesta_historial(reactores):
+    if not reactores:
+        return JsonResponse({'success': False, 'error': 'Reactor no encontrado'}, status=404)
+    return JsonResponse({'success': True, 'historial': reactores[0]['historial']})
+
+
+@pagina_cacheada
 def vista_ciclo_vida(request):
     # Pasamos los países para poder filtrar el gráfico
     context = {
-        'paises': Reactor.objects.values_list('pais', flat=True).distinct().order_by('pais')
+        'paises': opciones.paises(),
+        'escenarios_vida': ESCENARIOS_VIDA,
+        'vida_por_defecto': VIDA_UTIL_ANOS,
     }
     return render(request, 'reactores/ciclo_vida.html', context)
 
 
 # --- NUEVA API PARA ALIMENTAR LA GRÁFICA ---
+@api_condicional
 def api_datos_ciclo_vida(request):
-    reactores = Reactor.objects.exclude(fecha_primera_conexion__isnull=True)
-    
-    datos_para_grafica = []
-    for reactor in reactores:
-        fecha_inicio = reactor.fecha_primera_conexion
-        
-        # Determinamos la fecha de fin y el estado
-        if reactor.fecha_cierre_permanente:
-            fecha_fin = reactor.fecha_cierre_permanente
-            estado = "Desmantelado"
-        else:
-            # Asumimos una vida útil de 60 años para la proyección
-            fecha_fin = fecha_inicio + timedelta(days=60*365.25)
-            estado = "Operativo (Proyección a 60 años)"
-            
-        datos_para_grafica.append({
-            'nombre': reactor.nombre,
-            'pais': reactor.pais,
-            'inicio': fecha_inicio.isoformat(),
-            'fin': fecha_fin.isoformat(),
-            'estado': estado,
-        })
-        
-    return JsonResponse(datos_para_grafica, safe=False)
+    """
+    API: Devuelve la vida útil (real o proyectada) de los reactores en formato
+    columnar y en streaming. Acepta ?pais= para filtrar directamente en la BD.
+    """
+    filas = filas_ciclo_vida(request.GET.get('pais'))
+    return StreamingHttpResponse(json_columnar_ciclo_vida(filas), content_type='application/json')
+
+
+@api_condicional
+def api_proyeccion_capacidad(request):
+    """
+    API: Potencia instalada (MWe) por año con el cierre de los reactores abiertos
+    proyectado según una vida útil. Uso: ?vida=60 y, opcionalmente, &vida_tipo=PHWR:50,GCR:35
+    (excepciones por tipo), &por=pais|tipo (desglose) y &pais= / &tipo= (filtros).
+    """
+    try:
+        vida = _entero(request, 'vida', VIDA_UTIL_ANOS)
+        if not VIDA_MINIMA <= vida <= VIDA_MAXIMA:
+            raise ValueError(f'La vida útil debe estar entre {VIDA_MINIMA} y {VIDA_MAXIMA} años')
+        vidas_por_tipo = leer_vidas_por_tipo(request.GET.get('vida_tipo'))
+        por = _opcion(request, 'por', AGRUPACIONES, None) if request.GET.get('por') else None
+        pais = request.GET.get('pais') or None
+        tipo = request.GET.get('tipo') or None
+        # Solo valores que existen: cada filtro distinto ocuparía su propia entrada en la caché
+        if pais is not None and pais not in opciones.paises():
+            raise ValueError(f"No hay reactores en '{pais}'")
+        if tipo is not None and tipo not in opciones.tipos():
+            raise ValueError(f"No hay reactores de tipo '{tipo}'")
+    except ValueError as error:
+        return JsonResponse({'success': False, 'error': str(error)}, status=400)
+
+    datos = proyeccion(vida, vidas_por_tipo, por=por, pais=pais, tipo=tipo)
+    return JsonResponse({'success': True, 'vida': vida, 'vida_por_tipo': vidas_por_tipo, 'por': por, **datos})
+
+
+@api_condicional
+def api_exportar_historial(request):
+    """
+    API: Descarga en streaming el historial de rendimiento de todos los reactores, una
+    fila por reactor y año. Uso: ?formato=csv|ndjson|parquet|arrow y, opcionalmente,
+    &pais= / &tipo= y &desde= / &hasta= (años), que se filtran en la BD.
+    """
+    try:
+        formato = _opcion(request, 'formato', FORMATOS, 'csv')
+        filas = filas_exportacion(
+            pais=request.GET.get('pais') or None,
+            tipo=request.GET.get('tipo') or None,
+            desde=_entero(request, 'desde'),
+            hasta=_entero(request, 'hasta'),
+        )
+        contenido = exportar(filas, formato)
+    except ValueError as error:
+        return JsonResponse({'success': False, 'error': str(error)}, status=400)
+
+    tipo_mime, extension, _ = FORMATOS[formato]
+    respuesta = StreamingHttpResponse(contenido, content_type=tipo_mime)
+    respuesta['Content-Disposition'] = f'attachment; filename="historial_reactores.{extension}"'
+    return respuesta
 
 
 
 # --- NUEVA VISTA PARA LA PÁGINA DE LA ENCICLOPEDIA ---
+@pagina_cacheada
 def vista_enciclopedia_tipos(request):
-    tipos = Reactor.objects.exclude(tipo_reactor_categoria__isnull=True).values_list('tipo_reactor_categoria', flat=True).distinct().order_by('tipo_reactor_categoria')
     context = {
-        'tipos': tipos
+        'tipos': opciones.tipos()
     }
     return render(request, 'reactores/enciclopedia_tipos.html', context)
 
 
 # --- NUEVA API QUE CALCULA TODO PARA UN MODELO ESPECÍFICO ---
+@api_condicional
 def api_datos_tipo(request, tipo):
     """
     API que devuelve un análisis completo y agregado para un tipo de reactor.
+    El análisis de todos los tipos se precalcula de una vez y se sirve desde caché.
     """
-    # Filtro base para todos los reactores de este tipo
-    reactores_del_tipo = Reactor.objects.filter(tipo_reactor_categoria=tipo)
-
-    # 1. Cálculos de Estadísticas Clave
-    unidades_totales = reactores_del_tipo.count()
-    potencia_total_gw = reactores_del_tipo.aggregate(total=Sum('potencia_neta'))['total'] or 0
-
-    paises_operadores = list(reactores_del_tipo.values_list('pais', flat=True).distinct().order_by('pais'))
-
-    # Cálculo del tiempo promedio de construcción en años
-    tiempo_construccion_dias = reactores_del_tipo.exclude(
-        fecha_inicio_construccion__isnull=True
-    ).exclude(
-        fecha_primera_conexion__isnull=True
-    ).annotate(
-        duracion=F('fecha_primera_conexion') - F('fecha_inicio_construccion')
-    ).aggregate(
-        promedio=Avg('duracion')
-    )['promedio']
-    
-    tiempo_promedio_construccion = round(tiempo_construccion_dias.days / 365.25, 1) if tiempo_construccion_dias else None
-
-    # 2. Datos para la Gráfica de Rendimiento Agregado
-    historial_agregado = HistorialRendimiento.objects.filter(
-        reactor__tipo_reactor_categoria=tipo
-    ).values('ano').annotate(
-        produccion_promedio=Avg('electricidad_suministrada')
-    ).order_by('ano')
-
-    # 3. Datos para la Línea de Tiempo de Despliegue
-    despliegue_anual = reactores_del_tipo.exclude(
-        fecha_primera_conexion__isnull=True
-    ).extra(
-        select={'ano_conexion': "EXTRACT(year FROM fecha_primera_conexion)"}
-    ).values('ano_conexion').annotate(
-        total=Count('id')
-    ).order_by('ano_conexion')
-
-    # 4. Lista completa de reactores de este tipo
-    lista_reactores = list(reactores_del_tipo.values('id', 'nombre', 'pais', 'status', 'potencia_neta'))
-
-    # 5. Ensamblar la respuesta JSON
-    respuesta = {
-        'estadisticas': {
-            'unidades_totales': unidades_totales,
-            'potencia_total_gw': round(potencia_total_gw / 1000, 2),
-            'paises_operadores': paises_operadores,
-            'tiempo_promedio_construccion': tiempo_promedio_construccion
-        },
-        'grafica_rendimiento': list(historial_agregado),
-        'grafica_despliegue': list(despliegue_anual),
-        'lista_reactores': lista_reactores
-    }
+    return JsonResponse(datos_tipo(tipo))
 
-    return JsonResponse(respuesta)
\ No newline at end of file
+
+# ==============================================================================
+# ## MÉTRICAS ##
+# ==============================================================================
+
+def metricas_prometheus(request):
+    """
+    Métricas de las peticiones de este proceso (InstrumentacionMiddleware) en el formato
+    de texto de Prometheus. Con TOKEN_METRICAS solo responde a quien lo envíe como token
+    Bearer; sin él, a las IPs de IPS_METRICAS (que detrás de un proxy no sirven de nada).
+    """
+    if settings.TOKEN_METRICAS:
+        permitido = constant_time_compare(
+            request.headers.get('Authorization', ''), f'Bearer {settings.TOKEN_METRICAS}'
+        )
+    else:
+        permitido = request.META.get('REMOTE_ADDR') in settings.IPS_METRICAS
+    if not permitido:
+        raise Http404
+    return HttpResponse(metricas.texto_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')